@@ -0,0 +1,32 @@
+"""Item.load with the "parsel" backend vs the "lxml" backend.
+
+Usage: python -m benchmarks.bench_backends [pages]
+"""
+import sys
+import timeit
+
+from benchmarks.bench_plan import ProductItem, make_response
+
+
+class LxmlProductItem(ProductItem):
+    backend = 'lxml'
+
+
+def main(pages=2000):
+    responses = [make_response(i) for i in range(pages)]
+    for response in responses:
+        response.selector
+
+    parsel_time = timeit.timeit(
+        lambda: [ProductItem.load(r) for r in responses], number=1)
+    lxml_time = timeit.timeit(
+        lambda: [LxmlProductItem.load(r) for r in responses], number=1)
+
+    print('pages:   %d' % pages)
+    print('parsel:  %.1f us/page' % (parsel_time / pages * 1e6))
+    print('lxml:    %.1f us/page' % (lxml_time / pages * 1e6))
+    print('saving:  %.0f%%' % ((1 - lxml_time / parsel_time) * 100))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,35 @@
+"""Duplicate pages: parsing every copy vs the extraction cache.
+
+Usage: python -m benchmarks.bench_cache [filler] [pages]
+"""
+import sys
+import timeit
+
+from crawlit import ExtractionCache
+
+from benchmarks import corpora
+from benchmarks.suite import ProfileItem
+
+
+class CachedProfileItem(ProfileItem):
+    extraction_cache = ExtractionCache()
+
+
+def main(filler=200, pages=200):
+    body = corpora.profile_page(0, filler=filler)
+    CachedProfileItem.load(corpora.make_response(body))
+
+    parse_time = timeit.timeit(
+        lambda: ProfileItem.load(corpora.make_response(body)), number=pages)
+    cache_time = timeit.timeit(
+        lambda: CachedProfileItem.load(corpora.make_response(body)),
+        number=pages)
+
+    print('page size:  %d bytes' % len(body))
+    print('parsed:     %.0f us/page' % (parse_time / pages * 1e6))
+    print('cached:     %.0f us/page' % (cache_time / pages * 1e6))
+    print('speed up:   x%.1f' % (parse_time / cache_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
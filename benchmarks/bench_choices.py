@@ -0,0 +1,42 @@
+"""String(choices=...) cost per value across choice-set sizes.
+
+Compares the single-pass ChoiceMatcher with the former loop running one
+regexp per choice.
+
+Usage: python -m benchmarks.bench_choices [values]
+"""
+import sys
+import timeit
+
+from crawlit import fields
+
+
+def map_choices_per_regexp(field, value):
+    # the former implementation: one regexp search per choice
+    return [choice for choice in field.choices
+            if field._find_pattern(pattern=choice, where=value)]
+
+
+def main(values=500):
+    for size in (10, 100, 500):
+        choices = tuple('category%d' % i for i in range(size))
+        field = fields.String('.category', choices=choices,
+                              multi_choices=True)
+        texts = ['listed in category%d, category%d and more words here'
+                 % (i % size, (i * 7) % size) for i in range(values)]
+
+        old_time = timeit.timeit(
+            lambda: [map_choices_per_regexp(field, t) for t in texts],
+            number=1)
+        new_time = timeit.timeit(
+            lambda: [field._map_choices(t) for t in texts],
+            number=1)
+
+        print('choices: %5d  per-regexp: %8.1f us/value  '
+              'matcher: %5.1f us/value  x%.0f' % (
+                  size, old_time / values * 1e6, new_time / values * 1e6,
+                  old_time / new_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,61 @@
+"""Date values parsing: dateutil per value vs the DateTime field.
+
+Usage: python -m benchmarks.bench_date [values]
+"""
+import sys
+import random
+import timeit
+from datetime import datetime
+
+from dateutil import parser as dateutil_parser
+
+from crawlit import fields
+
+
+FORMATS = {
+    'iso date': '%Y-%m-%d',
+    'iso datetime': '%Y-%m-%dT%H:%M:%S',
+    'us date': '%m/%d/%Y',
+    'month name': '%d %B %Y',
+    'mixed': None,
+}
+
+
+def make_values(date_format, size, seed=0):
+    rnd = random.Random(seed)
+    formats = [f for f in FORMATS.values() if f]
+    values = []
+    for _ in range(size):
+        value = datetime(rnd.randint(1990, 2030), rnd.randint(1, 12),
+                         rnd.randint(1, 28), rnd.randint(0, 23),
+                         rnd.randint(0, 59), rnd.randint(0, 59))
+        values.append(value.strftime(date_format or rnd.choice(formats)))
+    return values
+
+
+def main(size=5000):
+    print('%-14s %12s %12s %9s' % ('values', 'dateutil', 'field',
+                                   'speed up'))
+    for name, date_format in FORMATS.items():
+        values = make_values(date_format, size)
+        field = fields.DateTime('.date')
+
+        def parse_dateutil():
+            for value in values:
+                dateutil_parser.parse(value)
+
+        def parse_field():
+            for value in values:
+                field._to_datetime(value)
+
+        assert [dateutil_parser.parse(v) for v in values] == \
+            [field._to_datetime(v) for v in values]
+        dateutil_time = min(timeit.repeat(parse_dateutil, number=1, repeat=3))
+        field_time = min(timeit.repeat(parse_field, number=1, repeat=3))
+        print('%-14s %9.0f/s %9.0f/s %8.1fx' % (
+            name, size / dateutil_time, size / field_time,
+            dateutil_time / field_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
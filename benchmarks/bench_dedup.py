@@ -0,0 +1,72 @@
+"""Duplicate keys: a set of keys vs the scalable Bloom filter.
+
+Usage: python -m benchmarks.bench_dedup [keys] [error rate]
+"""
+import os
+import gc
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+
+from crawlit.dedup import ScalableBloomFilter
+
+
+def make_keys(start, stop):
+    return [b'["John %d", "Smith"]' % idx for idx in range(start, stop)]
+
+
+def measure_set(count):
+    # the set keeps the keys made of the items, so they're made here
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    seen = set()
+    for key in (b'["John %d", "Smith"]' % idx for idx in range(count)):
+        if key not in seen:
+            seen.add(key)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, size
+
+
+def measure_bloom(keys, error_rate, probes):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        bloom_filter = ScalableBloomFilter(
+            os.path.join(tmp_dir, 'bloom'), capacity=len(keys) // 16,
+            error_rate=error_rate)
+        start = time.perf_counter()
+        for key in keys:
+            bloom_filter.add(key)
+        elapsed = time.perf_counter() - start
+        false_positives = sum(key in bloom_filter for key in probes)
+        result = (elapsed, bloom_filter.nbytes, len(bloom_filter.filters),
+                  false_positives / len(probes),
+                  bloom_filter.estimate_error_rate())
+        bloom_filter.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+    return result
+
+
+def main(count=200000, error_rate=0.001):
+    keys = make_keys(0, count)
+    probes = make_keys(count, count * 2)
+    set_time, set_size = measure_set(count)
+    bloom_time, bloom_size, filters, measured, estimated = measure_bloom(
+        keys, error_rate, probes)
+
+    print('keys: %d, error rate: %g' % (count, error_rate))
+    print('%-6s %11s %12s' % ('', 'keys/s', 'bytes/key'))
+    print('%-6s %9.0f/s %12.1f' % ('set', count / set_time, set_size / count))
+    print('%-6s %9.0f/s %12.1f  %d filters' % (
+        'bloom', count / bloom_time, bloom_size / count, filters))
+    print('false positives: %.4f%% measured, %.4f%% estimated' % (
+        measured * 100, estimated * 100))
+
+
+if __name__ == '__main__':
+    main(*[f(a) for f, a in zip((int, float), sys.argv[1:])])
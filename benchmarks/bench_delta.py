@@ -0,0 +1,45 @@
+"""Delta crawl: fingerprint store lookups and the file size per key.
+
+Usage: python -m benchmarks.bench_delta [keys]
+"""
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+
+from crawlit.delta import UNCHANGED, FingerprintStore
+
+
+def main(size=200000):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        store = FingerprintStore(os.path.join(tmp_dir, 'store'),
+                                 capacity=1024)
+        keys = [b'https://a.com/%d' % idx for idx in range(size)]
+
+        def check(values_hash):
+            for key in keys:
+                store.check(key, values_hash)
+
+        store.start_generation()
+        insert_time = timeit.timeit(lambda: check(1), number=1)
+        store.start_generation()
+        lookup_time = timeit.timeit(lambda: check(1), number=1)
+        assert all(store.check(key, 1) == UNCHANGED for key in keys[:100])
+        compact_time = timeit.timeit(lambda: store.compact(), number=1)
+        store.close()
+        file_size = os.path.getsize(store.path)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    print('keys:     %d' % size)
+    print('insert:   %9.0f/s (with the growth)' % (size / insert_time))
+    print('lookup:   %9.0f/s' % (size / lookup_time))
+    print('compact:  %9.2fs' % compact_time)
+    print('file:     %9.1f bytes/key, %.1f GB per 100M keys' % (
+        file_size / size, file_size / size * 1e8 / 2 ** 30))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
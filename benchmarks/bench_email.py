@@ -0,0 +1,50 @@
+"""Email regexp search vs the anchor prefiltered matcher on worst cases.
+
+Usage: python -m benchmarks.bench_email [size]
+"""
+import re
+import sys
+import timeit
+
+from crawlit.fields import Email, EmailMatcher
+
+from benchmarks import corpora
+
+
+def make_cases(size):
+    return {
+        'long word': 'a' * size,
+        'dotted words': 'a.' * (size // 2),
+        'anchor, no domain dot': 'a@' + 'a' * size,
+        'hyphenated domain': 'a@' + 'a-' * (size // 2),
+        'many anchors': 'ab@cd ' * (size // 6),
+        'text blob': corpora.email_heavy(0, values=size // 500 or 1),
+    }
+
+
+def measure(search, text):
+    number = 1
+    while True:
+        elapsed = timeit.timeit(lambda: search(text), number=number)
+        if elapsed >= 0.2 or number >= 1000:
+            return elapsed / number
+        number *= 10
+
+
+def main(size=20000):
+    regexp = re.compile(Email.default_regexp, re.UNICODE)
+    matcher = EmailMatcher(Email.default_regexp, Email.local_chars)
+
+    print('%-24s %12s %12s %9s' % ('input (%d chars)' % size, 'regexp',
+                                   'matcher', 'speed up'))
+    for name, text in make_cases(size).items():
+        assert regexp.findall(text) == matcher.findall(text)
+        regexp_time = measure(regexp.search, text)
+        matcher_time = measure(matcher.search, text)
+        print('%-24s %9.2f ms %9.2f ms %8.0fx' % (
+            name, regexp_time * 1e3, matcher_time * 1e3,
+            regexp_time / matcher_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,103 @@
+"""Export: scrapy JsonLinesItemExporter vs the columnar exporters.
+
+Usage: python -m benchmarks.bench_export [items]
+"""
+import io
+import gc
+import sys
+import gzip
+import time
+import tracemalloc
+from datetime import date
+
+from scrapy.exporters import JsonLinesItemExporter
+
+from crawlit import Item, fields
+from crawlit.exporters import (
+    ColumnBatch, CsvGzipItemExporter, NdjsonGzipItemExporter,
+    ParquetItemExporter)
+
+
+class ProfileItem(Item):
+    first_name = fields.String('.first-name::text')
+    last_name = fields.String('.last-name::text')
+    gender = fields.String('.gender::text', choices=('m', 'f', 'u'))
+    age = fields.Integer('.age::text')
+    rating = fields.Float('.rating::text')
+    active = fields.Boolean('.active::text')
+    birthday = fields.Date('.birthday::text')
+    phones = fields.String('.phone::text', multi_selector=True)
+
+
+def make_items(count):
+    return [ProfileItem(first_name=['John'], last_name=['Smith'],
+                        gender=['m'], age=[idx % 90], rating=[idx / 7],
+                        active=[bool(idx % 2)],
+                        birthday=[date(1950 + idx % 50, 1, 1)],
+                        phones=['+1-555-%04d' % (idx % 10000)] * (idx % 3))
+            for idx in range(count)]
+
+
+class GzipJsonLinesExporter(JsonLinesItemExporter):
+    """The scrapy exporter writing through gzip as the baseline."""
+
+    def __init__(self, file, **kwargs):
+        self.stream = gzip.GzipFile(fileobj=file, mode='wb')
+        super(GzipJsonLinesExporter, self).__init__(self.stream, **kwargs)
+
+    def finish_exporting(self):
+        self.stream.close()
+
+
+def export(exporter_class, items):
+    output = io.BytesIO()
+    exporter = exporter_class(output)
+    start = time.perf_counter()
+    exporter.start_exporting()
+    for item in items:
+        exporter.export_item(item)
+    exporter.finish_exporting()
+    return time.perf_counter() - start, len(output.getvalue())
+
+
+def buffered_size(items):
+    gc.collect()
+    tracemalloc.start()
+    rows = [dict(item) for item in items]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rows
+    batch = ColumnBatch(ProfileItem)
+    for item in items:
+        batch.append(item)
+    return size, batch.nbytes
+
+
+def main(count=100000):
+    items = make_items(count)
+    exporters = [('jsonlines.gz', GzipJsonLinesExporter),
+                 ('ndjson.gz', NdjsonGzipItemExporter),
+                 ('csv.gz', CsvGzipItemExporter)]
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print('pyarrow is not installed, parquet is skipped')
+    else:
+        exporters.append(('parquet', ParquetItemExporter))
+
+    print('items: %d' % count)
+    print('%-13s %11s %11s %9s' % ('format', 'items/s', 'file', 'speed up'))
+    baseline = None
+    for name, exporter_class in exporters:
+        elapsed, size = min(export(exporter_class, items) for _ in range(3))
+        baseline = baseline or elapsed
+        print('%-13s %9.0f/s %8.1f MB %8.2fx' % (
+            name, count / elapsed, size / 2 ** 20, baseline / elapsed))
+
+    dict_size, column_size = buffered_size(items)
+    print('buffered rows: %.0f bytes/row as dicts, %.0f bytes/row as '
+          'columns' % (dict_size / count, column_size / count))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
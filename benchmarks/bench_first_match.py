@@ -0,0 +1,43 @@
+"""Single value fields on big pages: every match vs the first match only.
+
+Usage: python -m benchmarks.bench_first_match [nodes] [pages]
+"""
+import sys
+import timeit
+
+from scrapy.http import HtmlResponse
+
+from crawlit import Item, fields
+
+
+class PriceItem(Item):
+    price = fields.Float('.price::text')
+    title = fields.String('.title::text')
+    href = fields.String('//a/@href')
+
+
+def make_response(nodes):
+    body = '<html><body>%s</body></html>' % ''.join(
+        '<div><p class="title"> Item %d </p><p class="price">%d.99</p>'
+        '<a href="/item/%d">more</a></div>' % (i, i, i) for i in range(nodes))
+    return HtmlResponse('https://example.com/', body=body.encode('utf-8'),
+                        encoding='utf-8')
+
+
+def main(nodes=5000, pages=200):
+    response = make_response(nodes)
+    response.selector
+
+    loader_time = timeit.timeit(
+        lambda: PriceItem.load_with_loader(response), number=pages)
+    plan_time = timeit.timeit(
+        lambda: PriceItem.load(response), number=pages)
+
+    print('matches per field: %d' % nodes)
+    print('every match:       %.0f us/page' % (loader_time / pages * 1e6))
+    print('first match:       %.0f us/page' % (plan_time / pages * 1e6))
+    print('speed up:          x%.1f' % (loader_time / plan_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
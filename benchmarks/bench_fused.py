@@ -0,0 +1,61 @@
+"""Field processors: the processors list vs the fused processor.
+
+Usage: python -m benchmarks.bench_fused [values]
+"""
+import sys
+import random
+import timeit
+
+from crawlit import fields
+from crawlit.plans import FieldPlan, Processor
+
+from benchmarks import corpora
+
+
+def make_cases(size, seed=0):
+    rnd = random.Random(seed)
+    words = [' %s ' % rnd.choice(corpora.WORDS) for _ in range(size)]
+    numbers = [' %d ' % rnd.randint(0, 10 ** 6) for _ in range(size)]
+    floats = [' %.2f ' % rnd.uniform(0, 1000) for _ in range(size)]
+    return {
+        'String': (fields.String('a'), words),
+        'String lower': (fields.String('a', lower=True), words),
+        'String multi': (fields.String('a', multi_selector=True), words),
+        'choices': (fields.String('a', choices=corpora.WORDS), words),
+        'Integer': (fields.Integer('a'), numbers),
+        'Float': (fields.Float('a'), floats),
+        'Boolean': (fields.Boolean('a'), words),
+    }
+
+
+def main(size=20000):
+    print('%-14s %12s %12s %9s' % ('field', 'list', 'fused', 'speed up'))
+    for name, (field, texts) in make_cases(size).items():
+        field.name = name
+        fused_plan = FieldPlan(name, field)
+        list_plan = FieldPlan(name, field)
+        list_plan.processors = tuple(Processor(p) for p in field.processors)
+        if field.multi_selector:
+            batches = [texts[i:i + 5] for i in range(0, len(texts), 5)]
+        else:
+            batches = [[text] for text in texts]
+
+        for batch in batches[:100]:
+            assert list_plan.process(batch, {}) == \
+                fused_plan.process(batch, {})
+
+        def process(plan):
+            for batch in batches:
+                plan.process(batch, {})
+
+        list_time = min(timeit.repeat(lambda: process(list_plan), number=1,
+                                      repeat=3))
+        fused_time = min(timeit.repeat(lambda: process(fused_plan), number=1,
+                                       repeat=3))
+        print('%-14s %9.0f/s %9.0f/s %8.2fx' % (
+            name, len(batches) / list_time, len(batches) / fused_time,
+            list_time / fused_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""Peak memory of Item.iterload over growing xml feeds.
+
+Every size runs in its own process, so ru_maxrss is the peak of that run.
+
+Usage: python -m benchmarks.bench_iterload [records...]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+from crawlit import Item, fields
+
+
+class FeedItem(Item):
+    title = fields.String('title::text')
+    price = fields.Float('price::text')
+    stock = fields.Integer('stock::text')
+    tags = fields.String('tag::text', multi_selector=True)
+
+
+def write_feed(path, records):
+    with open(path, 'wb') as f:
+        f.write(b'<?xml version="1.0"?><rss><channel>')
+        for i in range(records):
+            record = (
+                '<item><title> Product %d </title><price>%d.99</price>'
+                '<stock>%d</stock><tag>a</tag><tag>b</tag>'
+                '<description>%s</description></item>'
+            ) % (i, i, i % 100, 'lorem ipsum ' * 20)
+            f.write(record.encode('utf-8'))
+        f.write(b'</channel></rss>')
+
+
+def run(records):
+    fd, path = tempfile.mkstemp(suffix='.xml')
+    os.close(fd)
+    try:
+        write_feed(path, records)
+        size = os.path.getsize(path)
+        start = time.time()
+        count = sum(1 for _ in FeedItem.iterload(path, record_tag='item'))
+        elapsed = time.time() - start
+    finally:
+        os.remove(path)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return records, count, size, elapsed, peak
+
+
+def main(*sizes):
+    sizes = sizes or (10000, 100000, 400000)
+    with Pool(1, maxtasksperchild=1) as pool:
+        for records, count, size, elapsed, peak in pool.imap(run, sizes):
+            print('records: %7d  feed: %5.0f MB  items/s: %6.0f  '
+                  'peak RSS: %4.0f MB' % (records, size / 2 ** 20,
+                                          count / elapsed, peak / 1024))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
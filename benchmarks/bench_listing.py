@@ -0,0 +1,54 @@
+"""Listing page throughput: per-row Item.load loop vs Item.load_many.
+
+Usage: python -m benchmarks.bench_listing [rows] [pages]
+"""
+import sys
+import timeit
+
+from scrapy.http import HtmlResponse
+
+from crawlit import Item, fields
+
+
+class RowItem(Item):
+    title = fields.String('.title::text')
+    price = fields.Float('.price::text')
+    rooms = fields.Integer('.rooms::text')
+    unit = fields.String('.unit::text', choices=('m2', 'ft2'))
+    tags = fields.String('.tag::text', multi_selector=True)
+
+
+def make_response(rows):
+    body = '<html><body><ul>%s</ul></body></html>' % ''.join(
+        '<li class="row"><h2 class="title"> Flat %d </h2>'
+        '<p class="price">%d.50</p><p class="rooms">%d rooms</p>'
+        '<p class="unit">m2</p><i class="tag">new</i><i class="tag">sale</i>'
+        '</li>' % (i, i * 100, i % 5 + 1) for i in range(rows))
+    return HtmlResponse('https://example.com/', body=body.encode('utf-8'),
+                        encoding='utf-8')
+
+
+def main(rows=200, pages=50):
+    response = make_response(rows)
+    response.selector
+
+    def per_row_loop():
+        for row in response.css('li.row'):
+            RowItem.load_with_loader(selector=row)
+
+    def batched():
+        for _ in RowItem.load_many(response, container='li.row'):
+            pass
+
+    loop_time = timeit.timeit(per_row_loop, number=pages)
+    many_time = timeit.timeit(batched, number=pages)
+    total = rows * pages
+
+    print('rows per page:  %d' % rows)
+    print('per-row loop:   %.0f rows/s' % (total / loop_time))
+    print('load_many:      %.0f rows/s' % (total / many_time))
+    print('speed up:       x%.1f' % (loop_time / many_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
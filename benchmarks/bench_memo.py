@@ -0,0 +1,58 @@
+"""Listing rows with repeated values: plain vs memoized field processors.
+
+Usage: python -m benchmarks.bench_memo [rows] [pages]
+"""
+import sys
+import timeit
+
+from crawlit import Item, fields
+
+from benchmarks import corpora
+
+
+class RowItem(Item):
+    price = fields.Float('.price::text')
+    rooms = fields.Integer('.rooms::text')
+    unit = fields.String('.unit::text', choices=('m2', 'ft2'))
+    tags = fields.String('.tag::text', choices=corpora.WORDS,
+                         multi_selector=True)
+
+
+class MemoizedRowItem(Item):
+    price = fields.Float('.price::text', memoize=True)
+    rooms = fields.Integer('.rooms::text', memoize=True)
+    unit = fields.String('.unit::text', choices=('m2', 'ft2'), memoize=True)
+    tags = fields.String('.tag::text', choices=corpora.WORDS,
+                         multi_selector=True, memoize=True)
+
+
+def main(rows=200, pages=20):
+    responses = [corpora.make_response(corpora.listing(seed, rows))
+                 for seed in range(pages)]
+
+    def load(item_class):
+        for response in responses:
+            for _ in item_class.load_many(response, container='li.row'):
+                pass
+
+    plain = [dict(i) for r in responses
+             for i in RowItem.load_many(r, container='li.row')]
+    memoized = [dict(i) for r in responses
+                for i in MemoizedRowItem.load_many(r, container='li.row')]
+    assert plain == memoized
+
+    plain_time = min(timeit.repeat(lambda: load(RowItem), number=1, repeat=3))
+    memo_time = min(timeit.repeat(lambda: load(MemoizedRowItem), number=1,
+                                  repeat=3))
+    total = rows * pages
+
+    print('rows:           %d' % total)
+    print('plain:          %.0f rows/s' % (total / plain_time))
+    print('memoized:       %.0f rows/s' % (total / memo_time))
+    print('speed up:       x%.2f' % (plain_time / memo_time))
+    for name, field in MemoizedRowItem.fields.items():
+        print('%-15s %r' % (name + ' memo:', field.memo))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
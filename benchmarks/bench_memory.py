@@ -0,0 +1,54 @@
+"""Memory of buffered items: regular Item vs compact items.
+
+Usage: python -m benchmarks.bench_memory [items]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from crawlit import Item, fields
+
+
+class ProfileItem(Item):
+    first_name = fields.String('.first-name::text')
+    last_name = fields.String('.last-name::text')
+    gender = fields.String('.gender::text', choices=('m', 'f', 'u'))
+    age = fields.Integer('.age::text')
+    rating = fields.Float('.rating::text')
+
+
+def values(idx):
+    return {
+        'first_name': ['John'],
+        'last_name': ['Smith'],
+        'gender': ['m'],
+        'age': [idx % 90],
+        'rating': [4.5],
+    }
+
+
+def measure(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    items = [factory(values(i)) for i in range(count)]
+    elapsed = time.time() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    gc.collect()
+    return size, elapsed
+
+
+def main(count=1000000):
+    print('items: %d' % count)
+    for name, factory in (('Item', ProfileItem),
+                          ('compact', ProfileItem.get_compact_class())):
+        size, elapsed = measure(factory, count)
+        print('%-8s %7.1f MB  %4.0f bytes/item  %.1f s' % (
+            name, size / 2 ** 20, size / count, elapsed))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,61 @@
+"""Per-page cost of Item.load: scrapy.ItemLoader vs the compiled plan.
+
+Usage: python -m benchmarks.bench_plan [pages]
+"""
+import sys
+import timeit
+
+from scrapy.http import HtmlResponse
+
+from crawlit import Item, fields
+
+
+class ProductItem(Item):
+    title = fields.String('h1.title::text')
+    sku = fields.String('//span[@itemprop="sku"]/text()', upper=True)
+    price = fields.Float('.price::text')
+    stock = fields.Integer('.stock::text', default=0)
+    currency = fields.String('.currency::text', choices=('USD', 'EUR'))
+    tags = fields.String('.tag::text', multi_selector=True)
+    email = fields.Email('.contact::attr(href)')
+    available = fields.Boolean('.available::text')
+
+
+def make_response(idx):
+    body = (
+        '<html><body>'
+        '<h1 class="title"> Product #{0} </h1>'
+        '<span itemprop="sku">sku-{0}</span>'
+        '<p class="price">{0}.99</p>'
+        '<p class="stock">{0} items</p>'
+        '<p class="currency">USD</p>'
+        '{1}'
+        '<a class="contact" href="mailto:shop{0}@example.com">mail</a>'
+        '<p class="available">yes</p>'
+        '</body></html>'
+    ).format(idx, ''.join('<i class="tag">t%d</i>' % i for i in range(20)))
+    return HtmlResponse('https://example.com/%d' % idx,
+                        body=body.encode('utf-8'), encoding='utf-8')
+
+
+def main(pages=2000):
+    responses = [make_response(i) for i in range(pages)]
+    for response in responses:
+        # parse every page upfront, only extraction is measured
+        response.selector
+
+    loader_time = timeit.timeit(
+        lambda: [ProductItem.load_with_loader(r) for r in responses],
+        number=1)
+    plan_time = timeit.timeit(
+        lambda: [ProductItem.load(r) for r in responses],
+        number=1)
+
+    print('pages:         %d' % pages)
+    print('ItemLoader:    %.1f us/page' % (loader_time / pages * 1e6))
+    print('compiled plan: %.1f us/page' % (plan_time / pages * 1e6))
+    print('saving:        %.0f%%' % ((1 - plan_time / loader_time) * 100))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
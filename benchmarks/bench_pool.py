@@ -0,0 +1,55 @@
+"""Item.load on the reactor thread vs in a pool of worker processes.
+
+Usage: python -m benchmarks.bench_pool [pages] [filler]
+"""
+import os
+import sys
+import time
+
+from twisted.internet import defer, reactor
+
+from crawlit.pool import ExtractionPool
+
+from benchmarks import corpora
+from benchmarks.suite import ProfileItem
+
+
+def run_pool(responses, workers):
+    pool = ExtractionPool(max_workers=workers)
+    # start the workers before measuring
+    pool.executor.map(abs, range(workers))
+    result = {}
+
+    @defer.inlineCallbacks
+    def load_all():
+        start = time.perf_counter()
+        yield defer.gatherResults([pool.load(ProfileItem, response)
+                                   for response in responses])
+        result['time'] = time.perf_counter() - start
+        pool.close()
+
+    load_all().addBoth(lambda _: reactor.stop())
+    return result
+
+
+def main(pages=400, filler=200):
+    responses = [corpora.make_response(corpora.profile_page(seed, filler))
+                 for seed in range(pages)]
+
+    start = time.perf_counter()
+    for response in responses:
+        ProfileItem.load(response)
+    inline_time = time.perf_counter() - start
+
+    workers = os.cpu_count() or 1
+    result = run_pool(responses, workers)
+    reactor.run()
+
+    print('pages:        %d' % pages)
+    print('reactor:      %.0f pages/s' % (pages / inline_time))
+    print('%2d workers:   %.0f pages/s' % (workers, pages / result['time']))
+    print('speed up:     x%.1f' % (inline_time / result['time']))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,56 @@
+"""Head metadata of huge pages: css selectors vs raw body fields.
+
+Raw body items don't build the lxml tree, css ones parse the whole page.
+
+Usage: python -m benchmarks.bench_raw [pages] [filler]
+"""
+import sys
+import timeit
+
+from crawlit import Item, fields
+
+from benchmarks import corpora
+
+
+class CssProductItem(Item):
+    canonical = fields.String('link[rel=canonical]::attr(href)')
+    title = fields.String('meta[property="og:title"]::attr(content)')
+    sku = fields.String('script[type="application/ld+json"]::text',
+                        regexp=r'"sku": "([^"]+)"')
+
+
+class RawProductItem(Item):
+    canonical = fields.Regex(r'<link rel="canonical" href="([^"]+)"')
+    title = fields.Regex(r'<meta property="og:title" content="([^"]+)"')
+    sku = fields.JSONPath('$.sku')
+
+
+def main(pages=20, filler=5000):
+    bodies = [corpora.product_page(seed, filler) for seed in range(pages)]
+
+    def load(item_class):
+        for body in bodies:
+            response = corpora.make_response(body)
+            item_class.load(response)
+
+    for body in bodies:
+        response = corpora.make_response(body)
+        assert dict(CssProductItem.load(response)) == \
+            dict(RawProductItem.load(corpora.make_response(body)))
+
+    response = corpora.make_response(bodies[0])
+    RawProductItem.load(response)
+    assert response._cached_selector is None, 'the page is parsed'
+
+    css_time = min(timeit.repeat(lambda: load(CssProductItem), number=1,
+                                 repeat=3))
+    raw_time = min(timeit.repeat(lambda: load(RawProductItem), number=1,
+                                 repeat=3))
+    print('page size:      %.0f KB' % (len(bodies[0]) / 1024))
+    print('css fields:     %.2f ms/page' % (css_time / pages * 1e3))
+    print('raw fields:     %.2f ms/page' % (raw_time / pages * 1e3))
+    print('speed up:       x%.1f' % (css_time / raw_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""Field regexps: string patterns per call vs the compiled field regexps.
+
+Many item classes with regexp fields overflow the module level cache of
+re, so string patterns are compiled again and again.
+
+Usage: python -m benchmarks.bench_regexp [classes] [fields] [texts]
+"""
+import re
+import sys
+import timeit
+
+from scrapy.utils.misc import extract_regex
+
+from crawlit import Item, fields
+
+
+TEXT = 'id-%d: 1 234,50 EUR, 12 pcs, seen 3 times, rating 4.5'
+
+
+def make_item_classes(classes, fields_per_class):
+    item_classes = []
+    for idx in range(classes):
+        namespace = {}
+        for number in range(fields_per_class):
+            pattern = r'id-%d: (?P<extract>[\d ]+),(\d+)' % (
+                idx * fields_per_class + number)
+            namespace['f%d' % number] = fields.String('.value::text',
+                                                      regexp=pattern)
+        namespace['price'] = fields.Float('.price::text', delimiter=',')
+        namespace['count'] = fields.Integer('.count::text')
+        item_classes.append(type('Item%d' % idx, (Item,), namespace))
+    return item_classes
+
+
+def main(classes=60, fields_per_class=10, texts=50):
+    item_classes = make_item_classes(classes, fields_per_class)
+    texts = [TEXT % i for i in range(texts)]
+    field_plans = [plan for item_class in item_classes
+                   for plan in item_class.get_plan().fields]
+    patterns = [plan.field._regexp for plan in field_plans]
+
+    def per_call():
+        for text in texts:
+            for pattern in patterns:
+                extract_regex(pattern, text)
+
+    def compiled():
+        for text in texts:
+            for plan in field_plans:
+                plan._apply_regexp([text])
+
+    for text in texts[:10]:
+        assert [extract_regex(p, text) for p in patterns] == \
+            [plan._apply_regexp([text]) for plan in field_plans]
+
+    re.purge()
+    per_call_time = min(timeit.repeat(per_call, number=1, repeat=3))
+    compiled_time = min(timeit.repeat(compiled, number=1, repeat=3))
+    calls = len(texts) * len(patterns)
+    print('regexps:        %d' % len(patterns))
+    print('string pattern: %.0f searches/s' % (calls / per_call_time))
+    print('compiled:       %.0f searches/s' % (calls / compiled_time))
+    print('speed up:       x%.1f' % (per_call_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,166 @@
+"""Offline HTML corpora of the benchmark suite.
+
+Synthetic pages are generated from a fixed seed, so every run parses the
+same bytes. Recorded pages are stored next to this module.
+"""
+import os
+import random
+
+from scrapy.http import HtmlResponse
+
+
+CORPORA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORDS = ('flat', 'house', 'studio', 'loft', 'room', 'garden', 'view', 'new',
+         'bright', 'quiet', 'central', 'cozy', 'large', 'modern', 'old')
+CATEGORIES = tuple('category-%03d' % i for i in range(300))
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def make_response(body, url='https://example.com/'):
+    """
+    :param str body: html
+    :param str url:
+    :return HtmlResponse: not parsed yet response
+    """
+    return HtmlResponse(url, body=body.encode('utf-8'), encoding='utf-8')
+
+
+def recorded(name):
+    """
+    :param str name: file name in the corpora directory
+    :return str: html
+    """
+    with open(os.path.join(CORPORA_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def _text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words))
+
+
+def profile_page(seed, filler=0):
+    """Profile page with every field type, "filler" adds noise blocks.
+
+    :param int seed:
+    :param int filler: number of noise paragraphs
+    :return str: html
+    """
+    rnd = random.Random(seed)
+    noise = ''.join(
+        '<div class="block"><p class="text">%s</p><span>%d</span></div>' % (
+            _text(rnd, 30), rnd.randint(0, 10 ** 6))
+        for _ in range(filler))
+    return (
+        '<html><head><title>Profile %(seed)d</title></head><body>'
+        '<div class="profile">'
+        '<h1 class="name"> %(name)s </h1>'
+        '<p class="gender">%(gender)s</p>'
+        '<p class="age">%(age)d years</p>'
+        '<p class="rating">%(rating).2f</p>'
+        '<a class="email" href="mailto:user%(seed)d@example.com">mail</a>'
+        '<p class="verified">%(verified)s</p>'
+        '<p class="weekdays">%(weekdays)s</p>'
+        '</div>%(noise)s</body></html>'
+    ) % {
+        'seed': seed,
+        'name': _text(rnd, 2).title(),
+        'gender': rnd.choice('mfu'),
+        'age': rnd.randint(18, 90),
+        'rating': rnd.uniform(0, 5),
+        'verified': rnd.choice(('yes', '')),
+        'weekdays': ', '.join(rnd.sample(WEEKDAYS, 3)),
+        'noise': noise,
+    }
+
+
+def product_page(seed, filler=5000):
+    """Product page with head metadata and embedded ld+json.
+
+    :param int seed:
+    :param int filler: number of noise paragraphs
+    :return str: html
+    """
+    rnd = random.Random(seed)
+    page = profile_page(seed, filler)
+    head = (
+        '<link rel="canonical" href="https://example.com/p/%(seed)d?a=1&amp;'
+        'b=2"><meta property="og:title" content="%(title)s">'
+        '<script type="application/ld+json">{"@type": "Product", '
+        '"sku": "SKU-%(seed)05d", "name": "%(title)s", "offers": '
+        '[{"price": "%(price).2f", "priceCurrency": "EUR"}]}</script>'
+    ) % {'seed': seed, 'title': _text(rnd, 3).title(),
+         'price': rnd.uniform(1, 1000)}
+    return page.replace('</title>', '</title>' + head, 1)
+
+
+def small(seed):
+    return profile_page(seed)
+
+
+def medium(seed):
+    return profile_page(seed, filler=200)
+
+
+def huge(seed):
+    return profile_page(seed, filler=5000)
+
+
+def listing(seed, rows=100):
+    """Listing page with repeated rows.
+
+    :param int seed:
+    :param int rows:
+    :return str: html
+    """
+    rnd = random.Random(seed)
+    return '<html><body><ul class="results">%s</ul></body></html>' % ''.join(
+        '<li class="row"><h2 class="title"> %s </h2>'
+        '<p class="price">%d.%02d</p><p class="rooms">%d rooms</p>'
+        '<p class="unit">m2</p><i class="tag">%s</i><i class="tag">%s</i>'
+        '</li>' % (_text(rnd, 4), rnd.randint(100, 5000),
+                   rnd.randint(0, 99), rnd.randint(1, 6),
+                   rnd.choice(WORDS), rnd.choice(WORDS))
+        for _ in range(rows))
+
+
+def choice_heavy(seed, values=200):
+    """Page with lots of category labels out of hundreds of choices.
+
+    :param int seed:
+    :param int values:
+    :return str: html
+    """
+    rnd = random.Random(seed)
+    return '<html><body>%s</body></html>' % ''.join(
+        '<p class="category">in %s, %s</p>' % (
+            rnd.choice(CATEGORIES), _text(rnd, 3))
+        for _ in range(values))
+
+
+def numeric_heavy(seed, values=500):
+    """Page with lots of integer and float values.
+
+    :param int seed:
+    :param int values:
+    :return str: html
+    """
+    rnd = random.Random(seed)
+    return '<html><body>%s</body></html>' % ''.join(
+        '<p class="integer">%d pcs</p><p class="float">%.3f kg</p>' % (
+            rnd.randint(-10 ** 6, 10 ** 6), rnd.uniform(-1000, 1000))
+        for _ in range(values))
+
+
+def email_heavy(seed, values=200):
+    """Page with lots of text around few emails.
+
+    :param int seed:
+    :param int values:
+    :return str: html
+    """
+    rnd = random.Random(seed)
+    return '<html><body>%s</body></html>' % ''.join(
+        '<p class="contact">%s write to user%d at example dot com %s</p>' % (
+            _text(rnd, 40), rnd.randint(0, 1000), _text(rnd, 40))
+        for _ in range(values))
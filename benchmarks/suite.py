@@ -0,0 +1,245 @@
+"""Item extraction throughput and memory benchmark suite.
+
+Every case loads a set of fresh (not parsed yet) responses, so the numbers
+include parsing, selectors and processors. Pages per second is the best
+of several repeats, peak memory is the python memory traced during one
+pass (lxml trees allocated by libxml2 aren't traced).
+
+Usage:
+    python -m benchmarks.suite                     # print results
+    python -m benchmarks.suite --save BASELINE     # save the baseline
+    python -m benchmarks.suite --compare BASELINE  # fail on regressions
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from crawlit import Item, fields
+
+from benchmarks import corpora
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    gender = fields.String('.gender::text', choices=('m', 'f', 'u'))
+    age = fields.Integer('.age::text')
+    rating = fields.Float('.rating::text')
+    email = fields.Email('.email::attr(href)')
+    verified = fields.Boolean('.verified::text')
+    weekdays = fields.String('.weekdays::text', multi_choices=True,
+                             choices=corpora.WEEKDAYS)
+
+
+class RecordedProfileItem(Item):
+    first_name = fields.String('.first-name::text')
+    last_name = fields.String('.last-name::text')
+    gender = fields.String('.gender::text', choices=('m', 'f', 'u'))
+    age = fields.Integer('.age::text')
+    rating = fields.Float('.rating::text')
+    reviews = fields.Integer('.reviews::text')
+    phones = fields.String('.phone::attr(href)', multi_selector=True)
+    email = fields.Email('.email-text::text')
+    verified = fields.Boolean('.verified::text')
+    skills = fields.String('.skill::text', multi_selector=True)
+    weekdays = fields.String('.weekdays::text', multi_choices=True,
+                             choices=corpora.WEEKDAYS)
+
+
+class ListingItem(Item):
+    title = fields.String('.title::text')
+    price = fields.Float('.price::text')
+    rooms = fields.Integer('.rooms::text')
+    unit = fields.String('.unit::text', choices=('m2', 'ft2'))
+    tags = fields.String('.tag::text', multi_selector=True)
+
+
+class RecordedListingItem(Item):
+    title = fields.String('.title::text')
+    url = fields.String('.link::attr(href)')
+    price = fields.Integer('.amount::text')
+    area = fields.Float('.area::text')
+    rooms = fields.Integer('.rooms::text')
+    features = fields.String('.features::text', multi_choices=True,
+                             choices=('balcony', 'lift', 'parking', 'tv',
+                                      'microwave'))
+    furnished = fields.Boolean('.furnished::text')
+    agent = fields.Email('.agent::attr(href)')
+
+
+class ChoicesItem(Item):
+    categories = fields.String('.category::text', multi_selector=True,
+                               multi_choices=True, choices=corpora.CATEGORIES)
+
+
+class IntegerItem(Item):
+    first = fields.Integer('.integer::text')
+    values = fields.String('.integer::text', multi_selector=True)
+
+
+class FloatItem(Item):
+    first = fields.Float('.float::text')
+
+
+class EmailItem(Item):
+    emails = fields.Email('.contact::text', multi_selector=True)
+
+
+class BooleanItem(Item):
+    verified = fields.Boolean('.verified::text')
+    missing = fields.Boolean('.missing::text')
+
+
+def load(item_class):
+    return lambda response: item_class.load(response)
+
+
+def load_many(item_class, container):
+    return lambda response: list(item_class.load_many(response,
+                                                      container=container))
+
+
+# name: (html generator, extraction function)
+CASES = {
+    'small/profile': (corpora.small, load(ProfileItem)),
+    'medium/profile': (corpora.medium, load(ProfileItem)),
+    'huge/profile': (corpora.huge, load(ProfileItem)),
+    'recorded/profile': (lambda seed: corpora.recorded('profile.html'),
+                         load(RecordedProfileItem)),
+    'listing/load_many': (corpora.listing,
+                          load_many(ListingItem, 'li.row')),
+    'recorded/listing': (lambda seed: corpora.recorded('listing.html'),
+                         load_many(RecordedListingItem, 'li.listing')),
+    'choices/string': (corpora.choice_heavy, load(ChoicesItem)),
+    'numeric/integer': (corpora.numeric_heavy, load(IntegerItem)),
+    'numeric/float': (corpora.numeric_heavy, load(FloatItem)),
+    'text/email': (corpora.email_heavy, load(EmailItem)),
+    'small/boolean': (corpora.small, load(BooleanItem)),
+}
+
+
+def run_case(make_html, extract, pages=20, repeat=3, min_time=0.5):
+    """
+    :param callable make_html: makes html by seed
+    :param callable extract: runs extraction on a response
+    :param int pages: distinct pages per pass
+    :param int repeat: number of timed runs, the best one is taken
+    :param float min_time: min seconds of a timed run
+    :return dict: pages_per_second, peak_memory
+    """
+    bodies = [make_html(seed) for seed in range(pages)]
+
+    def one_pass():
+        for body in bodies:
+            extract(corpora.make_response(body))
+
+    one_pass()  # warm up compiled plans
+
+    best = None
+    for _ in range(repeat):
+        passes = 0
+        start = time.perf_counter()
+        while True:
+            one_pass()
+            passes += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        rate = passes * pages / elapsed
+        best = rate if best is None else max(best, rate)
+
+    tracemalloc.start()
+    one_pass()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'pages_per_second': best, 'peak_memory': peak}
+
+
+def run(names=None, **kwargs):
+    results = {}
+    for name in names or CASES:
+        make_html, extract = CASES[name]
+        results[name] = run_case(make_html, extract, **kwargs)
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name, result, baseline=None, regressions=()):
+    line = '%-20s %9.1f pages/s %9.1f KB peak' % (
+        name, result['pages_per_second'], result['peak_memory'] / 1024)
+    if baseline:
+        line += '   speed %+6.1f%%  memory %+6.1f%%' % (
+            _change(result, baseline, 'pages_per_second'),
+            _change(result, baseline, 'peak_memory'))
+    if regressions:
+        line += '   REGRESSION: ' + ', '.join(regressions)
+    print(line)
+
+
+def _change(result, baseline, key):
+    return (result[key] / baseline[key] - 1) * 100 if baseline[key] else 0
+
+
+def compare(results, baseline, tolerance=0.15):
+    """
+    :param dict results: current run
+    :param dict baseline: saved run
+    :param float tolerance: allowed relative slow down and memory growth
+    :return list: regressed case names
+    """
+    regressed = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        regressions = []
+        if result['pages_per_second'] < \
+                base['pages_per_second'] * (1 - tolerance):
+            regressions.append('speed')
+        if result['peak_memory'] > base['peak_memory'] * (1 + tolerance):
+            regressions.append('memory')
+        print_result(name, result, base, regressions)
+        if regressions:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('cases', nargs='*', choices=[[]] + list(CASES),
+                        help='cases to run, all by default')
+    parser.add_argument('--save', metavar='PATH',
+                        help='save results as the baseline')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare results with the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed regression, 0.15 by default')
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help='min seconds of a timed run')
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, min_time=args.min_time)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('baseline saved to %s' % args.save)
+
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print('no baseline at %s, run "make bench-baseline" first'
+                  % args.compare)
+            return 1
+        print('\ncompared with %s:' % args.compare)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
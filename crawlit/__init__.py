@@ -1,5 +1,7 @@
 from . import fields
+from .cache import ExtractionCache
+from .context import ExtractionContext
 from .items import Item
 
 
-__all__ = ['fields', 'Item']
+__all__ = ['fields', 'ExtractionCache', 'ExtractionContext', 'Item']
@@ -0,0 +1,70 @@
+"""Command line entry point: python -m crawlit <command> ..."""
+import sys
+import logging
+import argparse
+
+from . import reextract
+
+
+def run_reextract(args):
+    offset = args.offset
+    if offset is None:
+        offset = reextract.read_checkpoint(args.checkpoint) \
+            if args.checkpoint else 0
+
+    if args.output == '-':
+        output = sys.stdout
+    else:
+        output = open(args.output, 'a' if offset else 'w', encoding='utf-8')
+    try:
+        reextract.reextract(
+            args.item_class, args.archives, output, offset=offset,
+            workers=args.workers, executor=args.executor,
+            batch_size=args.batch_size, checkpoint=args.checkpoint,
+            progress=reextract.Progress(offset, interval=args.progress))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='crawlit')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    parser_reextract = commands.add_parser(
+        'reextract', help='load items from WARC files or html dumps')
+    parser_reextract.add_argument(
+        'item_class', help='Item class import path, i.e. myproject.items.Item')
+    parser_reextract.add_argument(
+        'archives', nargs='+',
+        help='WARC files (.warc, .warc.gz), html files or directories')
+    parser_reextract.add_argument(
+        '-o', '--output', default='-', help='NDJSON file, stdout by default')
+    parser_reextract.add_argument(
+        '--checkpoint', help='file keeping the number of the pages done')
+    parser_reextract.add_argument(
+        '--offset', type=int, help='number of the pages to skip, '
+                                   'the checkpoint value by default')
+    parser_reextract.add_argument(
+        '-w', '--workers', type=int, help='pool size, CPU count by default')
+    parser_reextract.add_argument(
+        '--executor', choices=('process', 'thread'), default='process')
+    parser_reextract.add_argument(
+        '--batch-size', type=int, default=64, help='pages per pool task')
+    parser_reextract.add_argument(
+        '--progress', type=float, default=5.0,
+        help='seconds between the progress reports')
+    parser_reextract.set_defaults(func=run_reextract)
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.WARNING)
+    args = get_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
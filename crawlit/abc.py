@@ -10,10 +10,23 @@ class FieldABC:
     :param str name: class variable name in terms of ItemABC
     :param ItemABC parent: an instance which class has the field declared
     :param str selector: css or xpath selector
+    :param crawlit.fields.Memo memo: converted values memo, if any
+    :param bool raw_body: the field is found in the response text without
+                          parsing, see extract_raw
     """
     name = None
     parent = None
     selector = None
+    memo = None
+    raw_body = False
+
+    def extract_raw(self, raw):
+        """Find the raw values of a raw body field.
+
+        :param crawlit.fields.RawBody raw: response text
+        :return list: found strings
+        """
+        raise NotImplementedError
 
     def link_to_item(self, field_name, item):
         """
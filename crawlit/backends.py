@@ -0,0 +1,80 @@
+"""Selector evaluation backends of the extraction plans.
+
+The "parsel" backend evaluates xpath strings with scrapy selectors, just as
+scrapy.ItemLoader does. The "lxml" backend compiles every xpath once into
+lxml.etree.XPath object stored on the field and runs it directly against
+the parsed tree.
+"""
+from lxml import etree
+
+
+def get_backend(name):
+    """
+    :param str name: backend name
+    :return: backend class
+    """
+    try:
+        return backends[name]
+    except KeyError:
+        raise ValueError('Unknown backend "%s", choose one of: %s.' % (
+            name, ', '.join(sorted(backends))))
+
+
+def to_unicode(result, method='html'):
+    """Serialize xpath result the same way scrapy.Selector.extract does.
+
+    :param result: lxml element, string, number or bool
+    :param str method: "html" or "xml"
+    :return str:
+    """
+    try:
+        return etree.tostring(result, method=method, encoding='unicode',
+                              with_tail=False)
+    except (AttributeError, TypeError):
+        if result is True:
+            return '1'
+        elif result is False:
+            return '0'
+        return str(result)
+
+
+class ParselBackend:
+    name = 'parsel'
+
+    @staticmethod
+    def compile(field, xpath):
+        return xpath
+
+    @staticmethod
+    def evaluate(selector, query):
+        return selector.xpath(query).extract()
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    @staticmethod
+    def compile(field, xpath):
+        return field.compile_xpath(xpath)
+
+    @staticmethod
+    def evaluate(selector, query):
+        if isinstance(selector, list):
+            return [value for s in selector
+                    for value in LxmlBackend.evaluate(s, query)]
+
+        try:
+            result = query(selector.root)
+        except etree.XPathError as e:
+            raise ValueError('XPath error: %s in %s' % (e, query.path))
+
+        method = 'xml' if selector.type == 'xml' else 'html'
+        if not isinstance(result, list):
+            return [to_unicode(result, method)]
+        return [to_unicode(r, method) for r in result]
+
+
+backends = {
+    ParselBackend.name: ParselBackend,
+    LxmlBackend.name: LxmlBackend,
+}
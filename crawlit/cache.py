@@ -0,0 +1,316 @@
+"""Extraction results cached by the response body content.
+
+Lots of fetched pages are byte-identical to the ones fetched before:
+mirrors, re-crawls, urls differing by the query string only. The cache
+keeps the field values found in a page by the hash of its body, so loading
+the same Item class from a duplicate page doesn't parse it at all::
+
+    class ProfileItem(Item):
+        extraction_cache = ExtractionCache(max_size=64 * 2 ** 20,
+                                           path='.cache/extraction.db')
+
+Keys include a fingerprint of the Item class field definitions, so any
+change of the fields, their parameters or processors code invalidates
+the results cached for that Item class. The values a processor closure
+or its defaults refer to aren't a part of the fingerprint, the Item
+classes with processors whose results depend on such values must keep
+the "extraction_cache" unset.
+"""
+import re
+import types
+import pickle
+import hashlib
+import sqlite3
+import weakref
+from collections import OrderedDict
+
+from scrapy.exceptions import DropItem
+from scrapy.utils.misc import load_object
+
+
+RegexType = type(re.compile(''))
+
+# field attributes which are not a part of the field definition
+FINGERPRINT_EXCLUDE = frozenset(('name', 'parent', '_xpath_objects',
+                                 '_choice_matcher', '_choice_values', 'memo',
+                                 '_date_formats'))
+
+
+def _describe(value, depth=0):
+    """Stable text description of a field definition part.
+
+    :param value: field attribute value
+    :param int depth: nesting level, deep objects are described by type
+    :return str:
+    """
+    if value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return repr(value)
+    if isinstance(value, dict):
+        return '{%s}' % ', '.join(sorted(
+            '%s: %s' % (_describe(k, depth + 1), _describe(v, depth + 1))
+            for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return '[%s]' % ', '.join(_describe(v, depth + 1) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return '{%s}' % ', '.join(sorted(_describe(v, depth + 1)
+                                         for v in value))
+    if isinstance(value, type):
+        return '%s.%s' % (value.__module__, value.__qualname__)
+    if isinstance(value, types.MethodType):
+        return _describe(value.__func__, depth)
+    if isinstance(value, types.FunctionType):
+        # the code is a part of the definition, not only the name
+        return '%s.%s:%s' % (value.__module__, value.__qualname__,
+                             _hash_code(value.__code__))
+    if isinstance(value, RegexType):
+        return 're(%r, %d)' % (value.pattern, value.flags)
+    if depth > 4 or not hasattr(value, '__dict__'):
+        return _describe(type(value))
+    attributes = {k: v for k, v in vars(value).items()
+                  if k not in FINGERPRINT_EXCLUDE}
+    return '%s(%s)' % (_describe(type(value)), _describe(attributes,
+                                                         depth + 1))
+
+
+def _hash_code(code):
+    digest = hashlib.sha1(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # nested functions, their repr contains the memory address
+            digest.update(_hash_code(const).encode('ascii'))
+        else:
+            digest.update(repr(const).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_item_path(item_class):
+    """
+    :param type item_class: ItemABC subclass
+    :return str: module and qualified name of the class
+    """
+    # scrapy 1.5 ItemMeta makes the Item class without the __qualname__,
+    # the "_class" it's made of keeps the declared one
+    declared = vars(item_class).get('_class', item_class)
+    return '%s.%s' % (item_class.__module__, declared.__qualname__)
+
+
+_import_paths = weakref.WeakKeyDictionary()
+
+
+def get_import_path(item_class):
+    """
+    :param type item_class: ItemABC subclass
+    :return str: path the other processes import the class by
+    :raise ValueError: the class isn't importable by its path
+    """
+    try:
+        return _import_paths[item_class]
+    except KeyError:
+        pass
+    path = get_item_path(item_class)
+    try:
+        imported = load_object(path)
+    except (ImportError, NameError, AttributeError, ValueError):
+        imported = None
+    if imported is not item_class:
+        raise ValueError('%s is not importable by the worker processes, '
+                         'declare it on the module level.' % path)
+    _import_paths[item_class] = path
+    return path
+
+
+def get_fingerprint(item_class):
+    """Hash of the Item class field definitions.
+
+    :param type item_class: ItemABC subclass
+    :return str:
+    """
+    description = []
+    for name, field in sorted(item_class.fields.items()):
+        attributes = {k: v for k, v in vars(field).items()
+                      if k not in FINGERPRINT_EXCLUDE}
+        description.append('%s=%s(%s, %s)' % (
+            name, _describe(type(field)), _describe(dict(field)),
+            _describe(attributes)))
+    description.append(repr(getattr(item_class, 'backend', None)))
+    return hashlib.sha1('\n'.join(description).encode('utf-8')).hexdigest()
+
+
+def normalize_body(body):
+    """Drop the differences which can't change the found values:
+    line endings and whitespace around the document.
+
+    :param bytes body:
+    :return bytes:
+    """
+    return body.replace(b'\r\n', b'\n').strip()
+
+
+class ExtractionCache:
+    """Two tier cache of the extraction results.
+
+    The memory tier is LRU limited by the total size of the pickled
+    results, the optional disk tier is an sqlite database which survives
+    restarts. Dropped items are cached too, loading them raises DropItem
+    again.
+
+    Only the items loaded from a whole response without extra loader
+    context are cached, since the found values depend on the body only,
+    see the module docs for the processors depending on other values.
+    The processes with the other field definitions of the same Item
+    class keep their rows in the disk tier apart.
+
+    :param int max_size: memory tier size limit in bytes
+    :param str path: sqlite database path of the disk tier
+    """
+    sql_create = ('CREATE TABLE IF NOT EXISTS extraction ('
+                  'item TEXT, fingerprint TEXT, body_hash BLOB, value BLOB, '
+                  'PRIMARY KEY (item, fingerprint, body_hash))')
+    sql_select = ('SELECT value FROM extraction '
+                  'WHERE item = ? AND body_hash = ? AND fingerprint = ?')
+    sql_insert = 'INSERT OR REPLACE INTO extraction VALUES (?, ?, ?, ?)'
+    sql_invalidate = ('DELETE FROM extraction '
+                      'WHERE item = ? AND fingerprint != ?')
+
+    def __init__(self, max_size=64 * 2 ** 20, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._fingerprints = weakref.WeakKeyDictionary()
+        self._body_hashes = weakref.WeakKeyDictionary()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, isolation_level=None,
+                                       check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute(self.sql_create)
+
+    def __len__(self):
+        return len(self._memory)
+
+    def __repr__(self):
+        return '<%s hits=%d misses=%d size=%d>' % (
+            self.__class__.__name__, self.hits, self.misses, self.size)
+
+    def get_key(self, item_class, response):
+        """
+        :param type item_class: ItemABC subclass
+        :param scrapy.http.TextResponse response:
+        :return tuple: item path, fingerprint, body hash
+        """
+        try:
+            fingerprint = self._fingerprints[item_class]
+        except KeyError:
+            fingerprint = self._fingerprints[item_class] = \
+                get_fingerprint(item_class)
+            if self._db is not None:
+                # results of the former field definitions never match again
+                self._db.execute(self.sql_invalidate,
+                                 (get_item_path(item_class), fingerprint))
+
+        try:
+            body_hash = self._body_hashes[response]
+        except KeyError:
+            digest = hashlib.blake2b(normalize_body(response.body),
+                                     digest_size=16)
+            # the same bytes give different text in other encoding
+            digest.update(getattr(response, 'encoding', '').encode('utf-8'))
+            body_hash = self._body_hashes[response] = digest.digest()
+
+        return get_item_path(item_class), fingerprint, body_hash
+
+    def get(self, key):
+        """
+        :param tuple key: see get_key
+        :return: cached (values, drop reason) or None
+        """
+        try:
+            data = self._memory[key]
+        except KeyError:
+            data = self._get_from_disk(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._set_in_memory(key, data)
+        else:
+            self._memory.move_to_end(key)
+        self.hits += 1
+        return pickle.loads(data)
+
+    def set(self, key, entry):
+        """
+        :param tuple key: see get_key
+        :param tuple entry: found values dict and drop reason
+        """
+        data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        self._set_in_memory(key, data)
+        if self._db is not None:
+            item_path, fingerprint, body_hash = key
+            self._db.execute(self.sql_insert,
+                             (item_path, fingerprint, body_hash, data))
+
+    def load(self, item_class, response, fill, item_factory=None):
+        """Get the cached item or fill and cache a new one.
+
+        :param type item_class: ItemABC subclass
+        :param scrapy.http.TextResponse response:
+        :param callable fill: fills a new item from the response
+        :param callable item_factory: makes the item of the cached values
+        :return ItemABC: filled instance
+        """
+        key = self.get_key(item_class, response)
+        entry = self.get(key)
+        if entry is None:
+            try:
+                item = fill()
+            except DropItem as e:
+                self.set(key, (None, str(e)))
+                raise
+            self.set(key, (dict(item), None))
+            return item
+
+        values, drop_reason = entry
+        if drop_reason is not None:
+            raise DropItem(drop_reason)
+        return (item_factory or item_class)(values)
+
+    def clear(self):
+        """Remove all the cached results, the disk tier as well."""
+        self._memory.clear()
+        self.size = 0
+        if self._db is not None:
+            self._db.execute('DELETE FROM extraction')
+
+    def close(self):
+        self._memory.clear()
+        self.size = 0
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _get_from_disk(self, key):
+        if self._db is None:
+            return None
+        item_path, fingerprint, body_hash = key
+        row = self._db.execute(self.sql_select, (
+            item_path, body_hash, fingerprint)).fetchone()
+        return row[0] if row else None
+
+    def _set_in_memory(self, key, data):
+        size = len(data)
+        if size > self.max_size:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._memory[key] = data
+        self.size += size
+        while self.size > self.max_size:
+            _, evicted = self._memory.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
@@ -0,0 +1,105 @@
+"""Selector results shared by all the items loaded from one response."""
+import weakref
+
+from .backends import ParselBackend
+from .plans import select
+
+
+def _selector_key(selector):
+    if isinstance(selector, list):
+        return tuple(s.root for s in selector)
+    return selector.root
+
+
+def _query_key(query):
+    # the lxml backend compiles an XPath object per field, so the results
+    # are shared by the source xpath
+    return getattr(query, 'path', query)
+
+
+class ExtractionContext:
+    """Memo of selector results for the lifetime of a response.
+
+    Fields of one or several Item classes that share a selector evaluate it
+    once, rows of the same container are selected once as well.
+    It doesn't keep the response, so it can live as long as the response::
+
+        with ExtractionContext() as extraction:
+            profile = ProfileItem.load(response, extraction_context=extraction)
+            contact = ContactItem.load(response, extraction_context=extraction)
+
+    :param int hits: number of results taken from the memo
+    :param int misses: number of evaluated selectors
+    """
+    _by_response = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._values = {}
+        self._rows = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return '<%s hits=%d misses=%d>' % (
+            self.__class__.__name__, self.hits, self.misses)
+
+    @classmethod
+    def for_response(cls, response):
+        """Get the context bound to the response, it's released
+        together with the response.
+
+        :param scrapy.http.TextResponse response:
+        :return ExtractionContext:
+        """
+        try:
+            return cls._by_response[response]
+        except KeyError:
+            context = cls._by_response[response] = cls()
+            return context
+
+    def close(self):
+        """Release all the memoized results."""
+        self._values.clear()
+        self._rows.clear()
+
+    def evaluate(self, selector, query, evaluate=ParselBackend.evaluate):
+        """Get the strings found by the xpath.
+
+        :param selector: scrapy.Selector or scrapy.SelectorList
+        :param query: xpath compiled by the backend
+        :param callable evaluate: backend evaluate function
+        :return list:
+        """
+        key = (_selector_key(selector), _query_key(query))
+        try:
+            values = self._values[key]
+        except KeyError:
+            self.misses += 1
+            values = self._values[key] = evaluate(selector, query)
+        else:
+            self.hits += 1
+        # processors are free to change the list they got
+        return list(values)
+
+    def select(self, selector, xpath):
+        """Get the nodes found by the xpath, i.e. container rows.
+
+        :param selector: scrapy.Selector or scrapy.SelectorList
+        :param str xpath:
+        :return scrapy.SelectorList:
+        """
+        key = (_selector_key(selector), xpath)
+        try:
+            rows = self._rows[key]
+        except KeyError:
+            self.misses += 1
+            rows = self._rows[key] = select(selector, xpath)
+        else:
+            self.hits += 1
+        return rows
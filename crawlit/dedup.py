@@ -0,0 +1,364 @@
+"""Duplicate item filter on the Item key fields.
+
+The keys seen are kept in a scalable Bloom filter in memory mapped files,
+so the filter survives restarts and the processes of a host can share it.
+It takes 2-5 bytes per key at 0.1% error rate, depending on how full
+the last filter is, instead of ~100 bytes per key of a set::
+
+    class ProfileItem(Item):
+        key_fields = ('first_name', 'last_name', 'birthday')
+
+    ITEM_PIPELINES = {'crawlit.dedup.DedupPipeline': 100}
+    CRAWLIT_DEDUP_PATH = '/var/lib/crawl/%(spider)s.bloom'
+    CRAWLIT_DEDUP_ERROR_RATE = 0.001
+
+The next stats are collected:
+
+    crawlit/dedup/unique      items passed
+    crawlit/dedup/duplicates  items dropped
+    crawlit/dedup/keys        keys in the filter on close
+    crawlit/dedup/bytes       size of the filter files
+    crawlit/dedup/error_rate  estimated false positive rate on close
+"""
+import os
+import math
+import mmap
+import fcntl
+import struct
+import hashlib
+import logging
+
+from scrapy.exceptions import DropItem, NotConfigured
+
+from .items import get_item_class
+
+
+logger = logging.getLogger(__name__)
+
+_header = struct.Struct('<4sIQdIQQI')
+_count = struct.Struct('<Q')
+_slices = struct.Struct('<I')
+_hashes = struct.Struct('<QQ')
+_count_offset = 4 + 4 + 8 + 8 + 4 + 8
+_slices_offset = _count_offset + 8
+HEADER_SIZE = 64
+MAGIC = b'CRBF'
+VERSION = 1
+
+
+def hash_key(key):
+    """
+    :param bytes key:
+    :return tuple: two 64-bit hashes, the second one is odd
+    """
+    h1, h2 = _hashes.unpack(hashlib.blake2b(key, digest_size=16).digest())
+    return h1, h2 | 1
+
+
+class BloomFilter:
+    """Bloom filter of a fixed capacity in a memory mapped file.
+
+    The k bit positions are h1 + i * h2 of the two halves of a 128-bit
+    key hash, the bits follow a 64 bytes header.
+
+    :param str path: file path, it's created if it doesn't exist,
+                     otherwise the parameters are taken from it
+    :param int capacity: keys it's sized for
+    :param float error_rate: false positive rate at the capacity
+    """
+
+    def __init__(self, path, capacity=1000000, error_rate=0.001):
+        self.path = path
+        if not os.path.exists(path):
+            self.create(path, capacity, error_rate)
+        self._file = open(path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.capacity, self.error_rate, self.num_hashes, \
+            self.num_bits, _, _ = _header.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('%s is not a Bloom filter.' % path)
+        self._hash_range = range(self.num_hashes)
+
+    def __repr__(self):
+        return '<%s %s keys=%d capacity=%d>' % (
+            self.__class__.__name__, self.path, self.count, self.capacity)
+
+    @staticmethod
+    def get_size(capacity, error_rate):
+        """
+        :param int capacity:
+        :param float error_rate:
+        :return tuple: number of bits, multiple of 8, and hashes
+        """
+        if capacity < 1:
+            raise ValueError('The "capacity" must be positive.')
+        if not 0 < error_rate < 1:
+            raise ValueError('The "error_rate" must be in (0, 1) range.')
+        num_bits = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, math.ceil(-math.log2(error_rate)))
+        return (num_bits + 7) // 8 * 8, num_hashes
+
+    @classmethod
+    def create(cls, path, capacity, error_rate):
+        """Write a new filter file, an existing one is left as it is.
+
+        :param str path:
+        :param int capacity:
+        :param float error_rate:
+        """
+        num_bits, num_hashes = cls.get_size(capacity, error_rate)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(_header.pack(MAGIC, VERSION, capacity, error_rate,
+                                 num_hashes, num_bits, 0, 1))
+            f.truncate(HEADER_SIZE + num_bits // 8)
+        try:
+            # unlike a rename, a link doesn't replace a file which
+            # another process has just created
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    @property
+    def count(self):
+        return _count.unpack_from(self._mmap, _count_offset)[0]
+
+    @count.setter
+    def count(self, value):
+        _count.pack_into(self._mmap, _count_offset, value)
+
+    @property
+    def nbytes(self):
+        return len(self._mmap)
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def estimate_error_rate(self):
+        """
+        :return float: false positive rate at the current count
+        """
+        fill = 1 - math.exp(-self.num_hashes * self.count / self.num_bits)
+        return fill ** self.num_hashes
+
+    def contains(self, hashes):
+        """
+        :param tuple hashes: see hash_key
+        :return bool: the key is probably added
+        """
+        h1, h2 = hashes
+        num_bits = self.num_bits
+        data = self._mmap
+        for idx in self._hash_range:
+            position = (h1 + idx * h2) % num_bits
+            if not data[HEADER_SIZE + (position >> 3)] & 1 << (position & 7):
+                return False
+        return True
+
+    def add(self, hashes):
+        """
+        :param tuple hashes: see hash_key
+        :return bool: the key was probably added before
+        """
+        h1, h2 = hashes
+        num_bits = self.num_bits
+        data = self._mmap
+        found = True
+        for idx in self._hash_range:
+            position = (h1 + idx * h2) % num_bits
+            offset = HEADER_SIZE + (position >> 3)
+            bit = 1 << (position & 7)
+            byte = data[offset]
+            if not byte & bit:
+                data[offset] = byte | bit
+                found = False
+        if not found:
+            self.count += 1
+        return found
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+
+
+class ScalableBloomFilter:
+    """Bloom filters growing with the number of keys, so the capacity
+    isn't needed to be known (Almeida et al., "Scalable Bloom Filters").
+
+    Every next filter is "growth" times larger with "tightening" times
+    lower error rate, so the total rate stays under the error_rate.
+    The filters are "<path>.0", "<path>.1" and so on, the processes
+    sharing them take a lock of the first one on adding.
+
+    :param str path: path prefix of the filter files
+    :param int capacity: keys of the first filter
+    :param float error_rate: max false positive rate
+    :param int growth: capacity ratio of the next filter
+    :param float tightening: error rate ratio of the next filter
+    :param bool lock: lock the files on adding, they're shared by
+                      processes
+    """
+
+    def __init__(self, path, capacity=1000000, error_rate=0.001, growth=2,
+                 tightening=0.8, lock=True):
+        if not 0 < tightening < 1:
+            raise ValueError('The "tightening" must be in (0, 1) range.')
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.lock = lock
+        self.filters = [BloomFilter(self.get_path(0), capacity,
+                                    error_rate * (1 - tightening))]
+        self._refresh()
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def __contains__(self, key):
+        hashes = hash_key(key)
+        self._refresh()
+        return any(f.contains(hashes) for f in self.filters)
+
+    def __repr__(self):
+        return '<%s %s keys=%d filters=%d>' % (
+            self.__class__.__name__, self.path, len(self), len(self.filters))
+
+    def get_path(self, idx):
+        return '%s.%d' % (self.path, idx)
+
+    @property
+    def nbytes(self):
+        return sum(f.nbytes for f in self.filters)
+
+    def estimate_error_rate(self):
+        """
+        :return float: false positive rate at the current counts
+        """
+        probability = 1.0
+        for bloom_filter in self.filters:
+            probability *= 1 - bloom_filter.estimate_error_rate()
+        return 1 - probability
+
+    def add(self, key):
+        """
+        :param bytes key:
+        :return bool: the key was probably added before
+        """
+        hashes = hash_key(key)
+        if self.lock:
+            fcntl.flock(self.filters[0]._file, fcntl.LOCK_EX)
+        try:
+            self._refresh()
+            if self.filters[-1].is_full:
+                self._grow()
+            # the last filter tells on adding if it has the key
+            for bloom_filter in self.filters[:-1]:
+                if bloom_filter.contains(hashes):
+                    return True
+            return self.filters[-1].add(hashes)
+        finally:
+            if self.lock:
+                fcntl.flock(self.filters[0]._file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        # another process may have added the filters
+        total, = _slices.unpack_from(self.filters[0]._mmap, _slices_offset)
+        while len(self.filters) < total:
+            self.filters.append(BloomFilter(self.get_path(len(self.filters))))
+
+    def _grow(self):
+        last = self.filters[-1]
+        bloom_filter = BloomFilter(self.get_path(len(self.filters)),
+                                   last.capacity * self.growth,
+                                   last.error_rate * self.tightening)
+        self.filters.append(bloom_filter)
+        _slices.pack_into(self.filters[0]._mmap, _slices_offset,
+                          len(self.filters))
+        logger.debug('Bloom filter %s is full at %d keys, added %s',
+                     last.path, last.count, bloom_filter.path)
+
+    def flush(self):
+        for bloom_filter in self.filters:
+            bloom_filter.flush()
+
+    def close(self):
+        for bloom_filter in self.filters:
+            bloom_filter.close()
+
+
+class DedupPipeline:
+    """Drops the items with the keys seen before, see the module docs.
+
+    The items of the classes without key_fields pass.
+
+    :param str path: filter path prefix, "%(spider)s" is the spider name
+    :param int capacity: keys of the first filter
+    :param float error_rate: max false positive rate
+    :param scrapy.statscollectors.StatsCollector stats:
+    """
+    stats_prefix = 'crawlit/dedup'
+
+    def __init__(self, path, capacity=1000000, error_rate=0.001,
+                 stats=None):
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.stats = stats
+        self.filter = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.get('CRAWLIT_DEDUP_PATH'):
+            raise NotConfigured
+        return cls(
+            settings.get('CRAWLIT_DEDUP_PATH'),
+            capacity=settings.getint('CRAWLIT_DEDUP_CAPACITY', 1000000),
+            error_rate=settings.getfloat('CRAWLIT_DEDUP_ERROR_RATE', 0.001),
+            stats=crawler.stats)
+
+    def open_spider(self, spider):
+        self.filter = ScalableBloomFilter(
+            self.path % {'spider': spider.name}, capacity=self.capacity,
+            error_rate=self.error_rate)
+
+    def close_spider(self, spider):
+        error_rate = self.filter.estimate_error_rate()
+        if self.stats is not None:
+            prefix = self.stats_prefix
+            self.stats.set_value(prefix + '/keys', len(self.filter))
+            self.stats.set_value(prefix + '/bytes', self.filter.nbytes)
+            self.stats.set_value(prefix + '/error_rate', error_rate)
+        logger.info('Dedup filter %s: %d keys, %d bytes, %.2g estimated '
+                    'error rate', self.filter.path, len(self.filter),
+                    self.filter.nbytes, error_rate)
+        self.filter.close()
+
+    def process_item(self, item, spider):
+        item_class = get_item_class(item)
+        if not getattr(item_class, 'key_fields', None):
+            return item
+        key = item_class.make_key(item)
+        if self.filter.add(key):
+            self._inc_stats('duplicates')
+            raise DropItem('Duplicate %s: %s' % (
+                item_class.__name__, key.decode('utf-8')))
+        self._inc_stats('unique')
+        return item
+
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value('%s/%s' % (self.stats_prefix, key))
@@ -0,0 +1,304 @@
+"""Delta crawls: only the items changed since the previous crawl go on.
+
+Every item with key fields is looked up by its key in a fingerprint store
+kept between the crawls, the items with the same extracted values as the
+last time are dropped before the pipelines::
+
+    class ProfileItem(Item):
+        key_fields = ('url',)
+        url = fields.String('.url::attr(href)')
+
+    SPIDER_MIDDLEWARES = {'crawlit.delta.DeltaMiddleware': 900}
+    CRAWLIT_DELTA_PATH = '/var/lib/crawl/%(spider)s.delta'
+    CRAWLIT_DELTA_MAX_AGE = 7
+
+The next stats are collected:
+
+    crawlit/delta/new        items seen for the first time
+    crawlit/delta/changed    items with the changed values
+    crawlit/delta/unchanged  dropped items
+    crawlit/delta/keys       keys in the store on close
+    crawlit/delta/expired    keys removed by the compaction
+"""
+import os
+import json
+import mmap
+import struct
+import hashlib
+import logging
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from .items import get_item_class
+
+
+logger = logging.getLogger(__name__)
+
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+_header = struct.Struct('<4sIQQI')
+_entry = struct.Struct('<QQI')
+_key_hash = struct.Struct('<Q')
+HEADER_SIZE = 64
+MAGIC = b'CRDF'
+VERSION = 1
+
+
+def hash_bytes(data):
+    """
+    :param bytes data:
+    :return int: 64-bit hash, never 0
+    """
+    value, = _key_hash.unpack(hashlib.blake2b(data, digest_size=8).digest())
+    return value or 1
+
+
+def hash_item(item):
+    """
+    :param item: filled item
+    :return int: 64-bit hash of the item values
+    """
+    return hash_bytes(json.dumps(dict(item), sort_keys=True, default=str,
+                                 ensure_ascii=False).encode('utf-8'))
+
+
+class FingerprintStore:
+    """Item key hash to item values hash table in a memory mapped file.
+
+    It's an open addressing table of fixed size entries: 8 bytes of the
+    key hash, 8 bytes of the values hash and 4 bytes of the crawl
+    (generation) the key was seen last, so a lookup is a few reads
+    of the mapped pages and 100M keys take 3-4 GB of disk, the memory
+    is the OS page cache. The table is rebuilt twice as large when it's
+    full by max_load and by compact().
+
+    :param str path: file path, it's created if it doesn't exist
+    :param int capacity: initial number of entries
+    :param float max_load: max share of the used entries
+    """
+
+    def __init__(self, path, capacity=1 << 20, max_load=0.7):
+        if not 0 < max_load < 1:
+            raise ValueError('The "max_load" must be in (0, 1) range.')
+        self.path = path
+        self.max_load = max_load
+        self._file = self._mmap = None
+        if not os.path.exists(path):
+            self._create(path, max(capacity, 8), 0)
+        self._open()
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return '<%s %s keys=%d capacity=%d generation=%d>' % (
+            self.__class__.__name__, self.path, self.count, self.capacity,
+            self.generation)
+
+    @staticmethod
+    def _create(path, capacity, generation):
+        with open(path, 'wb') as f:
+            f.write(_header.pack(MAGIC, VERSION, capacity, 0, generation))
+            f.truncate(HEADER_SIZE + capacity * _entry.size)
+
+    def _open(self):
+        self._file = open(self.path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.capacity, self.count, self.generation = \
+            _header.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('%s is not a fingerprint store.' % self.path)
+
+    def close(self):
+        if self._mmap is not None:
+            self._write_header()
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = self._file = None
+
+    def flush(self):
+        self._write_header()
+        self._mmap.flush()
+
+    def _write_header(self):
+        _header.pack_into(self._mmap, 0, MAGIC, VERSION, self.capacity,
+                          self.count, self.generation)
+
+    def start_generation(self):
+        """Start a new crawl, the keys of the next lookups belong to it.
+
+        :return int: the crawl number
+        """
+        self.generation += 1
+        self._write_header()
+        return self.generation
+
+    def _find(self, key_hash):
+        # offset of the entry with the key hash or of the empty one
+        capacity = self.capacity
+        idx = key_hash % capacity
+        data = self._mmap
+        unpack_from = _key_hash.unpack_from
+        while True:
+            offset = HEADER_SIZE + idx * _entry.size
+            stored, = unpack_from(data, offset)
+            if stored == key_hash or not stored:
+                return offset, stored
+            idx += 1
+            if idx == capacity:
+                idx = 0
+
+    def get(self, key):
+        """
+        :param bytes key: item key
+        :return tuple: values hash and generation, None if it isn't stored
+        """
+        offset, stored = self._find(hash_bytes(key))
+        if not stored:
+            return None
+        _, values_hash, generation = _entry.unpack_from(self._mmap, offset)
+        return values_hash, generation
+
+    def check(self, key, values_hash):
+        """Store the item values hash and tell how the item has changed.
+
+        :param bytes key: item key
+        :param int values_hash: see hash_item
+        :return str: NEW, CHANGED or UNCHANGED
+        """
+        key_hash = hash_bytes(key)
+        offset, stored = self._find(key_hash)
+        if stored:
+            _, previous, _ = _entry.unpack_from(self._mmap, offset)
+            status = UNCHANGED if previous == values_hash else CHANGED
+        else:
+            if self.count + 1 > self.capacity * self.max_load:
+                self._rebuild(self.capacity * 2)
+                offset, _ = self._find(key_hash)
+            self.count += 1
+            status = NEW
+        _entry.pack_into(self._mmap, offset, key_hash, values_hash,
+                         self.generation)
+        return status
+
+    def entries(self):
+        """
+        :return: generator of key hash, values hash and generation
+        """
+        data = self._mmap
+        for idx in range(self.capacity):
+            entry = _entry.unpack_from(data, HEADER_SIZE + idx * _entry.size)
+            if entry[0]:
+                yield entry
+
+    def compact(self, max_age=None):
+        """Rebuild the table by the number of the keys.
+
+        :param int max_age: drop the keys not seen for that many crawls
+        :return int: number of the dropped keys
+        """
+        if max_age is None:
+            oldest = 0
+        else:
+            oldest = self.generation - max_age + 1
+        keep = sum(1 for e in self.entries() if e[2] >= oldest)
+        capacity = max(8, int(keep / self.max_load * 1.5) + 1)
+        dropped = self.count - keep
+        self._rebuild(capacity, oldest)
+        return dropped
+
+    def _rebuild(self, capacity, oldest=0):
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, capacity, self.generation)
+        rebuilt = FingerprintStore(tmp_path, max_load=self.max_load)
+        data = rebuilt._mmap
+        for entry in self.entries():
+            if entry[2] >= oldest:
+                offset, _ = rebuilt._find(entry[0])
+                _entry.pack_into(data, offset, *entry)
+                rebuilt.count += 1
+        rebuilt.close()
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+
+class DeltaMiddleware:
+    """Spider middleware dropping the items which haven't changed since
+    the previous crawl, see the module docs.
+
+    :param str path: fingerprint store path, "%(spider)s" is the spider name
+    :param int capacity: initial capacity of a new store
+    :param int max_age: keys not seen for that many crawls are dropped on
+                        close, 0 keeps them
+    :param scrapy.statscollectors.StatsCollector stats:
+    """
+    stats_prefix = 'crawlit/delta'
+
+    def __init__(self, path, capacity=1 << 20, max_age=0, stats=None):
+        self.path = path
+        self.capacity = capacity
+        self.max_age = max_age
+        self.stats = stats
+        self.store = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.get('CRAWLIT_DELTA_PATH'):
+            raise NotConfigured
+        middleware = cls(
+            settings.get('CRAWLIT_DELTA_PATH'),
+            capacity=settings.getint('CRAWLIT_DELTA_CAPACITY', 1 << 20),
+            max_age=settings.getint('CRAWLIT_DELTA_MAX_AGE', 0),
+            stats=crawler.stats)
+        crawler.signals.connect(middleware.spider_opened,
+                                signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed,
+                                signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        path = self.path % {'spider': spider.name}
+        self.store = FingerprintStore(path, capacity=self.capacity)
+        generation = self.store.start_generation()
+        logger.info('Delta crawl %d of %s, %d known keys', generation, path,
+                    len(self.store))
+
+    def spider_closed(self, spider):
+        if self.max_age:
+            expired = self.store.compact(self.max_age)
+            self._inc_stats('expired', expired)
+        if self.stats is not None:
+            self.stats.set_value(self.stats_prefix + '/keys',
+                                 len(self.store))
+        self.store.close()
+
+    def process_spider_output(self, response, result, spider):
+        for element in result:
+            if self.is_unchanged(element):
+                continue
+            yield element
+
+    def is_unchanged(self, element):
+        """
+        :param element: spider output
+        :return bool: it's an item with the same values as last time
+        """
+        item_class = get_item_class(element)
+        if not getattr(item_class, 'key_fields', None):
+            return False
+        status = self.store.check(item_class.make_key(element),
+                                  hash_item(element))
+        self._inc_stats(status)
+        return status == UNCHANGED
+
+    def _inc_stats(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value('%s/%s' % (self.stats_prefix, key),
+                                 count=count)
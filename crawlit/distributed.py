@@ -0,0 +1,367 @@
+"""Item extraction by Celery workers, separately from downloading.
+
+Spiders publish the raw responses instead of loading the items, the
+responses are batched and compressed into a single message per batch::
+
+    class ProfileSpider(scrapy.Spider):
+
+        @classmethod
+        def from_crawler(cls, crawler, *args, **kwargs):
+            spider = super().from_crawler(crawler, *args, **kwargs)
+            spider.publisher = ResponsePublisher.from_crawler(crawler)
+            return spider
+
+        def parse(self, response):
+            self.publisher.publish(ProfileItem, response, self)
+
+Celery workers import this module (i.e. CELERY_IMPORTS or
+``celery worker -A myproject -I crawlit.distributed``), load the items
+and pass them to the pipelines of the CRAWLIT_WORKER_PIPELINES setting
+of the scrapy project settings. Item classes are imported once per worker
+process, so their compiled extraction plans are reused by all the tasks.
+
+Worker pipelines are created without a crawler (``from_settings`` or the
+class itself) and must process items synchronously.
+
+The batches are sent in threads, so a slow broker doesn't stall the
+downloads, and flushed every CRAWLIT_DISTRIBUTED_FLUSH_INTERVAL seconds,
+so the responses of a slow crawl don't wait for a full batch.
+"""
+import json
+import base64
+import struct
+import zlib
+import logging
+
+import scrapy
+from celery import shared_task
+from celery.signals import worker_process_shutdown
+from scrapy import signals
+from scrapy.exceptions import DropItem
+from scrapy.http import Headers, HtmlResponse
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import Settings
+from scrapy.utils.conf import build_component_list
+from scrapy.utils.misc import load_object
+from scrapy.utils.project import get_project_settings
+from twisted.internet import defer, task, threads
+from twisted.python.failure import Failure
+
+from .cache import get_import_path
+
+
+logger = logging.getLogger(__name__)
+
+_header_size = struct.Struct('<I')
+_worker = None
+
+
+def pack_batch(records, compresslevel=6):
+    """Pack the responses as a compressed text message.
+
+    :param list records: dicts of url, status, headers, encoding, item
+                         and body
+    :param int compresslevel: zlib compression level
+    :return str: base64 of the compressed json header and bodies
+    """
+    header = json.dumps([{k: v for k, v in record.items() if k != 'body'}
+                         for record in records]).encode('utf-8')
+    chunks = [_header_size.pack(len(header)), header]
+    chunks.extend(record['body'] for record in records)
+    data = b''.join(chunks)
+    return base64.b64encode(zlib.compress(data, compresslevel)).decode('ascii')
+
+
+def unpack_batch(message):
+    """
+    :param str message: made by pack_batch
+    :return list: records
+    """
+    data = zlib.decompress(base64.b64decode(message))
+    header_size, = _header_size.unpack_from(data)
+    offset = _header_size.size + header_size
+    records = json.loads(data[_header_size.size:offset].decode('utf-8'))
+    for record in records:
+        record['body'] = data[offset:offset + record['size']]
+        offset += record['size']
+    return records
+
+
+def make_record(item_class, response):
+    """
+    :param type item_class: module level ItemABC subclass
+    :param scrapy.http.TextResponse response:
+    :return dict: record of the response
+    :raise ValueError: the class isn't importable by the workers
+    """
+    headers = {k.decode('latin-1'): [v.decode('latin-1') for v in values]
+               for k, values in response.headers.items()}
+    return {
+        'item': get_import_path(item_class),
+        'url': response.url,
+        'status': response.status,
+        'headers': headers,
+        'encoding': getattr(response, 'encoding', None),
+        'size': len(response.body),
+        'body': response.body,
+    }
+
+
+class Worker:
+    """Extraction state kept by a worker process.
+
+    :param scrapy.settings.Settings settings:
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.item_classes = {}
+        self.spiders = {}
+        self.pipelines = [
+            self._create_pipeline(load_object(path)) for path in
+            build_component_list(settings.getdict('CRAWLIT_WORKER_PIPELINES'))]
+
+    def _create_pipeline(self, pipeline_class):
+        if hasattr(pipeline_class, 'from_settings'):
+            return pipeline_class.from_settings(self.settings)
+        return pipeline_class()
+
+    def get_item_class(self, item_path):
+        try:
+            return self.item_classes[item_path]
+        except KeyError:
+            item_class = self.item_classes[item_path] = load_object(item_path)
+            return item_class
+
+    def get_spider(self, spider_name):
+        """Spider instance passed to the pipelines.
+
+        :param str spider_name:
+        :return scrapy.Spider:
+        """
+        try:
+            return self.spiders[spider_name]
+        except KeyError:
+            spider = self.spiders[spider_name] = scrapy.Spider(spider_name)
+            for pipeline in self.pipelines:
+                if hasattr(pipeline, 'open_spider'):
+                    self._wait(pipeline.open_spider, spider)
+            return spider
+
+    def make_response(self, record):
+        """
+        :param dict record:
+        :return scrapy.http.TextResponse:
+        """
+        headers = Headers(record['headers'])
+        response_class = responsetypes.from_args(
+            headers=headers, url=record['url'], body=record['body'])
+        if not hasattr(response_class, 'encoding'):
+            response_class = HtmlResponse
+        return response_class(record['url'], status=record['status'],
+                              headers=headers, body=record['body'],
+                              encoding=record['encoding'])
+
+    def process(self, spider_name, records):
+        """Load the items and pass them to the pipelines.
+
+        :param str spider_name:
+        :param list records: see make_record
+        :return dict: number of items, dropped items and errors
+        """
+        spider = self.get_spider(spider_name)
+        counts = {'items': 0, 'dropped': 0, 'errors': 0}
+        for record in records:
+            try:
+                item_class = self.get_item_class(record['item'])
+                item = item_class.load(self.make_response(record))
+                for pipeline in self.pipelines:
+                    item = self._wait(pipeline.process_item, item, spider)
+            except DropItem as e:
+                logger.debug('Dropped %s: %s', record['url'], e)
+                counts['dropped'] += 1
+            except Exception:
+                logger.exception('Failed to extract %s', record['url'])
+                counts['errors'] += 1
+            else:
+                counts['items'] += 1
+        return counts
+
+    def close(self):
+        for spider in self.spiders.values():
+            for pipeline in self.pipelines:
+                if hasattr(pipeline, 'close_spider'):
+                    self._wait(pipeline.close_spider, spider)
+        self.spiders.clear()
+
+    @staticmethod
+    def _wait(method, *args):
+        results = []
+        defer.maybeDeferred(method, *args).addBoth(results.append)
+        if not results:
+            raise RuntimeError('%r is asynchronous, worker pipelines must '
+                               'process items synchronously' % method)
+        if isinstance(results[0], Failure):
+            results[0].raiseException()
+        return results[0]
+
+
+def get_worker():
+    """
+    :return Worker: worker of the current process
+    """
+    global _worker
+    if _worker is None:
+        _worker = Worker(get_project_settings())
+    return _worker
+
+
+def configure_worker(settings):
+    """Replace the worker of the current process.
+
+    :param dict settings: scrapy settings
+    :return Worker:
+    """
+    global _worker
+    close_worker()
+    _worker = Worker(Settings(settings))
+    return _worker
+
+
+@worker_process_shutdown.connect
+def close_worker(**kwargs):
+    global _worker
+    if _worker is not None:
+        _worker.close()
+        _worker = None
+
+
+@shared_task(name='crawlit.extract_batch')
+def extract_batch(spider_name, message):
+    """
+    :param str spider_name:
+    :param str message: responses packed by pack_batch
+    :return dict: number of items, dropped items and errors
+    """
+    return get_worker().process(spider_name, unpack_batch(message))
+
+
+class ResponsePublisher:
+    """Publishes batches of responses for extract_batch workers.
+
+    :param int batch_size: responses per message
+    :param str queue: Celery queue name, the task default one if None
+    :param int compresslevel: zlib compression level
+    :param float flush_interval: seconds between the timer flushes
+    :param task: Celery task, extract_batch by default
+    :param scrapy.statscollectors.StatsCollector stats:
+    """
+    stats_prefix = 'crawlit/distributed'
+
+    def __init__(self, batch_size=20, queue=None, compresslevel=6,
+                 flush_interval=5.0, task=None, stats=None):
+        self.batch_size = batch_size
+        self.queue = queue
+        self.compresslevel = compresslevel
+        self.flush_interval = flush_interval
+        self.task = task or extract_batch
+        self.stats = stats
+        self.batches = {}
+        self.pending = set()
+        self._flush_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        publisher = cls(
+            batch_size=settings.getint('CRAWLIT_DISTRIBUTED_BATCH_SIZE', 20),
+            queue=settings.get('CRAWLIT_DISTRIBUTED_QUEUE'),
+            compresslevel=settings.getint(
+                'CRAWLIT_DISTRIBUTED_COMPRESSION_LEVEL', 6),
+            flush_interval=settings.getfloat(
+                'CRAWLIT_DISTRIBUTED_FLUSH_INTERVAL', 5.0),
+            stats=crawler.stats)
+        crawler.signals.connect(publisher.spider_opened,
+                                signal=signals.spider_opened)
+        crawler.signals.connect(publisher.spider_closed,
+                                signal=signals.spider_closed)
+        return publisher
+
+    def spider_opened(self, spider):
+        if self.flush_interval:
+            self._flush_loop = task.LoopingCall(self.flush)
+            self._flush_loop.start(self.flush_interval, now=False)
+
+    def spider_closed(self, spider):
+        """
+        :return twisted.internet.defer.Deferred: fired when the batches
+                                                 of the spider are sent
+        """
+        if self._flush_loop is not None and self._flush_loop.running:
+            self._flush_loop.stop()
+        self.flush(spider.name)
+        return defer.DeferredList(list(self.pending))
+
+    def publish(self, item_class, response, spider):
+        """Queue the response for extraction of item_class.
+
+        :param type item_class: module level ItemABC subclass
+        :param scrapy.http.TextResponse response:
+        :param scrapy.Spider spider:
+        """
+        batch = self.batches.setdefault(spider.name, [])
+        batch.append(make_record(item_class, response))
+        if len(batch) >= self.batch_size:
+            self.flush(spider.name)
+
+    def flush(self, spider_name=None):
+        """Send the batched responses.
+
+        :param str spider_name: all the spiders if None
+        :return twisted.internet.defer.Deferred: fired when they're sent
+        """
+        names = list(self.batches) if spider_name is None else [spider_name]
+        sent = []
+        for name in names:
+            records = self.batches.pop(name, None)
+            if not records:
+                continue
+            d = self._call_in_thread(self._send, name, records)
+            d.addCallbacks(self._sent, self._failed, callbackArgs=(records,),
+                           errbackArgs=(records,))
+            self.pending.add(d)
+            d.addBoth(self._release, d)
+            sent.append(d)
+        return defer.DeferredList(sent)
+
+    def pack(self, records):
+        return pack_batch(records, self.compresslevel)
+
+    def _call_in_thread(self, function, *args):
+        return threads.deferToThread(function, *args)
+
+    def _send(self, name, records):
+        # runs in a thread, the compression and the broker don't block
+        # the reactor
+        message = self.pack(records)
+        self.task.apply_async(args=(name, message), queue=self.queue)
+        return len(message)
+
+    def _sent(self, size, records):
+        self._inc_stats('batches')
+        self._inc_stats('responses', len(records))
+        self._inc_stats('bytes', size)
+
+    def _failed(self, failure, records):
+        self._inc_stats('errors')
+        logger.error('Failed to publish %d responses: %s', len(records),
+                     failure.getErrorMessage())
+
+    def _release(self, result, d):
+        self.pending.discard(d)
+        return result
+
+    def _inc_stats(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value('%s/%s' % (self.stats_prefix, key),
+                                 count=count)
@@ -0,0 +1,709 @@
+"""Columnar item exporters.
+
+The schema is taken from the Item class fields: Integer, Float, Boolean,
+Date and DateTime values go to typed arrays, strings to an offsets array
+and a single bytes buffer, multi_selector fields to list columns. The items
+are buffered by columns and written in large batches, to Parquet when
+pyarrow is installed, otherwise to gzipped NDJSON or CSV::
+
+    FEED_EXPORTERS = {
+        'parquet': 'crawlit.exporters.ParquetItemExporter',
+        'ndjson.gz': 'crawlit.exporters.NdjsonGzipItemExporter',
+        'csv.gz': 'crawlit.exporters.CsvGzipItemExporter',
+    }
+    FEED_FORMAT = 'parquet'
+
+The values of the fields with user processors can be of any type, so they
+are stored as json strings unless the exporter "columns" says otherwise.
+"""
+import io
+import csv
+import gzip
+import json
+import logging
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+from scrapy.exporters import BaseItemExporter
+
+from . import fields
+from .items import get_item_class
+
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = EPOCH.replace(tzinfo=timezone.utc)
+EPOCH_ORDINAL = EPOCH.toordinal()
+MICROSECOND = timedelta(microseconds=1)
+
+
+class Bitmap:
+    """Bits packed 8 per byte, the least significant bit first, that's
+    the Arrow validity and boolean buffers layout.
+    """
+    __slots__ = ('data', 'length')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, bit):
+        idx = self.length
+        if not idx & 7:
+            self.data.append(0)
+        if bit:
+            self.data[idx >> 3] |= 1 << (idx & 7)
+        self.length = idx + 1
+
+    def to_list(self):
+        """
+        :return list: bools
+        """
+        bits = [bool(byte >> shift & 1)
+                for byte in self.data for shift in range(8)]
+        del bits[self.length:]
+        return bits
+
+
+class Column:
+    """Values of a field in a batch.
+
+    A value which doesn't fit the column type is stored as null with
+    a warning, so the columns of a batch always have the same length.
+
+    :param str name: field name
+    """
+    type_name = None
+
+    def __init__(self, name):
+        self.name = name
+        self.clear()
+
+    def __len__(self):
+        return len(self.validity)
+
+    def __repr__(self):
+        return '<%s %s rows=%d>' % (self.__class__.__name__, self.name,
+                                    len(self))
+
+    def clear(self):
+        # the buffers are replaced, not truncated, because the Arrow
+        # arrays made of them may still be alive
+        self.validity = Bitmap()
+        self.null_count = 0
+        self._clear()
+
+    def append(self, value):
+        if value is not None:
+            try:
+                self._append(value)
+            except (TypeError, ValueError, OverflowError, AttributeError):
+                logger.warning('"%s": %s expected, not %r', self.name,
+                               self.type_name, value)
+            else:
+                self.validity.append(True)
+                return
+        self.validity.append(False)
+        self.null_count += 1
+        self._append_null()
+
+    def to_list(self):
+        """
+        :return list: the values, None for nulls
+        """
+        values = self._to_list()
+        if self.null_count:
+            for idx, valid in enumerate(self.validity.to_list()):
+                if not valid:
+                    values[idx] = None
+        return values
+
+    @property
+    def nbytes(self):
+        return len(self.validity.data) + self._nbytes()
+
+    def arrow_type(self):
+        """
+        :return pyarrow.DataType:
+        """
+        raise NotImplementedError
+
+    def to_arrow(self):
+        """
+        :return pyarrow.Array: an array made of the column buffers
+        """
+        import pyarrow as pa
+        validity = pa.py_buffer(self.validity.data) \
+            if self.null_count else None
+        return pa.Array.from_buffers(
+            self.arrow_type(), len(self),
+            [validity] + [pa.py_buffer(b) for b in self._buffers()],
+            null_count=self.null_count, children=self._children())
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _append(self, value):
+        raise NotImplementedError
+
+    def _append_null(self):
+        raise NotImplementedError
+
+    def _to_list(self):
+        raise NotImplementedError
+
+    def _nbytes(self):
+        raise NotImplementedError
+
+    def _buffers(self):
+        raise NotImplementedError
+
+    def _children(self):
+        return None
+
+
+class Int64Column(Column):
+    type_name = 'int64'
+    typecode = 'q'
+
+    def _clear(self):
+        self.values = array(self.typecode)
+
+    def _append(self, value):
+        self.values.append(value)
+
+    def _append_null(self):
+        self.values.append(0)
+
+    def _to_list(self):
+        return self.values.tolist()
+
+    def _nbytes(self):
+        return len(self.values) * self.values.itemsize
+
+    def _buffers(self):
+        return [self.values]
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.int64()
+
+
+class Float64Column(Int64Column):
+    type_name = 'float64'
+    typecode = 'd'
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.float64()
+
+
+class DateColumn(Int64Column):
+    """Days since the epoch."""
+    type_name = 'date'
+    typecode = 'i'
+
+    def _append(self, value):
+        self.values.append(value.toordinal() - EPOCH_ORDINAL)
+
+    def _to_list(self):
+        return [date.fromordinal(days + EPOCH_ORDINAL)
+                for days in self.values]
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.date32()
+
+
+class TimestampColumn(Int64Column):
+    """Microseconds since the epoch, UTC. Naive datetimes are taken as
+    UTC ones.
+
+    :param str name: field name
+    :param bool utc: the values are timezone aware
+    """
+    type_name = 'timestamp'
+
+    def __init__(self, name, utc=False):
+        self.utc = utc
+        super(TimestampColumn, self).__init__(name)
+
+    def _append(self, value):
+        if value.tzinfo is None:
+            self.values.append((value - EPOCH) // MICROSECOND)
+        else:
+            self.values.append((value - EPOCH_UTC) // MICROSECOND)
+
+    def _to_list(self):
+        epoch = EPOCH_UTC if self.utc else EPOCH
+        return [epoch + timedelta(microseconds=value)
+                for value in self.values]
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.timestamp('us', tz='UTC' if self.utc else None)
+
+
+class BooleanColumn(Column):
+    type_name = 'bool'
+
+    def _clear(self):
+        self.values = Bitmap()
+
+    def _append(self, value):
+        self.values.append(value)
+
+    def _append_null(self):
+        self.values.append(False)
+
+    def _to_list(self):
+        return self.values.to_list()
+
+    def _nbytes(self):
+        return len(self.values.data)
+
+    def _buffers(self):
+        return [self.values.data]
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.bool_()
+
+
+class StringColumn(Column):
+    """UTF-8 bytes of all the values and their end offsets."""
+    type_name = 'string'
+
+    def _clear(self):
+        self.offsets = array('q', [0])
+        self.data = bytearray()
+
+    def _append(self, value):
+        self.data += str.encode(value, 'utf-8')
+        self.offsets.append(len(self.data))
+
+    def _append_null(self):
+        self.offsets.append(len(self.data))
+
+    def _to_list(self):
+        data = bytes(self.data)
+        offsets = self.offsets
+        return [data[offsets[idx]:offsets[idx + 1]].decode('utf-8')
+                for idx in range(len(offsets) - 1)]
+
+    def _nbytes(self):
+        return len(self.offsets) * self.offsets.itemsize + len(self.data)
+
+    def _buffers(self):
+        return [self.offsets, self.data]
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.large_string()
+
+
+class JsonColumn(StringColumn):
+    """Values of any type as json strings."""
+    type_name = 'json'
+
+    def _append(self, value):
+        super(JsonColumn, self)._append(json.dumps(
+            value, ensure_ascii=False, default=_to_json))
+
+    def _to_list(self):
+        # a json text is never empty, so an empty one is null
+        return [json.loads(value) if value else None
+                for value in super(JsonColumn, self)._to_list()]
+
+
+class ListColumn(Column):
+    """Lists of values, they are all stored in a single child column.
+
+    :param Column child: column of the list values
+    """
+    type_name = 'list'
+
+    def __init__(self, child):
+        self.child = child
+        super(ListColumn, self).__init__(child.name)
+
+    def _clear(self):
+        self.offsets = array('q', [0])
+        self.child.clear()
+
+    def _append(self, values):
+        if isinstance(values, (str, bytes, dict)):
+            values = [values]
+        values = list(values)
+        for value in values:
+            self.child.append(value)
+        self.offsets.append(len(self.child))
+
+    def _append_null(self):
+        self.offsets.append(len(self.child))
+
+    def _to_list(self):
+        values = self.child.to_list()
+        offsets = self.offsets
+        return [values[offsets[idx]:offsets[idx + 1]]
+                for idx in range(len(offsets) - 1)]
+
+    def _nbytes(self):
+        return len(self.offsets) * self.offsets.itemsize + self.child.nbytes
+
+    def _buffers(self):
+        return [self.offsets]
+
+    def _children(self):
+        return [self.child.to_arrow()]
+
+    def arrow_type(self):
+        import pyarrow as pa
+        return pa.large_list(self.child.arrow_type())
+
+
+FIELD_COLUMNS = (
+    (fields.Boolean, BooleanColumn),
+    (fields.Integer, Int64Column),
+    (fields.Float, Float64Column),
+    (fields.Date, DateColumn),
+    (fields.DateTime, TimestampColumn),
+)
+
+
+def _to_json(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _get_choice_values(choices):
+    values = choices.values() if isinstance(choices, dict) else choices
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            yield from value
+        else:
+            yield value
+
+
+def is_multi(field):
+    """
+    :param Field field:
+    :return bool: the field value is a list of values
+    """
+    if field.multi_selector or getattr(field, 'multi_choices', False):
+        return True
+    choices = getattr(field, 'choices', None)
+    # the choices mapped to lists are flattened into the values list
+    return isinstance(choices, dict) and any(
+        isinstance(value, (list, tuple)) for value in choices.values())
+
+
+def get_column_class(field):
+    """
+    :param Field field:
+    :return type: Column subclass of the field values
+    """
+    if field.user_processors:
+        return JsonColumn
+    for field_class, column_class in FIELD_COLUMNS:
+        if isinstance(field, field_class):
+            return column_class
+    if getattr(field, 'choices', None):
+        values = list(_get_choice_values(field.choices))
+        if all(isinstance(value, str) for value in values):
+            return StringColumn
+        if all(type(value) is int for value in values):
+            return Int64Column
+        return JsonColumn
+    return StringColumn
+
+
+def make_column(name, field, column_class=None):
+    """
+    :param str name: field name
+    :param Field field:
+    :param type column_class: Column subclass of the values, it's taken
+                              from the field type by default
+    :return Column:
+    """
+    column_class = column_class or get_column_class(field)
+    if issubclass(column_class, TimestampColumn):
+        column = column_class(name, utc=getattr(field, 'tz', None) is not None)
+    else:
+        column = column_class(name)
+    if is_multi(field):
+        column = ListColumn(column)
+    return column
+
+
+class ColumnBatch:
+    """Items buffered by columns.
+
+    :param type item_class: Item subclass
+    :param fields_to_export: names of the exported fields, all by default
+    :param dict columns: field name to the Column subclass of its values
+    """
+
+    def __init__(self, item_class, fields_to_export=None, columns=None):
+        columns = columns or {}
+        self.item_class = item_class
+        self.names = list(fields_to_export or item_class.fields)
+        self.columns = []
+        self._layout = []
+        for name in self.names:
+            try:
+                field = item_class.fields[name]
+            except KeyError:
+                raise ValueError('%s has no "%s" field.' % (
+                    item_class.__name__, name))
+            column = make_column(name, field, columns.get(name))
+            self.columns.append(column)
+            self._layout.append((name, column.append, is_multi(field)))
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns)
+
+    def append(self, item):
+        """
+        :param item: Item or CompactItem instance
+        """
+        get = item.get
+        for name, append, multi in self._layout:
+            value = get(name)
+            if not multi and type(value) is list:
+                # the loaders keep even a single value in a list
+                value = value[0] if value else None
+            append(value)
+
+    def clear(self):
+        for column in self.columns:
+            column.clear()
+
+    def to_tuples(self):
+        """
+        :return list: tuples of the row values
+        """
+        return list(zip(*[column.to_list() for column in self.columns]))
+
+    def to_rows(self):
+        """
+        :return list: dicts of the row values
+        """
+        names = self.names
+        return [dict(zip(names, values)) for values in self.to_tuples()]
+
+    def arrow_schema(self):
+        """
+        :return pyarrow.Schema:
+        """
+        import pyarrow as pa
+        return pa.schema([pa.field(name, column.arrow_type())
+                          for name, column in zip(self.names, self.columns)])
+
+    def to_arrow(self):
+        """
+        :return pyarrow.RecordBatch:
+        """
+        import pyarrow as pa
+        return pa.RecordBatch.from_arrays(
+            [column.to_arrow() for column in self.columns],
+            schema=self.arrow_schema())
+
+
+class BatchWriter:
+    """Writes the column batches to a binary file, the file itself is
+    left open.
+
+    :param file: binary file object
+    :param ColumnBatch batch: batch the schema is taken from
+    """
+
+    def __init__(self, file, batch):
+        self.file = file
+
+    def write(self, batch):
+        """
+        :param ColumnBatch batch:
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ParquetWriter(BatchWriter):
+    """Parquet file, a row group per batch, it requires pyarrow.
+
+    :param str compression: Parquet compression codec
+    """
+
+    def __init__(self, file, batch, compression='snappy'):
+        super(ParquetWriter, self).__init__(file, batch)
+        import pyarrow.parquet as pq
+        self.writer = pq.ParquetWriter(file, batch.arrow_schema(),
+                                       compression=compression)
+
+    def write(self, batch):
+        import pyarrow as pa
+        self.writer.write_table(pa.Table.from_batches([batch.to_arrow()]))
+
+    def close(self):
+        self.writer.close()
+
+
+class NdjsonWriter(BatchWriter):
+    """Gzipped json lines.
+
+    :param int compresslevel: gzip compression level
+    """
+
+    def __init__(self, file, batch, compresslevel=6):
+        super(NdjsonWriter, self).__init__(file, batch)
+        self.stream = gzip.GzipFile(fileobj=file, mode='wb',
+                                    compresslevel=compresslevel)
+        self._encode = json.JSONEncoder(ensure_ascii=False,
+                                        default=_to_json).encode
+
+    def write(self, batch):
+        encode = self._encode
+        self.stream.write(''.join(
+            [encode(row) + '\n' for row in batch.to_rows()]).encode('utf-8'))
+
+    def close(self):
+        self.stream.close()
+
+
+def _to_csv(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=_to_json)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class CsvWriter(NdjsonWriter):
+    """Gzipped CSV with the header, lists are json encoded."""
+
+    def __init__(self, file, batch, compresslevel=6):
+        super(CsvWriter, self).__init__(file, batch, compresslevel)
+        self.text = io.TextIOWrapper(self.stream, encoding='utf-8',
+                                     newline='')
+        self.writer = csv.writer(self.text)
+        self.writer.writerow(batch.names)
+
+    def write(self, batch):
+        self.writer.writerows([[_to_csv(value) for value in values]
+                               for values in batch.to_tuples()])
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+        self.stream.close()
+
+
+def get_default_writer_class():
+    """
+    :return type: ParquetWriter if pyarrow is installed, NdjsonWriter
+                  otherwise
+    """
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return NdjsonWriter
+    return ParquetWriter
+
+
+class ColumnarItemExporter(BaseItemExporter):
+    """Buffers the items by typed columns and writes them in batches.
+
+    :param file: binary file object
+    :param type item_class: Item subclass the schema is taken from,
+                            the class of the first item by default,
+                            the items of other classes raise TypeError
+    :param int batch_size: items per written batch
+    :param dict columns: field name to the Column subclass of its values
+    :param kwargs: scrapy exporter options, "fields_to_export" is used
+    """
+    writer_class = None
+    default_batch_size = 65536
+
+    def __init__(self, file, item_class=None, batch_size=None, columns=None,
+                 **kwargs):
+        super(ColumnarItemExporter, self).__init__(**kwargs)
+        self.file = file
+        self.item_class = item_class
+        self.batch_size = batch_size or self.default_batch_size
+        self.columns = columns
+        self.batch = None
+        self.writer = None
+        self.items_count = 0
+        self.batches_count = 0
+
+    def make_writer(self, batch):
+        """
+        :param ColumnBatch batch:
+        :return BatchWriter:
+        """
+        writer_class = self.writer_class or get_default_writer_class()
+        return writer_class(self.file, batch)
+
+    def export_item(self, item):
+        item_class = get_item_class(item)
+        if self.batch is None:
+            self._start(self.item_class or item_class)
+        if not issubclass(item_class, self.batch.item_class):
+            # a file has a single schema
+            raise TypeError('%s items are exported, not %s.' % (
+                self.batch.item_class.__name__, item_class.__name__))
+        self.batch.append(item)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def finish_exporting(self):
+        if self.batch is None:
+            if self.item_class is None:
+                # nothing is exported and the schema is unknown
+                return
+            self._start(self.item_class)
+        self.flush()
+        self.writer.close()
+
+    def flush(self):
+        """Write the buffered items."""
+        if not len(self.batch):
+            return
+        self.writer.write(self.batch)
+        self.items_count += len(self.batch)
+        self.batches_count += 1
+        self.batch.clear()
+
+    def _start(self, item_class):
+        if not isinstance(getattr(item_class, 'fields', None), dict):
+            raise TypeError('Item class is required to export %s items.'
+                            % item_class.__name__)
+        self.batch = ColumnBatch(item_class, self.fields_to_export,
+                                 self.columns)
+        self.writer = self.make_writer(self.batch)
+
+
+class ParquetItemExporter(ColumnarItemExporter):
+    writer_class = ParquetWriter
+
+
+class NdjsonGzipItemExporter(ColumnarItemExporter):
+    writer_class = NdjsonWriter
+
+
+class CsvGzipItemExporter(ColumnarItemExporter):
+    writer_class = CsvWriter
@@ -1,16 +1,224 @@
 import re
+import json
+import html
 import logging
-from collections import Iterable
+from collections import Iterable, OrderedDict
+from datetime import datetime, timedelta, timezone
 
 import scrapy
+from dateutil import parser as dateutil_parser, tz as dateutil_tz
+from lxml import etree
 from scrapy.loader.processors import TakeFirst, Join, MapCompose
 from scrapy.exceptions import DropItem
+from scrapy.http import TextResponse
+from scrapy.utils.misc import arg_to_iter
 
 from .abc import FieldABC
 
 
 logger = logging.getLogger(__name__)
 
+# namespaces registered by scrapy.Selector for every query
+XPATH_NAMESPACES = {
+    're': 'http://exslt.org/regular-expressions',
+    'set': 'http://exslt.org/sets',
+}
+
+
+class Memo:
+    """Bounded LRU of the values converted by the field processors.
+
+    :param int max_size: max number of the kept values
+    """
+
+    def __init__(self, max_size):
+        if max_size < 1:
+            raise ValueError('The memo size must be positive.')
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return '<%s hits=%d misses=%d size=%d/%d>' % (
+            self.__class__.__name__, self.hits, self.misses,
+            len(self._values), self.max_size)
+
+    @property
+    def hit_rate(self):
+        """
+        :return float: share of the values taken from the memo
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key, default=None):
+        try:
+            value = self._values[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._values.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._values[key] = value
+        if len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def clear(self):
+        self._values.clear()
+
+
+class MemoizedProcessor:
+    """Runs the processors once per distinct found value.
+
+    The built-in field processors are pure functions of the found
+    value, so their result or DropItem is kept in the memo by the value.
+
+    :param list processors: processors to run in a row
+    :param Memo memo:
+    """
+    _dropped = object()
+
+    def __init__(self, processors, memo):
+        self.processors = list(processors)
+        self.memo = memo
+
+    def __call__(self, value):
+        key = value if isinstance(value, str) else tuple(value)
+        result = self.memo.get(key, self)
+        if result is self:
+            try:
+                result = self._run(value)
+            except DropItem as e:
+                self.memo.set(key, (self._dropped, str(e)))
+                raise
+            self.memo.set(key, result)
+        elif isinstance(result, tuple) and result and \
+                result[0] is self._dropped:
+            raise DropItem(result[1])
+
+        # the same list must not be shared by the items
+        return list(result) if isinstance(result, list) else result
+
+    def _run(self, value):
+        for processor in self.processors:
+            if value is None:
+                break
+            value = processor(value)
+        return value
+
+
+class FusedProcessor:
+    """The built-in processors of a field run as a single call.
+
+    It gives the same result as TakeFirst, MapCompose of the filters and
+    the whole value processors (Join, converters) in a row, but every
+    found value goes through all the filters at once and single values
+    aren't wrapped into lists between the steps.
+
+    :param bool first_only: take the first non-empty value as TakeFirst
+    :param tuple filters: MapCompose functions
+    :param tuple tail: processors of the whole value
+    """
+    __slots__ = ('first_only', 'filters', 'join', 'separator', 'tail')
+
+    def __init__(self, first_only=False, filters=(), tail=()):
+        self.first_only = first_only
+        self.filters = tuple(filters)
+        tail = tuple(tail)
+        # Join right after the filters takes a single value as is
+        self.join = bool(self.filters and tail and isinstance(tail[0], Join))
+        self.separator = tail[0].separator if self.join else None
+        self.tail = tail[1:] if self.join else tail
+
+    def __repr__(self):
+        return '%s(first_only=%r, filters=%r, join=%r, tail=%r)' % (
+            self.__class__.__name__, self.first_only, self.filters,
+            self.separator if self.join else None, self.tail)
+
+    def __call__(self, value):
+        if self.first_only:
+            for first in value:
+                if first is not None and first != '':
+                    value = first
+                    break
+            else:
+                return None
+
+        if self.filters:
+            value = self._map(value)
+            if self.join:
+                if not isinstance(value, str):
+                    value = self.separator.join(value)
+            elif isinstance(value, str):
+                value = [value]
+
+        for processor in self.tail:
+            if value is None:
+                return None
+            value = processor(value)
+        return value
+
+    def _map(self, value):
+        if isinstance(value, str):
+            return self._map_one(value)
+        values = []
+        for item in arg_to_iter(value):
+            item = self._map_one(item)
+            if isinstance(item, str):
+                values.append(item)
+            else:
+                values.extend(item)
+        return values
+
+    def _map_one(self, value):
+        # a single string while the filters give strings, a list otherwise
+        for idx, function in enumerate(self.filters):
+            value = function(value)
+            if not isinstance(value, str):
+                values = arg_to_iter(value)
+                for function in self.filters[idx + 1:]:
+                    mapped = []
+                    for item in values:
+                        mapped += arg_to_iter(function(item))
+                    values = mapped
+                return list(values)
+        return value
+
+
+def fuse_processors(processors):
+    """Make a FusedProcessor of the built-in field processors.
+
+    :param list processors: TakeFirst, MapCompose and whole value ones
+    :return FusedProcessor: None if the processors can't be fused
+    """
+    processors = list(processors)
+    first_only = bool(processors) and type(processors[0]) is TakeFirst
+    if first_only:
+        processors.pop(0)
+    filters = ()
+    if processors and type(processors[0]) is MapCompose and \
+            not processors[0].default_loader_context:
+        filters = processors.pop(0).functions
+
+    tail = []
+    for processor in processors:
+        if isinstance(processor, (TakeFirst, MapCompose)):
+            return None
+        if isinstance(processor, MemoizedProcessor):
+            fused = fuse_processors(processor.processors)
+            if fused is None or fused.first_only:
+                return None
+            processor = MemoizedProcessor([fused], processor.memo)
+        tail.append(processor)
+    return FusedProcessor(first_only, filters, tail)
+
 
 class Field(scrapy.Field, FieldABC):
     """Base field class.
@@ -18,27 +226,149 @@ class Field(scrapy.Field, FieldABC):
     :param str selector: css or xpath selector
     :param processors: list of scrapy.loader.processors instances
     :param bool many: it finds all values with that selectors when True
-    :param str regexp: regexp string
+    :param regexp: regexp string or compiled regexp, it's compiled once
     :param default: default value used if nothing found
+    :param int memoize: keep up to that number of the values converted
+                        by the built-in processors, True for the default
+                        size; the user processors run every time
+    :param bool required: an empty value means the page must be rendered,
+                          see crawlit.rendering
     :param kwargs: rest of parameters
     """
     default_regexp = None
+    default_memo_size = 10000
 
     def __init__(self, selector, *processors, multi_selector=False,
-                 regexp=None, default=None, **kwargs):
+                 regexp=None, default=None, memoize=None, required=False,
+                 **kwargs):
         super(Field, self).__init__(**kwargs)
         self._regexp = regexp or self.default_regexp
+        self._compiled_regexp = self._compile_regexp(self._regexp)
         self.default = default
+        self.required = required
         self.selector = selector
         self.processors = list(processors)
+        self.user_processors = len(processors)
         self.multi_selector = multi_selector
         if not multi_selector:
             self.processors.insert(0, TakeFirst())
+        if memoize is True:
+            memoize = self.default_memo_size
+        self.memo = Memo(memoize) if memoize else None
+        self._xpath_objects = {}
 
     @property
     def re(self):
-        # "re" it's an attribute analyzong by scrapy.ItemLoader
-        return self._regexp
+        # "re" it's an attribute analyzong by scrapy.ItemLoader,
+        # it takes compiled regexps as well as strings
+        return self._compiled_regexp
+
+    @staticmethod
+    def _compile_regexp(regexp):
+        if isinstance(regexp, str):
+            return re.compile(regexp, re.UNICODE)
+        return regexp
+
+    def compile_xpath(self, xpath):
+        """Get lxml XPath object, it's compiled once per field and xpath.
+
+        :param str xpath: the field selector translated to xpath
+        :return lxml.etree.XPath:
+        """
+        try:
+            return self._xpath_objects[xpath]
+        except KeyError:
+            pass
+
+        try:
+            xpath_object = etree.XPath(xpath, namespaces=XPATH_NAMESPACES,
+                                       smart_strings=False)
+        except etree.XPathError as e:
+            raise ValueError('XPath error: %s in %s' % (e, xpath))
+        self._xpath_objects[xpath] = xpath_object
+        return xpath_object
+
+    def get_fused_processors(self):
+        """Get the processors with the built-in ones fused into a single
+        callable, the user processors follow it as they are.
+
+        :return list:
+        """
+        end = len(self.processors) - self.user_processors
+        fused = fuse_processors(self.processors[:end])
+        if fused is None:
+            return list(self.processors)
+        return [fused] + self.processors[end:]
+
+    def _memoize_processors(self, processors):
+        """Put the built-in processors after TakeFirst into a single
+        memoized one, it's called by every field class constructor.
+
+        :param tuple processors: the user processors
+        """
+        if self.memo is None:
+            return
+        start = 0 if self.multi_selector else 1
+        end = len(self.processors) - len(processors)
+        chain = []
+        for processor in self.processors[start:end]:
+            if isinstance(processor, MemoizedProcessor):
+                chain.extend(processor.processors)
+            else:
+                chain.append(processor)
+        if chain:
+            self.processors[start:end] = [MemoizedProcessor(chain, self.memo)]
+
+
+class ChoiceMatcher:
+    """Finds all the choices in a value in a single pass.
+
+    A choice matches when it's surrounded by separators or the string edges,
+    so the string is split by separators once and every token is looked up
+    in a dict. Only choices containing separators themselves fall back to
+    their own precompiled regexp.
+
+    :param tuple choices: choice patterns
+    :param callable compile_pattern: makes a regexp for a compound choice
+    :param str separators: choice separator chars
+    """
+
+    def __init__(self, choices, compile_pattern, separators):
+        self.choices = tuple(choices)
+        separator = '[\\s%s]' % re.escape(separators)
+        self._split = re.compile(separator + '+').split
+        has_separator = re.compile(separator).search
+
+        self._tokens = {}
+        self._compound = []
+        for idx, choice in enumerate(self.choices):
+            if not isinstance(choice, str):
+                continue
+            if choice and not has_separator(choice):
+                self._tokens.setdefault(choice, []).append(idx)
+            else:
+                self._compound.append((idx, compile_pattern(choice)))
+
+    def find(self, value):
+        """
+        :param value: string or iterable of strings
+        :return list: sorted indexes of the found choices
+        """
+        if isinstance(value, str):
+            tokens = self._tokens
+            found = set()
+            for token in self._split(value):
+                if token in tokens:
+                    found.update(tokens[token])
+            for idx, regexp in self._compound:
+                if regexp.search(value):
+                    found.add(idx)
+        elif isinstance(value, Iterable):
+            found = [idx for idx, choice in enumerate(self.choices)
+                     if choice in value]
+        else:
+            found = ()
+        return sorted(found)
 
 
 class String(Field):
@@ -76,6 +406,13 @@ class String(Field):
             filters.append(str.upper)
 
         if choices:
+            self._choice_matcher = ChoiceMatcher(
+                choices, self._compile_pattern, self.choice_separators)
+            if isinstance(choices, dict):
+                self._choice_values = tuple(
+                    choices[c] for c in self._choice_matcher.choices)
+            else:
+                self._choice_values = self._choice_matcher.choices
             filters.append(self._map_choices)
             self.multi_choices = multi_choices
 
@@ -86,18 +423,14 @@ class String(Field):
         if filters:
             idx = len(self.processors) - len(processors)
             self.processors.insert(idx, MapCompose(*filters))
+        self._memoize_processors(processors)
 
     def _map_choices(self, value):
-        # try to find choice pattern in the string value
-        matched_values = []
-        for choice in self.choices:
-            if self._find_pattern(pattern=choice, where=value):
-                if isinstance(self.choices, dict):
-                    matched_values.append(self.choices[choice])
-                else:
-                    matched_values.append(choice)
-                if not self.multi_choices:
-                    break
+        # find all choice patterns in the string value at once
+        indexes = self._choice_matcher.find(value)
+        if indexes and not self.multi_choices:
+            indexes = indexes[:1]
+        matched_values = [self._choice_values[idx] for idx in indexes]
 
         if not matched_values:
             logger.debug('"%s": unknown choice "%s"' % (self.name, value))
@@ -124,19 +457,22 @@ class String(Field):
 
         return result
 
+    @classmethod
+    def _compile_pattern(cls, pattern):
+        return re.compile((
+            r'^{word}$'
+            r'|^{word}[\s{separators}]'
+            r'|[\s{separators}]{word}[\s{separators}]'
+            r'|[\s{separators}]{word}$'
+        ).format(
+            word=re.escape(pattern),
+            separators=re.escape(cls.choice_separators)
+        ))
+
     @classmethod
     def _find_pattern(cls, pattern, where):
         if isinstance(where, str):
-            re_choice = (
-                r'^{word}$'
-                r'|^{word}[\s{separators}]'
-                r'|[\s{separators}]{word}[\s{separators}]'
-                r'|[\s{separators}]{word}$'
-            ).format(
-                word=re.escape(pattern),
-                separators=re.escape(cls.choice_separators)
-            )
-            found = bool(re.findall(re_choice, where))
+            found = bool(cls._compile_pattern(pattern).search(where))
         else:
             found = isinstance(where, Iterable) and pattern in where
         return found
@@ -148,6 +484,7 @@ class Boolean(Field):
 
         idx = len(self.processors) - len(processors)
         self.processors.insert(idx, bool)
+        self._memoize_processors(processors)
 
 
 class Integer(String):
@@ -166,6 +503,7 @@ class Integer(String):
         idx = len(self.processors) - len(processors)
         self.processors.insert(idx, Join(separator=''))
         self.processors.insert(idx + 1, self._to_int)
+        self._memoize_processors(processors)
 
     def _to_int(self, value):
         if not value:
@@ -197,6 +535,7 @@ class Float(String):
         idx = len(self.processors) - len(processors)
         self.processors.insert(idx, Join(separator=''))
         self.processors.insert(idx + 1, self._to_float)
+        self._memoize_processors(processors)
 
     def _to_float(self, value):
         if not value:
@@ -210,8 +549,594 @@ class Float(String):
                            'not "%s"' % (self.name, value))
 
 
+class DateFormat:
+    """Precompiled strptime format.
+
+    Formats of the numeric and the english month name directives are
+    matched by a regexp, the rest are left to datetime.strptime.
+    The numeric directives without a delimiter between them take two
+    digits, and the years before min_year aren't matched, dateutil may
+    take them for the two digit ones of the current century.
+
+    :param str format: strptime format
+    """
+    min_year = 100
+    directives = {
+        'Y': r'(?P<year>\d{4})',
+        'm': r'(?P<month>\d{1,2})',
+        'd': r'(?P<day>\d{1,2})',
+        'H': r'(?P<hour>\d{1,2})',
+        'M': r'(?P<minute>\d{1,2})',
+        'S': r'(?P<second>\d{1,2})',
+        'f': r'(?P<microsecond>\d{1,6})',
+        'z': r'(?P<offset>Z|[+-]\d{2}:?\d{2})',
+        'b': r'(?P<month_name>[a-z]{3})',
+        'B': r'(?P<month_name>[a-z]{3,9})',
+        '%': '%',
+    }
+    month_names = {name: idx for idx, name in enumerate((
+        'january', 'february', 'march', 'april', 'may', 'june', 'july',
+        'august', 'september', 'october', 'november', 'december'), 1)}
+    month_names.update({name[:3]: idx for name, idx in month_names.items()})
+    fixed_width = {'m': r'(?P<month>\d{2})', 'd': r'(?P<day>\d{2})',
+                   'H': r'(?P<hour>\d{2})', 'M': r'(?P<minute>\d{2})',
+                   'S': r'(?P<second>\d{2})'}
+
+    def __init__(self, format):
+        self.format = format
+        self.regexp = self._compile(format)
+        # the order of the numeric day and month, dateutil dayfirst swaps
+        # them after the year as well
+        self.dayfirst = None
+        day, month = format.find('%d'), format.find('%m')
+        if day >= 0 and month >= 0:
+            self.dayfirst = day < month
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.format)
+
+    @classmethod
+    def _compile(cls, format):
+        parts = []
+        tokens = re.split(r'(%.)', format)
+        for idx, part in enumerate(tokens):
+            if idx % 2:
+                directive = cls.directives.get(part[1])
+                if directive is None:
+                    return None
+                # "%Y%m%d" is ambiguous with the variable widths
+                adjacent = (idx > 1 and not tokens[idx - 1]) or \
+                    (idx + 2 < len(tokens) and not tokens[idx + 1])
+                if adjacent:
+                    directive = cls.fixed_width.get(part[1], directive)
+                parts.append(directive)
+            else:
+                # whitespace of the format matches any whitespace
+                parts.append(r'\s+'.join(
+                    re.escape(chunk) for chunk in re.split(r'\s+', part)))
+        try:
+            return re.compile(''.join(parts) + r'\Z', re.IGNORECASE)
+        except re.error:
+            # repeated directive
+            return None
+
+    def parse(self, value):
+        """
+        :param str value:
+        :return datetime: None if the value doesn't match the format
+        """
+        if self.regexp is None:
+            try:
+                return datetime.strptime(value, self.format)
+            except ValueError:
+                return None
+
+        match = self.regexp.match(value)
+        if match is None:
+            return None
+        groups = match.groupdict()
+        try:
+            if groups.get('month_name'):
+                month = self.month_names[groups['month_name'].lower()]
+            else:
+                month = int(groups.get('month') or 1)
+            microsecond = groups.get('microsecond') or '0'
+            year = int(groups.get('year') or 1900)
+            if year < self.min_year:
+                return None
+            return datetime(
+                year, month,
+                int(groups.get('day') or 1), int(groups.get('hour') or 0),
+                int(groups.get('minute') or 0),
+                int(groups.get('second') or 0),
+                int(microsecond.ljust(6, '0')),
+                self._get_timezone(groups.get('offset')))
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _get_timezone(offset):
+        if not offset:
+            return None
+        if offset.upper() == 'Z':
+            return timezone.utc
+        sign = -1 if offset[0] == '-' else 1
+        offset = offset[1:].replace(':', '')
+        return timezone(sign * timedelta(hours=int(offset[:2]),
+                                         minutes=int(offset[2:])))
+
+
+class ValuesJoin(Join):
+    """Join of the found values, TakeFirst without filters after it
+    gives a single string, which is taken as is."""
+
+    def __call__(self, values):
+        return super(ValuesJoin, self).__call__(arg_to_iter(values))
+
+
+class DateTime(String):
+    """Datetime field class.
+
+    The first values are parsed by dateutil, the format of every parsed
+    value is looked up among the candidate formats and the next values
+    of the field are tried with the learned formats first, so dateutil
+    runs only for the values of the new formats.
+
+    :param str selector: css or xpath selector
+    :param processors: list of scrapy.loader.processors instances
+    :param tuple formats: strptime formats tried before the learned ones
+    :param bool dayfirst: dateutil dayfirst, for ambiguous dates
+    :param bool yearfirst: dateutil yearfirst, for ambiguous dates
+    :param tz: tzinfo or timezone name, aware values are converted to it
+               and naive ones are considered to be in it
+    :param int max_formats: max number of the learned formats
+    :param kwargs: rest of parameters
+    """
+    type_name = 'datetime'
+    candidate_formats = (
+        '%Y-%m-%d',
+        '%Y-%m-%dT%H:%M:%S',
+        '%Y-%m-%dT%H:%M:%S%z',
+        '%Y-%m-%dT%H:%M:%S.%f',
+        '%Y-%m-%dT%H:%M:%S.%f%z',
+        '%Y-%m-%dT%H:%M',
+        '%Y-%m-%d %H:%M:%S',
+        '%Y-%m-%d %H:%M:%S%z',
+        '%Y-%m-%d %H:%M:%S %z',
+        '%Y-%m-%d %H:%M:%S.%f',
+        '%Y-%m-%d %H:%M',
+        '%Y/%m/%d',
+        '%Y/%m/%d %H:%M:%S',
+        '%Y/%m/%d %H:%M',
+        '%Y%m%d',
+        '%d/%m/%Y',
+        '%m/%d/%Y',
+        '%d/%m/%Y %H:%M:%S',
+        '%m/%d/%Y %H:%M:%S',
+        '%d/%m/%Y %H:%M',
+        '%m/%d/%Y %H:%M',
+        '%d.%m.%Y',
+        '%d.%m.%Y %H:%M:%S',
+        '%d.%m.%Y %H:%M',
+        '%d-%m-%Y',
+        '%m-%d-%Y',
+        '%d %B %Y',
+        '%d %b %Y',
+        '%d %B %Y %H:%M',
+        '%d %b %Y %H:%M',
+        '%B %d, %Y',
+        '%b %d, %Y',
+        '%B %d %Y',
+        '%b %d %Y',
+        '%B %d, %Y %H:%M',
+        '%b %d, %Y %H:%M',
+    )
+    _candidates = None
+
+    def __init__(self, selector, *processors, formats=(), dayfirst=False,
+                 yearfirst=False, tz=None, max_formats=4, **kwargs):
+        self.formats = tuple(formats)
+        self.dayfirst = dayfirst
+        self.yearfirst = yearfirst
+        if isinstance(tz, str):
+            name, tz = tz, dateutil_tz.gettz(tz)
+            if tz is None:
+                raise ValueError('Unknown timezone "%s".' % name)
+        self.tz = tz
+        self.max_formats = max_formats
+        self._date_formats = [DateFormat(f) for f in self.formats]
+
+        super(DateTime, self).__init__(selector, *processors, **kwargs)
+
+        idx = len(self.processors) - len(processors)
+        self.processors.insert(idx, ValuesJoin(separator=' '))
+        self.processors.insert(idx + 1, self._to_datetime)
+        self._memoize_processors(processors)
+
+    @classmethod
+    def _get_candidates(cls):
+        candidates = cls.__dict__.get('_candidates')
+        if candidates is None:
+            candidates = tuple(DateFormat(f) for f in cls.candidate_formats)
+            cls._candidates = candidates
+        return candidates
+
+    def _to_datetime(self, value):
+        if not value:
+            return self.default
+        result = self.parse(value)
+        if result is None:
+            raise DropItem('"%s": %s expected, not "%s"' % (
+                self.name, self.type_name, value))
+        return result
+
+    def parse(self, value):
+        """
+        :param str value:
+        :return datetime: None if it's not a date
+        """
+        for date_format in self._date_formats:
+            result = date_format.parse(value)
+            if result is not None:
+                return self._localize(result)
+
+        try:
+            result = dateutil_parser.parse(value, dayfirst=self.dayfirst,
+                                           yearfirst=self.yearfirst)
+        except (ValueError, OverflowError):
+            return None
+        self._learn(value, result)
+        return self._localize(result)
+
+    def _learn(self, value, result):
+        if len(self._date_formats) >= len(self.formats) + self.max_formats:
+            return
+        for date_format in self._get_candidates():
+            if date_format in self._date_formats or \
+                    date_format.dayfirst not in (None, self.dayfirst):
+                # the learned format must agree with dateutil on the
+                # next values as well, 04/05 isn't 05/04 for it
+                continue
+            parsed = date_format.parse(value)
+            # an aware and a naive datetime are never equal
+            if parsed is not None and parsed == result and \
+                    parsed.utcoffset() == result.utcoffset():
+                logger.debug('"%s": learned date format "%s"',
+                             self.name, date_format.format)
+                self._date_formats.append(date_format)
+                return
+
+    def _localize(self, value):
+        if value.tzinfo is None:
+            if self.tz is not None:
+                value = value.replace(tzinfo=self.tz)
+        elif self.tz is not None:
+            value = value.astimezone(self.tz)
+        else:
+            # the same tzinfo type whatever has parsed the value
+            value = value.replace(tzinfo=timezone(value.utcoffset()))
+        return value
+
+
+class Date(DateTime):
+    """Date field class, see DateTime.
+
+    :param str selector: css or xpath selector
+    :param processors: list of scrapy.loader.processors instances
+    :param kwargs: rest of DateTime parameters
+    """
+    type_name = 'date'
+
+    def parse(self, value):
+        result = super(Date, self).parse(value)
+        return result.date() if result is not None else None
+
+
+class EmailMatcher:
+    """Email regexp run only around the "@" and " at " anchors.
+
+    Searching the whole text with the email regexp tries every position
+    and backtracks over every long word, so the text is scanned for
+    the anchors first: an anchor must follow a local part char and
+    precede a domain label with a dot. The leftmost start of the local
+    part is found by matching it backwards from the anchor, and the
+    regexp is matched from there within a bounded window. The found
+    matches are the same as the ones of the regexp search for the local
+    parts up to max_local_length and the domains up to max_domain_length
+    chars.
+
+    It has the part of the compiled regexp interface used by
+    scrapy.ItemLoader to extract the values.
+
+    :param str pattern: email regexp with the "extract" group
+    :param str local_chars: chars of the local part besides the dots
+    """
+    anchor_pattern = (r'(?<={local})(?=(?:@|\sat\s)'
+                      r'[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.|\sdot\s)[a-z0-9])')
+    max_local_length = 256
+    max_domain_length = 1024
+
+    def __init__(self, pattern, local_chars):
+        self.regexp = re.compile(pattern, re.UNICODE)
+        local = '[%s]' % re.escape(local_chars)
+        self.anchors = re.compile(self.anchor_pattern.format(local=local),
+                                  re.UNICODE)
+        # words joined by single dots read backwards are the same
+        self.reversed_local = re.compile(r'{0}+(?:\.{0}+)*'.format(local))
+
+    @property
+    def pattern(self):
+        return self.regexp.pattern
+
+    @property
+    def groupindex(self):
+        return self.regexp.groupindex
+
+    @property
+    def groups(self):
+        return self.regexp.groups
+
+    def search(self, string, pos=0, endpos=None):
+        """
+        :param str string:
+        :param int pos: search start index
+        :param int endpos: search end index
+        :return: re match object or None
+        """
+        return next(self.finditer(string, pos, endpos), None)
+
+    def finditer(self, string, pos=0, endpos=None):
+        if endpos is None or endpos > len(string):
+            endpos = len(string)
+        reversed_string = None
+
+        for anchor in self.anchors.finditer(string, pos, endpos):
+            idx = anchor.start()
+            if idx <= pos:
+                # the local part is before the search start
+                continue
+            if reversed_string is None:
+                reversed_string = string[::-1]
+            end = len(string) - idx
+            local = self.reversed_local.match(
+                reversed_string, end,
+                end + min(idx - pos, self.max_local_length))
+            match = self.regexp.match(
+                string, idx - (local.end() - end),
+                min(endpos, idx + self.max_domain_length))
+            if match is not None:
+                yield match
+                pos = match.end()
+
+    def findall(self, string, pos=0, endpos=None):
+        matches = self.finditer(string, pos, endpos)
+        if self.groups > 1:
+            return [match.groups('') for match in matches]
+        return [match.group(self.groups) for match in matches]
+
+
 class Email(String):
     default_regexp = (
         "(?P<extract>[a-z0-9!#$%&'*+\/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+\/=?^_`"
         "{|}~-]+)*(@|\sat\s)(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(\.|"
         "\sdot\s))+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)")
+    local_chars = "abcdefghijklmnopqrstuvwxyz0123456789!#$%&'*+/=?^_`{|}~-"
+    _matcher = None
+
+    @property
+    def re(self):
+        if self._regexp != Email.default_regexp:
+            # a custom regexp is used as is
+            return self._compiled_regexp
+        matcher = self.__class__.__dict__.get('_matcher')
+        if matcher is None:
+            matcher = EmailMatcher(self.default_regexp, self.local_chars)
+            self.__class__._matcher = matcher
+        return matcher
+
+
+class RawBody:
+    """Text of a response or a node for the raw body fields.
+
+    It's decoded and the embedded json is parsed once per load,
+    whatever the number of the fields.
+
+    :param source: scrapy.http.TextResponse, scrapy.Selector
+                   or scrapy.SelectorList
+    """
+
+    def __init__(self, source):
+        if source is None:
+            raise RuntimeError('To use raw body fields, the item must be '
+                               'loaded with a selector or a response')
+        self.source = source
+        self._text = None
+        self._documents = {}
+
+    @property
+    def text(self):
+        if self._text is None:
+            source = self.source
+            if isinstance(source, TextResponse):
+                self._text = source.text
+            elif isinstance(source, list):
+                self._text = ''.join(s.get() for s in source)
+            else:
+                self._text = source.get()
+        return self._text
+
+    def get_json(self, script_regexp):
+        """
+        :param script_regexp: compiled regexp of the script element,
+                              the first group is the script text
+        :return list: parsed json documents
+        """
+        try:
+            return self._documents[script_regexp]
+        except KeyError:
+            pass
+
+        documents = []
+        for match in script_regexp.finditer(self.text):
+            try:
+                documents.append(json.loads(match.group(1)))
+            except ValueError:
+                logger.debug('Invalid embedded json: %.100r', match.group(1))
+        self._documents[script_regexp] = documents
+        return documents
+
+
+class Regex(String):
+    """Field found by a regexp in the raw response text.
+
+    The page isn't parsed when all the item fields are raw body ones.
+    The value is the "extract" group, the first group or the whole match.
+
+    :param str pattern: regexp
+    :param processors: list of scrapy.loader.processors instances
+    :param int flags: regexp flags
+    :param group: group name or number of the value
+    :param bool unescape: replace html entities in the values
+    :param kwargs: rest of parameters
+    """
+    raw_body = True
+
+    def __init__(self, pattern, *processors, flags=0, group=None,
+                 unescape=True, **kwargs):
+        super(Regex, self).__init__(pattern, *processors, **kwargs)
+        self.pattern = re.compile(pattern, flags)
+        if group is None:
+            if 'extract' in self.pattern.groupindex:
+                group = 'extract'
+            else:
+                group = 1 if self.pattern.groups else 0
+        self.group = group
+        self.unescape = unescape
+
+    def extract_raw(self, raw):
+        """
+        :param RawBody raw:
+        :return list: found strings
+        """
+        values = []
+        for match in self.pattern.finditer(raw.text):
+            value = match.group(self.group)
+            if value is None:
+                continue
+            if self.unescape:
+                value = html.unescape(value)
+            values.append(value)
+            if value and not self.multi_selector:
+                # TakeFirst won't look further
+                break
+        return values
+
+
+class JSONPath(String):
+    """Field found by a path in the json embedded into the page scripts.
+
+    Paths are a subset of JSONPath: "$.offers[0].price", "$..name",
+    "$.images[*]", "$.images[-1]", "$['@type']". Values which aren't
+    strings are json encoded.
+
+    :param str path: JSONPath
+    :param processors: list of scrapy.loader.processors instances
+    :param str script: regexp of the script elements, its first group
+                       is the json text, ld+json and json ones by default
+    :param kwargs: rest of parameters
+    """
+    raw_body = True
+    default_script = (r'<script\b[^>]*\btype=["\']?application/(?:ld\+)?'
+                      r'json["\']?[^>]*>(.*?)</script>')
+    _step_regexp = re.compile(r'(\.\.|\.)(\w+|\*)|\[(-?\d+|\*)\]'
+                              r'|\[\'([^\']*)\'\]|\["([^"]*)"\]')
+
+    def __init__(self, path, *processors, script=None, **kwargs):
+        super(JSONPath, self).__init__(path, *processors, **kwargs)
+        self.path = path
+        self.steps = self._parse(path)
+        self.script = re.compile(script or self.default_script,
+                                 re.IGNORECASE | re.DOTALL)
+
+    @classmethod
+    def _parse(cls, path):
+        if not path.startswith('$'):
+            raise ValueError('JSONPath must start with "$", not "%s".' % path)
+        steps = []
+        position = 1
+        while position < len(path):
+            match = cls._step_regexp.match(path, position)
+            if match is None:
+                raise ValueError('Invalid JSONPath "%s" at %d.' % (
+                    path, position))
+            dots, name, index, quoted, double_quoted = match.groups()
+            if index is not None:
+                key = '*' if index == '*' else int(index)
+                steps.append((False, key))
+            elif name is not None:
+                steps.append((dots == '..', name))
+            else:
+                key = quoted if quoted is not None else double_quoted
+                steps.append((False, (key,)))
+            position = match.end()
+        return tuple(steps)
+
+    def find(self, document):
+        """
+        :param document: parsed json
+        :return list: values found by the path
+        """
+        nodes = [document]
+        for recursive, key in self.steps:
+            if recursive:
+                nodes = [n for node in nodes for n in self._descendants(node)]
+            found = []
+            for node in nodes:
+                found.extend(self._children(node, key))
+            nodes = found
+        return nodes
+
+    @staticmethod
+    def _children(node, key):
+        if key == '*':
+            if isinstance(node, dict):
+                return list(node.values())
+            return list(node) if isinstance(node, list) else []
+        if isinstance(key, int):
+            if isinstance(node, list) and -len(node) <= key < len(node):
+                return [node[key]]
+            return []
+        if isinstance(key, tuple):
+            # quoted name, it's never a wildcard
+            key = key[0]
+        if isinstance(node, dict) and key in node:
+            return [node[key]]
+        return []
+
+    @classmethod
+    def _descendants(cls, node):
+        yield node
+        children = ()
+        if isinstance(node, dict):
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        for child in children:
+            yield from cls._descendants(child)
+
+    def extract_raw(self, raw):
+        """
+        :param RawBody raw:
+        :return list: found strings
+        """
+        values = []
+        for document in raw.get_json(self.script):
+            for value in self.find(document):
+                if value is None:
+                    continue
+                if not isinstance(value, str):
+                    value = json.dumps(value, ensure_ascii=False)
+                values.append(value)
+            if values and not self.multi_selector:
+                break
+        return values
@@ -1,10 +1,15 @@
 import copy
+import json
+from collections import MutableMapping
 
 import scrapy
 from scrapy.item import DictItem
 from scrapy.loader import ItemLoader
 
 from .abc import ItemABC
+from .cache import get_item_path
+from .fields import RawBody
+from .plans import ItemPlan
 from .utils import is_xpath_selector
 
 
@@ -29,12 +34,152 @@ class BaseItem(scrapy.Item):
             super(BaseItem, self).__setattr__(name, value)
 
 
+def _restore_compact_item(item_class, values):
+    return item_class.get_compact_class()(values)
+
+
+class CompactItem(MutableMapping, scrapy.item.BaseItem):
+    """Base class of memory-compact items.
+
+    Field values are kept in slots and the fields declaration is shared
+    by the class, so an instance has no filled dict, no fields copy and no
+    references back from the fields. Dot notation and defaults work as in
+    BaseItem. It's a scrapy.item.BaseItem, so spiders yield it as it is,
+    but it isn't a scrapy.Item: use to_item() for the code that needs one.
+    """
+    __slots__ = ()
+    fields = {}
+    item_class = None
+    _slot_names = {}
+    _slot_setters = {}
+
+    # scrapy tracks the BaseItem instances by weak references, that's
+    # a dict entry per item, so compact ones aren't tracked
+    __new__ = object.__new__
+
+    def __init__(self, *args, **kwargs):
+        if args or kwargs:
+            for key, value in dict(*args, **kwargs).items():
+                self[key] = value
+
+    def __getattr__(self, name):
+        # it's called for the fields not having value only
+        if name in self.fields:
+            if getattr(self.fields[name], 'default', None) is not None:
+                return [self.fields[name].default]
+            return []
+        raise AttributeError('%s has no attribute "%s"' % (
+            self.__class__.__name__, name))
+
+    def __setattr__(self, name, value):
+        # BaseItem gives the instances a dict, it's never filled
+        if not hasattr(type(self), name):
+            raise AttributeError('%s has no attribute "%s"' % (
+                self.__class__.__name__, name))
+        object.__setattr__(self, name, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._slot_names[key])
+        except (KeyError, AttributeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        try:
+            setter = self._slot_setters[key]
+        except KeyError:
+            raise KeyError('%s does not support field: %s' % (
+                self.__class__.__name__, key))
+        setter(self, value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, self._slot_names[key])
+        except (KeyError, AttributeError):
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, slot_name in self._slot_names.items():
+            if hasattr(self, slot_name):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict(self))
+
+    def __reduce__(self):
+        return _restore_compact_item, (self.item_class, dict(self))
+
+    def to_item(self):
+        """
+        :return Item: regular item instance with the same values
+        """
+        return self.item_class(self)
+
+    @classmethod
+    def build(cls, item_class):
+        """Make compact item class for the Item class.
+
+        :param type item_class: Item subclass
+        :return type: CompactItem subclass
+        """
+        slot_names = {name: '_f_' + name for name in item_class.fields}
+        namespace = {
+            '__slots__': tuple(slot_names.values()),
+            '__module__': item_class.__module__,
+            'fields': item_class.fields,
+            'item_class': item_class,
+            '_slot_names': slot_names,
+        }
+        for name, slot_name in slot_names.items():
+            if not hasattr(cls, name):
+                # the names taken by mapping methods are reachable as keys
+                namespace[name] = property(
+                    lambda self, s=slot_name: getattr(self, s),
+                    lambda self, value, s=slot_name: object.__setattr__(
+                        self, s, value))
+        compact_class = type('Compact' + item_class.__name__, (cls,),
+                             namespace)
+        # the slot descriptors set the values bypassing __setattr__
+        compact_class._slot_setters = {
+            name: getattr(compact_class, slot_name).__set__
+            for name, slot_name in slot_names.items()}
+        return compact_class
+
+
+def get_item_class(item):
+    """
+    :param item: Item or CompactItem instance
+    :return type: Item subclass
+    """
+    if isinstance(item, CompactItem):
+        return item.item_class
+    return type(item)
+
+
 class Item(BaseItem, ItemABC):
     """Base class from which all Items normally inherit.
 
-    :param ItemLoader loader_class:
+    :param ItemLoader loader_class: a custom loader class disables
+                                    the compiled extraction plan
+    :param ItemPlan plan_class:
+    :param str backend: selector evaluation backend of the plan,
+                        "parsel" or "lxml"
+    :param bool compact: the plan fills CompactItem instances when True,
+                         that's for buffering lots of items in memory
+    :param ExtractionCache extraction_cache: values found in a page are
+                                             reused for duplicate pages
+    :param tuple key_fields: fields identifying the item between crawls,
+                             see make_key
     """
     loader_class = ItemLoader
+    plan_class = ItemPlan
+    backend = 'parsel'
+    compact = False
+    extraction_cache = None
+    key_fields = ()
 
     def __init__(self, *args, **kwargs):
         super(Item, self).__init__(*args, **kwargs)
@@ -51,11 +196,113 @@ class Item(BaseItem, ItemABC):
         super(DictItem, self).__setattr__('fields', fields)
 
     @classmethod
-    def load(cls, selector=None, response=None, parent=None, **context):
+    def get_plan(cls):
+        """Get the extraction plan, it's compiled once per class.
+
+        :return ItemPlan:
+        """
+        plan = cls.__dict__.get('_plan')
+        if plan is None:
+            plan = cls.plan_class(cls, backend=cls.backend,
+                                  cache=cls.extraction_cache)
+            cls._plan = plan
+        return plan
+
+    @classmethod
+    def get_compact_class(cls):
+        """Get CompactItem subclass made for this class.
+
+        :return type:
+        """
+        compact_class = cls.__dict__.get('_compact_class')
+        if compact_class is None:
+            compact_class = CompactItem.build(cls)
+            cls._compact_class = compact_class
+        return compact_class
+
+    @classmethod
+    def make_key(cls, item):
+        """Get the item identity, i.e. for delta crawls. Override it for
+        keys which aren't just the key_fields values.
+
+        The key starts with the class path, so the items of different
+        classes with the same key values don't collide.
+
+        :param item: filled instance or CompactItem of the class
+        :return bytes:
+        """
+        if not cls.key_fields:
+            raise ValueError('"key_fields" of %s are not set.' % cls.__name__)
+        key = [get_item_path(cls)]
+        key.extend(item.get(name) for name in cls.key_fields)
+        return json.dumps(key, default=str,
+                          ensure_ascii=False).encode('utf-8')
+
+    @classmethod
+    def load(cls, selector=None, response=None, parent=None,
+             extraction_context=None, **context):
+        """Load the item from the response.
+
+        :param selector: scrapy.Selector or a response
+        :param scrapy.Response response:
+        :param ItemLoader parent:
+        :param ExtractionContext extraction_context: selector results shared
+                                                     by items of a response
+        :param dict context:
+        :return: filled instance
+        """
+        if parent is not None or cls.loader_class is not ItemLoader:
+            return cls.load_with_loader(selector=selector, response=response,
+                                        parent=parent, **context)
+        return cls.get_plan().load(selector=selector, response=response,
+                                   extraction_context=extraction_context,
+                                   **context)
+
+    @classmethod
+    def load_many(cls, selector=None, container=None, response=None,
+                  extraction_context=None, **context):
+        """Load an item per each row of a listing page.
+
+        :param selector: scrapy.Selector, scrapy.SelectorList or a response
+        :param str container: css or xpath selector of the rows
+        :param scrapy.Response response:
+        :param ExtractionContext extraction_context: selector results shared
+                                                     by items of a response
+        :param dict context:
+        :return: generator of filled instances
+        """
+        if container is None:
+            raise ValueError('The "container" selector is required.')
+        return cls.get_plan().load_many(container, selector=selector,
+                                        response=response,
+                                        extraction_context=extraction_context,
+                                        **context)
+
+    @classmethod
+    def iterload(cls, source, record_tag, **context):
+        """Stream items from a huge xml feed record by record.
+
+        :param source: file path, binary file object or a response
+        :param str record_tag: record element tag
+        :param dict context:
+        :return: generator of filled instances
+        """
+        return cls.get_plan().iterload(source, record_tag, **context)
+
+    @classmethod
+    def load_with_loader(cls, selector=None, response=None, parent=None,
+                         **context):
         item = cls()
         loader = cls.loader_class(item=item, selector=selector,
                                   response=response, parent=parent, **context)
+        raw = None
         for field_name, field in item.fields.items():
+            if getattr(field, 'raw_body', False):
+                if raw is None:
+                    raw = RawBody(response if selector is None else selector)
+                loader.replace_value(field_name, field.extract_raw(raw),
+                                     *field.processors, re=field.re)
+                continue
             is_xpath = is_xpath_selector(field.selector)
             method = loader.replace_xpath if is_xpath else loader.replace_css
             method(field_name, field.selector, *field.processors, re=field.re)
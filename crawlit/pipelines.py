@@ -0,0 +1,203 @@
+"""Item pipelines."""
+import logging
+
+from scrapy.exceptions import NotConfigured
+from twisted.internet import defer, task, threads
+
+
+logger = logging.getLogger(__name__)
+
+
+class MongoPipeline:
+    """Writes items to MongoDB in batches.
+
+    Items are buffered and flushed with a single insert_many, or with
+    unordered bulk upserts when the unique key fields are set. A batch is
+    flushed when it's full, by timer and when the spider is closed.
+    Writes run in threads, when max_pending batches are being written
+    the next items wait for them, so the crawler slows down to the speed
+    of the database instead of buffering without limit.
+
+    Enable it in the project settings::
+
+        ITEM_PIPELINES = {'crawlit.pipelines.MongoPipeline': 800}
+        CRAWLIT_MONGO_URI = 'mongodb://localhost:27017'
+        CRAWLIT_MONGO_DATABASE = 'crawl'
+        CRAWLIT_MONGO_UNIQUE_KEY = ['url']
+
+    :param str uri: MongoDB connection string
+    :param str database: database name
+    :param str collection: collection name, the spider name by default
+    :param list unique_key: item fields the documents are upserted by
+    :param int batch_size: max documents per write
+    :param float flush_interval: seconds between the timer flushes
+    :param int max_pending: max batches being written at once
+    :param scrapy.statscollectors.StatsCollector stats:
+    """
+    stats_prefix = 'crawlit/mongo'
+
+    def __init__(self, uri, database, collection=None, unique_key=(),
+                 batch_size=500, flush_interval=5.0, max_pending=2,
+                 stats=None):
+        if batch_size < 1 or max_pending < 1:
+            raise ValueError('"batch_size" and "max_pending" must be '
+                             'positive.')
+        self.uri = uri
+        self.database = database
+        self.collection_name = collection
+        self.unique_key = tuple(unique_key)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.stats = stats
+        self.client = None
+        self.collection = None
+        self.buffer = []
+        self.pending = 0
+        self._waiting = []
+        self._drained = []
+        self._flush_loop = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.get('CRAWLIT_MONGO_URI'):
+            raise NotConfigured
+        return cls(
+            settings.get('CRAWLIT_MONGO_URI'),
+            settings.get('CRAWLIT_MONGO_DATABASE', 'crawlit'),
+            collection=settings.get('CRAWLIT_MONGO_COLLECTION'),
+            unique_key=settings.getlist('CRAWLIT_MONGO_UNIQUE_KEY'),
+            batch_size=settings.getint('CRAWLIT_MONGO_BATCH_SIZE', 500),
+            flush_interval=settings.getfloat('CRAWLIT_MONGO_FLUSH_INTERVAL',
+                                             5.0),
+            max_pending=settings.getint('CRAWLIT_MONGO_MAX_PENDING', 2),
+            stats=crawler.stats)
+
+    def make_client(self):
+        """
+        :return pymongo.MongoClient:
+        """
+        import pymongo
+        return pymongo.MongoClient(self.uri)
+
+    def open_spider(self, spider):
+        self.client = self.make_client()
+        self.collection = self.client[self.database][
+            self.collection_name or spider.name]
+        if self.flush_interval:
+            self._flush_loop = task.LoopingCall(self._flush_by_timer)
+            self._flush_loop.start(self.flush_interval, now=False)
+
+    @defer.inlineCallbacks
+    def close_spider(self, spider):
+        if self._flush_loop is not None and self._flush_loop.running:
+            self._flush_loop.stop()
+        while self.buffer or self.pending:
+            yield self._wait_drained()
+            yield self.flush()
+        self.client.close()
+
+    def process_item(self, item, spider):
+        self.buffer.append(self.get_document(item))
+        if len(self.buffer) >= self.batch_size and \
+                self.pending < self.max_pending:
+            self.flush()
+
+        if self.pending < self.max_pending:
+            return item
+
+        # the database falls behind, the item waits for a finished write
+        self._inc_stats('backpressure')
+        d = defer.Deferred()
+        d.addCallback(lambda _: item)
+        self._waiting.append(d)
+        return d
+
+    def get_document(self, item):
+        """
+        :param item: ItemABC instance
+        :return dict: document to write
+        """
+        return dict(item)
+
+    def get_operation(self, document):
+        """
+        :param dict document:
+        :return: pymongo write operation upserting the document
+        """
+        import pymongo
+        key = {name: document.get(name) for name in self.unique_key}
+        return pymongo.UpdateOne(key, {'$set': document}, upsert=True)
+
+    def flush(self):
+        """Write the buffered documents.
+
+        :return twisted.internet.defer.Deferred: fired when it's written
+        """
+        if not self.buffer:
+            return defer.succeed(None)
+
+        batch = self.buffer[:self.batch_size]
+        self.buffer = self.buffer[self.batch_size:]
+        self.pending += 1
+        d = self._call_in_thread(self._write, batch)
+        d.addCallbacks(self._written, self._failed, errbackArgs=(batch,))
+        d.addBoth(self._release)
+        return d
+
+    def _call_in_thread(self, function, *args):
+        return threads.deferToThread(function, *args)
+
+    def _write(self, batch):
+        if self.unique_key:
+            result = self.collection.bulk_write(
+                [self.get_operation(document) for document in batch],
+                ordered=False)
+            return {'upserted': result.upserted_count,
+                    'modified': result.modified_count}
+        result = self.collection.insert_many(batch, ordered=False)
+        return {'inserted': len(result.inserted_ids)}
+
+    def _written(self, counts):
+        self._inc_stats('batches')
+        for key, value in counts.items():
+            self._inc_stats(key, value)
+
+    def _failed(self, failure, batch):
+        self._inc_stats('errors')
+        logger.error('Failed to write %d documents to MongoDB: %s',
+                     len(batch), failure.getErrorMessage())
+
+    def _release(self, _):
+        self.pending -= 1
+        # the waiting items are in the buffer already, so they're let go
+        # before the buffer takes the free slot
+        waiting, self._waiting = self._waiting, []
+        for d in waiting:
+            d.callback(None)
+
+        if len(self.buffer) >= self.batch_size and \
+                self.pending < self.max_pending:
+            self.flush()
+
+        if not self.pending:
+            drained, self._drained = self._drained, []
+            for d in drained:
+                d.callback(None)
+
+    def _flush_by_timer(self):
+        if self.pending < self.max_pending:
+            self.flush()
+
+    def _wait_drained(self):
+        if not self.pending:
+            return defer.succeed(None)
+        d = defer.Deferred()
+        self._drained.append(d)
+        return d
+
+    def _inc_stats(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value('%s/%s' % (self.stats_prefix, key),
+                                 count=count)
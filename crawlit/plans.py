@@ -0,0 +1,502 @@
+"""Compiled extraction plans.
+
+A plan is built once per Item class and keeps everything that doesn't
+change between responses: selector kind, translated XPath, compiled regexp
+and the processor chain of every field. Running a plan gives the same
+result as filling the item with ``scrapy.ItemLoader``, without creating
+a loader and re-deriving the fields on every call.
+"""
+import re
+import gzip
+import time
+import logging
+from io import BytesIO
+from functools import partial
+
+from lxml import etree
+from parsel.csstranslator import GenericTranslator, HTMLTranslator
+from scrapy.exceptions import DropItem
+from scrapy.http import Response, TextResponse
+from scrapy.selector import Selector
+from scrapy.loader.processors import Identity
+from scrapy.utils.misc import arg_to_iter
+from scrapy.utils.python import flatten, get_func_args
+from w3lib.html import replace_entities
+
+from . import profiling
+from .backends import get_backend
+from .fields import RawBody
+from .utils import is_xpath_selector
+
+
+logger = logging.getLogger(__name__)
+
+
+css_translators = {
+    'html': HTMLTranslator(),
+    'xml': GenericTranslator(),
+}
+
+
+def get_selector_type(selector):
+    """
+    :param selector: scrapy.Selector or scrapy.SelectorList
+    :return str: "html" or "xml"
+    """
+    if isinstance(selector, list):
+        selector = selector[0] if selector else None
+    return getattr(selector, 'type', None) or 'html'
+
+
+def to_xpath(selector, selector_type='html'):
+    """Translate css selector to xpath, xpath is returned as is.
+
+    :param str selector: css or xpath selector
+    :param str selector_type: "html" or "xml"
+    :return str:
+    """
+    if is_xpath_selector(selector):
+        return selector
+    translator = css_translators.get(selector_type, css_translators['html'])
+    return translator.css_to_xpath(selector)
+
+
+def resolve_selector(selector=None, response=None):
+    """Get a selector the same way scrapy.ItemLoader does it.
+
+    :param selector: scrapy.Selector, scrapy.SelectorList or a response
+    :param scrapy.http.TextResponse response:
+    :return: scrapy.Selector or scrapy.SelectorList
+    """
+    if selector is None:
+        selector = response
+    if isinstance(selector, TextResponse):
+        # the response caches its parsed selector, no need to parse twice
+        selector = selector.selector
+    if selector is None:
+        raise RuntimeError('To use XPath or CSS selectors, the item must be '
+                           'loaded with a selector or a response')
+    return selector
+
+
+def unescape(value):
+    """Replace html entities the way scrapy.utils.misc.extract_regex does.
+
+    :param str value:
+    :return str:
+    """
+    if '&' not in value:
+        return value
+    return replace_entities(value, keep=['lt', 'amp'])
+
+
+def select(selector, xpath):
+    """Default way to get the nodes found by the xpath.
+
+    :param selector: scrapy.Selector or scrapy.SelectorList
+    :param str xpath:
+    :return scrapy.SelectorList:
+    """
+    return selector.xpath(xpath)
+
+
+def free_element(element):
+    """Release the parsed element and everything parsed before it.
+
+    :param lxml.etree._Element element:
+    """
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+class Processor:
+    """Processor wrapper with the loader context check made in advance.
+
+    :param callable function: scrapy.loader.processors instance or function
+    """
+    __slots__ = ('function', 'takes_context')
+
+    def __init__(self, function):
+        self.function = function
+        self.takes_context = 'loader_context' in get_func_args(function)
+
+    def __call__(self, value, context):
+        if self.takes_context:
+            return self.function(value, loader_context=context)
+        return self.function(value)
+
+
+class FieldPlan:
+    """Precompiled extraction steps of a single field.
+
+    :param str name: class variable name in terms of ItemABC
+    :param FieldABC field: field instance
+    :param backend: selector evaluation backend, see crawlit.backends
+    """
+
+    def __init__(self, name, field, backend=None):
+        self.name = name
+        self.field = field
+        if field.name is None:
+            # items which don't link the fields still need the field name
+            field.name = name
+        self.backend = backend or get_backend('parsel')
+        self.is_xpath = is_xpath_selector(field.selector)
+        self.regexp = field.re or None
+        if isinstance(self.regexp, str):
+            self.regexp = re.compile(self.regexp, re.UNICODE)
+        if self.regexp is not None and \
+                'extract' in self.regexp.groupindex:
+            self._search = self._search_extract
+        else:
+            self._search = self._search_all
+        get_processors = getattr(field, 'get_fused_processors', None)
+        processors = field.processors if get_processors is None \
+            else get_processors()
+        self.processors = tuple(Processor(p) for p in processors)
+        self.input_processor = self._get_meta_processor('input_processor')
+        self.output_processor = self._get_meta_processor('output_processor')
+        self.raw_body = getattr(field, 'raw_body', False)
+        # TakeFirst keeps only the first found value of single value fields
+        self.first_only = not getattr(field, 'multi_selector', True)
+        self._xpaths = {}
+        self._queries = {}
+
+    def _get_meta_processor(self, key):
+        processor = self.field.get(key)
+        if processor is None or isinstance(processor, Identity):
+            return None
+        return Processor(processor)
+
+    def get_xpath(self, selector_type='html', relative=False):
+        """Get the field selector translated to xpath.
+
+        :param str selector_type: "html" or "xml"
+        :param bool relative: makes absolute xpath relative to the context
+                              node, i.e. "//a" becomes ".//a"
+        :return str:
+        """
+        key = (selector_type, relative)
+        try:
+            return self._xpaths[key]
+        except KeyError:
+            pass
+
+        xpath = to_xpath(self.field.selector, selector_type)
+        if relative and self.is_xpath:
+            xpath = '.' + xpath
+        self._xpaths[key] = xpath
+        return xpath
+
+    def get_query(self, selector_type='html', relative=False, first=False):
+        """Get the xpath compiled by the backend.
+
+        :param str selector_type: "html" or "xml"
+        :param bool relative: makes absolute xpath relative to the context
+        :param bool first: select the first matched node only
+        :return: backend query or None if the first node can't be selected
+        """
+        key = (selector_type, relative, first)
+        try:
+            return self._queries[key]
+        except KeyError:
+            pass
+
+        xpath = self.get_xpath(selector_type, relative)
+        if first:
+            xpath = '(%s)[1]' % xpath
+        query = self._queries[key] = self.backend.compile(self.field, xpath)
+        return query
+
+    def extract(self, selector, relative=False, evaluate=None, raw=None):
+        """Find the raw field values.
+
+        Single value fields try the first matched node only, and evaluate
+        the whole selector if that node doesn't give a value.
+
+        :param selector: scrapy.Selector or scrapy.SelectorList
+        :param bool relative: evaluate absolute xpath from the selector node
+        :param callable evaluate: gets strings by selector and backend query
+        :param RawBody raw: text of the selector, for raw body fields
+        :return list: found strings
+        """
+        if self.raw_body:
+            return self._apply_regexp(self.field.extract_raw(raw))
+
+        evaluate = evaluate or self.backend.evaluate
+        selector_type = get_selector_type(selector)
+        if self.first_only and not isinstance(selector, list):
+            values = self._extract_first(selector, selector_type, relative,
+                                         evaluate)
+            if values is not None:
+                return values
+
+        query = self.get_query(selector_type, relative)
+        return self._apply_regexp(evaluate(selector, query))
+
+    def _extract_first(self, selector, selector_type, relative, evaluate):
+        try:
+            query = self.get_query(selector_type, relative, first=True)
+            if query is None:
+                return None
+            values = evaluate(selector, query)
+        except ValueError:
+            # xpath result isn't a node set, e.g. "count(//a)"
+            self._queries[(selector_type, relative, True)] = None
+            return None
+        if not values:
+            # nothing matched, the whole selector won't match either
+            return values
+
+        values = self._apply_regexp(values)
+        for value in values:
+            if value is not None and value != '':
+                return values
+        return None
+
+    def _apply_regexp(self, values):
+        if self.regexp is None:
+            return values
+        found = []
+        for value in values:
+            found.extend(self._search(value))
+        return found
+
+    # the same results as scrapy.utils.misc.extract_regex gives,
+    # the kind of the regexp is checked once per field instead of per call
+
+    def _search_extract(self, text):
+        match = self.regexp.search(text)
+        if match is None:
+            return []
+        value = match.group('extract')
+        return [] if value is None else [unescape(value)]
+
+    def _search_all(self, text):
+        found = self.regexp.findall(text)
+        if self.regexp.groups > 1:
+            found = flatten(found)
+        return [unescape(value) for value in found]
+
+    def process(self, values, context):
+        """Run the field processors over the raw values.
+
+        :param list values: found strings
+        :param dict context: loader context
+        :return: final value or None if the field must stay unset
+        """
+        value = values
+        for processor in self.processors:
+            if value is None:
+                break
+            value = processor(value, context)
+        if value is None:
+            return None
+
+        value = arg_to_iter(value)
+        if self.input_processor is not None:
+            value = self.input_processor(value, context)
+            value = arg_to_iter(value) if value else None
+        if not value:
+            return None
+
+        if self.output_processor is not None:
+            try:
+                return self.output_processor(list(value), context)
+            except Exception as e:
+                raise ValueError(
+                    "Error with output processor: field=%r value=%r "
+                    "error='%s: %s'" % (self.name, value,
+                                        type(e).__name__, str(e)))
+        return list(value)
+
+
+class ItemPlan:
+    """Precompiled extraction steps of an Item class.
+
+    :param type item_class: ItemABC subclass
+    :param str backend: selector evaluation backend name
+    :param ExtractionCache cache: results cached by the response body
+    """
+    field_plan_class = FieldPlan
+
+    def __init__(self, item_class, backend='parsel', cache=None):
+        self.item_class = item_class
+        self.cache = cache
+        if getattr(item_class, 'compact', False):
+            self.item_factory = item_class.get_compact_class()
+        else:
+            self.item_factory = item_class
+        self.backend = get_backend(backend)
+        self.fields = tuple(
+            self.field_plan_class(field_name, field, self.backend)
+            for field_name, field in item_class.fields.items())
+        self.has_raw_body = any(f.raw_body for f in self.fields)
+        # the page isn't parsed if nothing needs the selectors
+        self.raw_body_only = bool(self.fields) and all(
+            f.raw_body for f in self.fields)
+
+    def load(self, selector=None, response=None, extraction_context=None,
+             **context):
+        """Fill a new item with the values found by the selector.
+
+        :param selector: scrapy.Selector, scrapy.SelectorList or a response
+        :param scrapy.http.TextResponse response:
+        :param ExtractionContext extraction_context: shared selector results
+        :param dict context: loader context
+        :return ItemABC: filled instance
+        """
+        page = response if selector is None else selector
+        if self.cache is not None and not context and \
+                isinstance(page, TextResponse):
+            # a cache hit must not parse the response, so it's checked first
+            return self.cache.load(
+                self.item_class, page,
+                partial(self._load, selector, response, extraction_context),
+                item_factory=self.item_factory)
+        return self._load(selector, response, extraction_context, **context)
+
+    def _load(self, selector, response, extraction_context, **context):
+        if self.raw_body_only:
+            page = response if selector is None else selector
+            context.update(selector=page, response=response)
+            return self._fill(page, context, raw=RawBody(page))
+
+        resolved = resolve_selector(selector, response)
+        context.update(selector=resolved if selector is None else selector,
+                       response=response)
+        return self._fill(resolved, context,
+                          evaluate=self._get_evaluate(extraction_context))
+
+    def load_many(self, container, selector=None, response=None,
+                  extraction_context=None, **context):
+        """Fill a new item per each row found by the container selector.
+
+        The field selectors are evaluated relative to the row,
+        rows dropped by the field processors are skipped.
+
+        :param str container: css or xpath selector of the rows
+        :param selector: scrapy.Selector, scrapy.SelectorList or a response
+        :param scrapy.http.TextResponse response:
+        :param ExtractionContext extraction_context: shared selector results
+        :param dict context: loader context
+        :return: generator of filled ItemABC instances
+        """
+        resolved = resolve_selector(selector, response)
+        container = to_xpath(container, get_selector_type(resolved))
+        if extraction_context is not None:
+            rows = extraction_context.select(resolved, container)
+        else:
+            rows = select(resolved, container)
+        evaluate = self._get_evaluate(extraction_context)
+        context.update(response=response)
+
+        for row in rows:
+            row_context = dict(context, selector=row)
+            try:
+                item = self._fill(row, row_context, relative=True,
+                                  evaluate=evaluate)
+            except DropItem as e:
+                logger.warning('Dropped %s row: %s',
+                               self.item_class.__name__, e)
+                continue
+            yield item
+
+    def iterload(self, source, record_tag, **context):
+        """Fill a new item per each record element of a huge xml feed.
+
+        The feed is parsed incrementally, every record element is freed
+        as soon as its item is filled, so the memory usage doesn't depend
+        on the feed size. The field selectors are evaluated relative to
+        the record, records dropped by the field processors are skipped.
+
+        :param source: file path, binary file object or a response
+        :param str record_tag: record element tag, i.e. "item"
+                               or "{http://www.sitemaps.org/schemas/...}url"
+        :param dict context: loader context
+        :return: generator of filled ItemABC instances
+        """
+        response = opened = None
+        if isinstance(source, Response):
+            response, source = source, BytesIO(source.body)
+        elif isinstance(source, str) and source.endswith('.gz'):
+            source = opened = gzip.open(source, 'rb')
+        context.update(response=response)
+
+        try:
+            # the external entities of a crawled feed could read local
+            # files, scrapy Selector doesn't resolve them either
+            records = etree.iterparse(source, events=('end',),
+                                      tag=record_tag, huge_tree=True,
+                                      resolve_entities=False,
+                                      no_network=True)
+            for _, element in records:
+                row = Selector(root=element, type='xml')
+                try:
+                    item = self._fill(row, dict(context, selector=row),
+                                      relative=True)
+                except DropItem as e:
+                    logger.warning('Dropped %s record: %s',
+                                   self.item_class.__name__, e)
+                    continue
+                finally:
+                    free_element(element)
+                yield item
+        finally:
+            if opened is not None:
+                opened.close()
+
+    def _get_evaluate(self, extraction_context):
+        if extraction_context is None:
+            return self.backend.evaluate
+        return partial(extraction_context.evaluate,
+                       evaluate=self.backend.evaluate)
+
+    def _fill(self, selector, context, relative=False, evaluate=None,
+              raw=None):
+        if raw is None and self.has_raw_body:
+            raw = RawBody(selector)
+        profiler = profiling.get_profiler()
+        if profiler is not None and profiler.sample():
+            return self._fill_profiled(profiler, selector, context, relative,
+                                       evaluate, raw)
+
+        item = self.item_factory()
+        context['item'] = item
+
+        for field_plan in self.fields:
+            values = field_plan.extract(selector, relative, evaluate, raw)
+            value = field_plan.process(values, context)
+            if value is not None:
+                item[field_plan.name] = value
+        return item
+
+    def _fill_profiled(self, profiler, selector, context, relative=False,
+                       evaluate=None, raw=None):
+        item = self.item_factory()
+        context['item'] = item
+        item_name = self.item_class.__name__
+        timer = time.perf_counter
+
+        for field_plan in self.fields:
+            if field_plan.field.memo is not None:
+                profiler.watch_memo(item_name, field_plan.name,
+                                    field_plan.field.memo)
+            start = timer()
+            values = field_plan.extract(selector, relative, evaluate, raw)
+            extracted = timer()
+            try:
+                value = field_plan.process(values, context)
+            except DropItem as e:
+                profiler.record_drop(item_name, field_plan.name, e)
+                raise
+            finally:
+                profiler.record_field(item_name, field_plan.name,
+                                      extracted - start, timer() - extracted,
+                                      len(values))
+            if value is not None:
+                item[field_plan.name] = value
+        return item
@@ -0,0 +1,183 @@
+"""Item extraction offloaded to a pool of worker processes.
+
+Parsing and field processing are CPU-bound and block the reactor thread,
+so a CPU-bound crawl can't use more than one core and the downloads stall.
+ExtractionPool ships the response body and the Item class import path to
+worker processes and gives a Deferred of the filled item back::
+
+    class ProfileSpider(scrapy.Spider):
+
+        @classmethod
+        def from_crawler(cls, crawler, *args, **kwargs):
+            spider = super().from_crawler(crawler, *args, **kwargs)
+            spider.extraction_pool = ExtractionPool.from_crawler(crawler)
+            return spider
+
+        def parse(self, response):
+            # scrapy waits for the deferred, DropItem fails it
+            return self.extraction_pool.load(ProfileItem, response)
+
+Settings: CRAWLIT_POOL_WORKERS (CPU count by default) and
+CRAWLIT_POOL_MAX_IN_FLIGHT (twice the workers by default).
+
+Worker processes don't get the request meta and the spider, processors
+taking the loader context see a response rebuilt of url, status, headers,
+body and encoding.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy import signals
+from scrapy.utils.misc import load_object
+from twisted.internet import defer, reactor
+from twisted.python.failure import Failure
+
+from .cache import get_import_path
+
+
+# item classes imported by the worker process
+_item_classes = {}
+
+
+def _get_item_class(item_path):
+    try:
+        return _item_classes[item_path]
+    except KeyError:
+        item_class = _item_classes[item_path] = load_object(item_path)
+        return item_class
+
+
+def _make_response(response_data):
+    response_class, url, status, headers, body, encoding = response_data
+    return response_class(url, status=status, headers=headers, body=body,
+                          encoding=encoding)
+
+
+def load_in_worker(item_path, response_data, container=None, **context):
+    """Worker process side of the ExtractionPool.load and load_many.
+
+    :param str item_path: Item class import path
+    :param tuple response_data: see ExtractionPool.get_response_data
+    :param str container: rows selector, loads many items if it's set
+    :param dict context: loader context
+    :return: dict of values or list of dicts
+    """
+    item_class = _get_item_class(item_path)
+    response = _make_response(response_data)
+    if container is not None:
+        return [dict(item) for item in item_class.load_many(
+            response, container=container, **context)]
+    return dict(item_class.load(response, **context))
+
+
+class ExtractionPool:
+    """Pool of worker processes running Item.load.
+
+    :param int max_workers: number of worker processes
+    :param int max_in_flight: max number of responses in the pool,
+                              the rest wait for their turn in the reactor
+    :param concurrent.futures.Executor executor: a custom executor
+    """
+
+    def __init__(self, max_workers=None, max_in_flight=None, executor=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.executor = executor or ProcessPoolExecutor(self.max_workers)
+        self._semaphore = defer.DeferredSemaphore(self.max_in_flight)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        pool = cls(
+            max_workers=settings.getint('CRAWLIT_POOL_WORKERS') or None,
+            max_in_flight=settings.getint('CRAWLIT_POOL_MAX_IN_FLIGHT') or None)
+        crawler.signals.connect(pool.spider_closed,
+                                signal=signals.spider_closed)
+        return pool
+
+    @property
+    def in_flight(self):
+        """
+        :return int: number of responses submitted to the workers
+        """
+        return self.max_in_flight - self._semaphore.tokens
+
+    def spider_closed(self, spider):
+        self.close()
+
+    def close(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    @staticmethod
+    def get_item_path(item_class):
+        """
+        :param type item_class: ItemABC subclass
+        :return str: import path of the class
+        :raise ValueError: the class isn't importable by the workers
+        """
+        return get_import_path(item_class)
+
+    @staticmethod
+    def get_response_data(response):
+        """
+        :param scrapy.http.TextResponse response:
+        :return tuple: picklable data the response is rebuilt of
+        """
+        return (response.__class__, response.url, response.status,
+                dict(response.headers), response.body, response.encoding)
+
+    def load(self, item_class, response, **context):
+        """Load the item from the response in a worker process.
+
+        :param type item_class: module level ItemABC subclass
+        :param scrapy.http.TextResponse response:
+        :param dict context: picklable loader context
+        :return twisted.internet.defer.Deferred: fired with the filled item,
+                                                  failed with DropItem
+        """
+        d = self._submit(item_class, response, context)
+        d.addCallback(self._make_item, item_class)
+        return d
+
+    def load_many(self, item_class, response, container, **context):
+        """Load an item per each row of a listing page in a worker process.
+
+        :param type item_class: module level ItemABC subclass
+        :param scrapy.http.TextResponse response:
+        :param str container: css or xpath selector of the rows
+        :param dict context: picklable loader context
+        :return twisted.internet.defer.Deferred: fired with list of items
+        """
+        d = self._submit(item_class, response,
+                         dict(context, container=container))
+        d.addCallback(lambda rows: [self._make_item(values, item_class)
+                                    for values in rows])
+        return d
+
+    def _submit(self, item_class, response, context):
+        item_path = self.get_item_path(item_class)
+        response_data = self.get_response_data(response)
+        return self._semaphore.run(self._run, item_path, response_data,
+                                   context)
+
+    def _run(self, item_path, response_data, context):
+        d = defer.Deferred()
+        future = self.executor.submit(load_in_worker, item_path,
+                                      response_data, **context)
+        future.add_done_callback(
+            lambda f: reactor.callFromThread(self._fire, d, f))
+        return d
+
+    @staticmethod
+    def _fire(d, future):
+        error = future.exception()
+        if error is not None:
+            d.errback(Failure(error))
+        else:
+            d.callback(future.result())
+
+    @staticmethod
+    def _make_item(values, item_class):
+        if getattr(item_class, 'compact', False):
+            return item_class.get_compact_class()(values)
+        return item_class(values)
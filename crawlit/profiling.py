@@ -0,0 +1,195 @@
+"""Per-field extraction profiling exported as scrapy stats.
+
+Enable it in the project settings::
+
+    EXTENSIONS = {'crawlit.profiling.ExtractionProfiling': 500}
+    CRAWLIT_PROFILING_ENABLED = True
+    CRAWLIT_PROFILING_SAMPLE_RATE = 0.01
+
+For every sampled Item.load the next stats are collected per field:
+
+    crawlit/<Item>/<field>/loads            sampled loads
+    crawlit/<Item>/<field>/selector_time    seconds in selector evaluation
+    crawlit/<Item>/<field>/processors_time  seconds in the processors
+    crawlit/<Item>/<field>/matches          found raw values
+    crawlit/<Item>/<field>/empty            loads that found nothing
+    crawlit/<Item>/<field>/empty_rate       empty / loads, set on close
+    crawlit/<Item>/<field>/dropped/<reason> DropItem by reason
+
+Fields with the ``memoize`` option also get the totals of their memo:
+
+    crawlit/<Item>/<field>/memo_hits        converted values reused
+    crawlit/<Item>/<field>/memo_misses      converted values computed
+    crawlit/<Item>/<field>/memo_hit_rate    hits / (hits + misses)
+"""
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+_profiler = None
+
+DROP_REASONS = (
+    ('invalid choice', 'invalid_choice'),
+    ('int expected', 'int_expected'),
+    ('float expected', 'float_expected'),
+    ('datetime expected', 'datetime_expected'),
+    ('date expected', 'date_expected'),
+)
+
+
+def get_profiler():
+    """
+    :return ExtractionProfiler: installed profiler or None
+    """
+    return _profiler
+
+
+def install(profiler):
+    """Make Item.load report to the profiler.
+
+    :param ExtractionProfiler profiler:
+    """
+    global _profiler
+    _profiler = profiler
+
+
+def uninstall(profiler):
+    """
+    :param ExtractionProfiler profiler: removed if it's the installed one
+    """
+    global _profiler
+    if _profiler is profiler:
+        _profiler = None
+
+
+def get_drop_reason(error):
+    """
+    :param DropItem error: raised by a field processor
+    :return str: reason slug, i.e. "invalid_choice"
+    """
+    message = str(error)
+    for pattern, reason in DROP_REASONS:
+        if pattern in message:
+            return reason
+    return 'other'
+
+
+class ExtractionProfiler:
+    """Collects per-field extraction numbers into scrapy stats.
+
+    :param stats: scrapy.statscollectors.StatsCollector
+    :param float sample_rate: share of the loads to profile, from 0 to 1
+    :param str prefix: stats key prefix
+    """
+
+    def __init__(self, stats, sample_rate=1.0, prefix='crawlit'):
+        if not 0 < sample_rate <= 1:
+            raise ValueError('The "sample_rate" must be in (0, 1] range.')
+        self.stats = stats
+        self.prefix = prefix
+        # profile every n-th load, it's cheaper than random numbers
+        self.sample_every = int(round(1 / sample_rate))
+        self._counter = 0
+        self._keys = {}
+        self._memos = {}
+        self._empty = {}
+
+    def sample(self):
+        """
+        :return bool: True if the current load has to be profiled
+        """
+        self._counter += 1
+        if self._counter >= self.sample_every:
+            self._counter = 0
+            return True
+        return False
+
+    def _key(self, item_name, field_name):
+        try:
+            return self._keys[item_name, field_name]
+        except KeyError:
+            key = self._keys[item_name, field_name] = '%s/%s/%s' % (
+                self.prefix, item_name, field_name)
+            return key
+
+    def record_field(self, item_name, field_name, selector_time,
+                     processors_time, matches):
+        """
+        :param str item_name: Item class name
+        :param str field_name:
+        :param float selector_time: seconds
+        :param float processors_time: seconds
+        :param int matches: number of found raw values
+        """
+        key = self._key(item_name, field_name)
+        inc_value = self.stats.inc_value
+        inc_value(key + '/loads')
+        inc_value(key + '/selector_time', selector_time, start=0.0)
+        inc_value(key + '/processors_time', processors_time, start=0.0)
+        inc_value(key + '/matches', matches)
+        if not matches:
+            inc_value(key + '/empty')
+
+    def record_drop(self, item_name, field_name, error):
+        """
+        :param str item_name: Item class name
+        :param str field_name:
+        :param DropItem error:
+        """
+        key = self._key(item_name, field_name)
+        self.stats.inc_value('%s/dropped/%s' % (key, get_drop_reason(error)))
+
+    def watch_memo(self, item_name, field_name, memo):
+        """Report the memo numbers of the field on close.
+
+        :param str item_name: Item class name
+        :param str field_name:
+        :param crawlit.fields.Memo memo:
+        """
+        self._memos[self._key(item_name, field_name)] = memo
+
+    def close(self):
+        """Set empty result and memo hit rates of the profiled fields."""
+        for key in self._keys.values():
+            loads = self.stats.get_value(key + '/loads', 0)
+            if loads:
+                empty = self.stats.get_value(key + '/empty', 0)
+                self.stats.set_value(key + '/empty_rate', empty / loads)
+        for key, memo in self._memos.items():
+            self.stats.set_value(key + '/memo_hits', memo.hits)
+            self.stats.set_value(key + '/memo_misses', memo.misses)
+            self.stats.set_value(key + '/memo_hit_rate', memo.hit_rate)
+
+
+class ExtractionProfiling:
+    """Scrapy extension installing ExtractionProfiler for the crawl.
+
+    :param ExtractionProfiler profiler:
+    """
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CRAWLIT_PROFILING_ENABLED'):
+            raise NotConfigured
+
+        profiler = ExtractionProfiler(
+            crawler.stats,
+            sample_rate=settings.getfloat('CRAWLIT_PROFILING_SAMPLE_RATE', 1.0),
+            prefix=settings.get('CRAWLIT_PROFILING_STATS_PREFIX', 'crawlit'))
+        extension = cls(profiler)
+        crawler.signals.connect(extension.spider_opened,
+                                signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed,
+                                signal=signals.spider_closed)
+        return extension
+
+    def spider_opened(self, spider):
+        install(self.profiler)
+
+    def spider_closed(self, spider):
+        uninstall(self.profiler)
+        self.profiler.close()
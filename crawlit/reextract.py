@@ -0,0 +1,330 @@
+"""Offline re-extraction of items from stored pages.
+
+Runs Item.load over the pages of WARC files or gzipped html dumps without
+the scrapy engine and streams the items as NDJSON::
+
+    python -m crawlit reextract myproject.items.ProfileItem \\
+        crawl-001.warc.gz crawl-002.warc.gz dumps/ \\
+        --workers 8 --output items.ndjson --checkpoint items.offset
+
+Every output line is {"url": ..., "item": {...}}. The checkpoint file keeps
+the number of the pages done, an interrupted run started again with the
+same checkpoint skips them and appends to the output.
+"""
+import io
+import os
+import sys
+import gzip
+import time
+import zlib
+import logging
+from collections import deque
+from functools import partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse
+from scrapy.utils.misc import load_object
+from scrapy.utils.serialize import ScrapyJSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+HTML_EXTENSIONS = ('.html', '.htm', '.html.gz', '.htm.gz')
+HTML_CONTENT_TYPES = (b'text/html', b'application/xhtml+xml')
+
+
+def _open(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _parse_headers(lines):
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _dechunk(body):
+    chunks = []
+    stream = io.BytesIO(body)
+    while True:
+        size = stream.readline().split(b';')[0].strip()
+        if not size:
+            break
+        size = int(size, 16)
+        if not size:
+            break
+        chunks.append(stream.read(size))
+        stream.readline()
+    return b''.join(chunks)
+
+
+def _split_http(block):
+    """Split a WARC response block into the http headers and body.
+
+    :param bytes block: raw http response
+    :return tuple: headers dict, body as it's transferred
+    """
+    head, _, body = block.partition(b'\r\n\r\n')
+    return _parse_headers(head.split(b'\r\n')[1:]), body
+
+
+def _decode_body(headers, body):
+    """
+    :param dict headers: http headers
+    :param bytes body: body as it's transferred
+    :return bytes: dechunked and decompressed body
+    """
+    if b'chunked' in headers.get(b'transfer-encoding', b'').lower():
+        body = _dechunk(body)
+    encoding = headers.get(b'content-encoding', b'').lower()
+    if encoding in (b'gzip', b'x-gzip'):
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif encoding == b'deflate':
+        body = zlib.decompress(body)
+    return body
+
+
+def _read(path):
+    with _open(path) as f:
+        return f.read()
+
+
+def _iter_warc_pages(fileobj):
+    # the bodies are decoded on demand, the skipped pages aren't
+    while True:
+        line = fileobj.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+        if not line.startswith(b'WARC/'):
+            raise ValueError('WARC record expected, not %r' % line[:40])
+
+        header_lines = []
+        for line in iter(fileobj.readline, b''):
+            if not line.strip():
+                break
+            header_lines.append(line)
+        headers = _parse_headers(header_lines)
+        block = fileobj.read(int(headers[b'content-length']))
+
+        if headers.get(b'warc-type') != b'response' or \
+                not headers.get(b'content-type', b'').startswith(
+                    b'application/http'):
+            continue
+        http_headers, body = _split_http(block)
+        content_type = http_headers.get(b'content-type', b'text/html')
+        if not content_type.lower().startswith(HTML_CONTENT_TYPES):
+            continue
+        url = headers[b'warc-target-uri'].decode('utf-8').strip('<>')
+        yield url, {b'Content-Type': content_type}, \
+            partial(_decode_body, http_headers, body)
+
+
+def _iter_html_pages(path):
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(HTML_EXTENSIONS):
+                    yield from _iter_html_pages(os.path.join(root, name))
+        return
+    yield 'file://' + os.path.abspath(path), {}, partial(_read, path)
+
+
+def _iter_pages(paths):
+    for path in paths:
+        if '.warc' in os.path.basename(path):
+            with _open(path) as f:
+                yield from _iter_warc_pages(f)
+        else:
+            yield from _iter_html_pages(path)
+
+
+def iter_warc(fileobj):
+    """Iterate the html responses of a WARC file.
+
+    :param fileobj: binary file object of an uncompressed WARC stream
+    :return: generator of url, http headers, body
+    """
+    for url, headers, read_body in _iter_warc_pages(fileobj):
+        yield url, headers, read_body()
+
+
+def iter_html_files(path):
+    """Iterate html or gzipped html files of a directory tree.
+
+    :param str path: file or directory path
+    :return: generator of url, http headers, body
+    """
+    for url, headers, read_body in _iter_html_pages(path):
+        yield url, headers, read_body()
+
+
+def iter_records(paths, skip=0):
+    """Iterate the pages of all the archives in the given order.
+
+    :param list paths: WARC files, html files and directories
+    :param int skip: number of the first pages to skip, their bodies
+                     aren't read or decoded
+    :return: generator of url, http headers, body
+    """
+    for url, headers, read_body in islice(_iter_pages(paths), skip, None):
+        yield url, headers, read_body()
+
+
+def extract_batch(item_path, records):
+    """Load the item of every record, it runs in the pool workers.
+
+    :param str item_path: Item class import path
+    :param list records: url, http headers, body
+    :return list: ("item", url, values), ("dropped", url, reason)
+                  or ("error", url, message) per record
+    """
+    item_class = load_object(item_path)
+    results = []
+    for url, headers, body in records:
+        try:
+            response = HtmlResponse(url, headers=headers, body=body)
+            results.append(('item', url, dict(item_class.load(response))))
+        except DropItem as e:
+            results.append(('dropped', url, str(e)))
+        except Exception as e:
+            results.append(('error', url, '%s: %s' % (type(e).__name__, e)))
+    return results
+
+
+class Progress:
+    """Progress and throughput reported to a stream.
+
+    :param int offset: number of the pages done before
+    :param stream: text stream, stderr by default
+    :param float interval: seconds between reports
+    """
+
+    def __init__(self, offset=0, stream=None, interval=5.0):
+        self.offset = offset
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.pages = self.items = self.dropped = self.errors = 0
+        self.started = self._reported = time.time()
+
+    def update(self, results):
+        for kind, _, _ in results:
+            self.pages += 1
+            if kind == 'item':
+                self.items += 1
+            elif kind == 'dropped':
+                self.dropped += 1
+            else:
+                self.errors += 1
+        if time.time() - self._reported >= self.interval:
+            self.report()
+
+    def report(self):
+        self._reported = time.time()
+        elapsed = self._reported - self.started
+        self.stream.write(
+            'offset %d: %d pages, %d items, %d dropped, %d errors, '
+            '%.1f pages/s\n' % (
+                self.offset + self.pages, self.pages, self.items,
+                self.dropped, self.errors, self.pages / elapsed if elapsed
+                else 0))
+        self.stream.flush()
+
+
+def read_checkpoint(path):
+    """
+    :param str path: checkpoint file path
+    :return int: number of the pages done
+    """
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, offset):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write('%d\n' % offset)
+    os.replace(tmp_path, path)
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def reextract(item_path, paths, output, offset=0, workers=None,
+              executor='process', batch_size=64, checkpoint=None,
+              progress=None):
+    """Load the items of all the archived pages and write them as NDJSON.
+
+    Pages are processed in batches by the pool, results are written in
+    the archive order, so the checkpoint offset is always consistent
+    with the output.
+
+    :param str item_path: Item class import path
+    :param list paths: WARC files, html files and directories
+    :param output: text stream the NDJSON lines are written to
+    :param int offset: number of the first pages to skip
+    :param int workers: pool size, CPU count by default
+    :param str executor: "process" or "thread"
+    :param int batch_size: pages per pool task
+    :param str checkpoint: file the offset is saved to after each batch
+    :param Progress progress:
+    :return Progress: totals
+    """
+    load_object(item_path)  # fail early if it's not importable
+    workers = workers or os.cpu_count() or 1
+    executor_class = {'process': ProcessPoolExecutor,
+                      'thread': ThreadPoolExecutor}[executor]
+    progress = progress or Progress(offset)
+    encoder = ScrapyJSONEncoder(ensure_ascii=False)
+
+    records = iter_records(paths, skip=offset)
+
+    pending = deque()
+    with executor_class(workers) as pool:
+        for batch in _batches(records, batch_size):
+            pending.append(pool.submit(extract_batch, item_path, batch))
+            # keep every worker busy, but don't read the whole archive
+            if len(pending) >= workers * 2:
+                offset = _write(pending.popleft().result(), output, encoder,
+                                offset, checkpoint, progress)
+        while pending:
+            offset = _write(pending.popleft().result(), output, encoder,
+                            offset, checkpoint, progress)
+
+    progress.report()
+    return progress
+
+
+def _write(results, output, encoder, offset, checkpoint, progress):
+    for kind, url, value in results:
+        if kind == 'item':
+            output.write(encoder.encode({'url': url, 'item': value}) + '\n')
+        elif kind == 'dropped':
+            logger.debug('Dropped %s: %s', url, value)
+        else:
+            logger.warning('Failed %s: %s', url, value)
+    output.flush()
+    offset += len(results)
+    if checkpoint is not None:
+        write_checkpoint(checkpoint, offset)
+    progress.update(results)
+    return offset
@@ -0,0 +1,319 @@
+"""Rendering of the pages which static extraction fails on.
+
+The item is loaded from the plain response first, the request is sent
+to the rendering backend only when a required field is empty or the item
+is dropped::
+
+    class ProfileItem(Item):
+        name = fields.String('.name::text', required=True)
+
+    class ProfileSpider(scrapy.Spider):
+
+        @classmethod
+        def from_crawler(cls, crawler, *args, **kwargs):
+            spider = super().from_crawler(crawler, *args, **kwargs)
+            spider.render_on_miss = RenderOnMiss.from_crawler(crawler)
+            return spider
+
+        def parse(self, response):
+            yield self.render_on_miss.load(ProfileItem, response, self.parse)
+
+The static results are counted per domain, the domains which almost
+always need rendering are learned and their next requests are rendered
+at once by RenderingMiddleware, the static fetch is skipped::
+
+    SPIDER_MIDDLEWARES = {'crawlit.rendering.RenderingMiddleware': 800}
+    CRAWLIT_RENDERER = 'crawlit.rendering.SplashRenderer'
+    CRAWLIT_RENDER_MIN_ATTEMPTS = 5
+    CRAWLIT_RENDER_THRESHOLD = 0.9
+
+The next stats are collected per domain:
+
+    crawlit/render/<domain>/static_ok       static extraction succeeded
+    crawlit/render/<domain>/static_miss     static extraction failed
+    crawlit/render/<domain>/rendered        rendered responses loaded
+    crawlit/render/<domain>/rendered_miss   rendering didn't help
+    crawlit/render/<domain>/static_skipped  requests rendered at once
+"""
+import logging
+
+from scrapy.exceptions import DropItem
+from scrapy.http import Request
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import load_object
+
+
+logger = logging.getLogger(__name__)
+
+RENDERED_KEY = 'crawlit_rendered'
+
+
+def get_domain(request_or_response):
+    """
+    :param request_or_response: scrapy.http.Request or Response
+    :return str: host name
+    """
+    return (urlparse_cached(request_or_response).hostname or '').lower()
+
+
+def is_rendered(request):
+    """
+    :param scrapy.http.Request request:
+    :return bool: the request is sent to the rendering backend
+    """
+    return request is not None and bool(request.meta.get(RENDERED_KEY))
+
+
+class Renderer:
+    """Makes the request of the rendering backend out of a plain one."""
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls()
+
+    def make_request(self, request, callback=None):
+        """
+        :param scrapy.http.Request request: plain request
+        :param callable callback: callback of the rendered response
+        :return scrapy.http.Request:
+        """
+        raise NotImplementedError
+
+    def _get_meta(self, request):
+        return dict(request.meta, **{RENDERED_KEY: True})
+
+
+class SplashRenderer(Renderer):
+    """Renders with Splash through the scrapy-splash middlewares.
+
+    :param str endpoint: Splash endpoint
+    :param dict args: Splash arguments
+    """
+
+    def __init__(self, endpoint='render.html', args=None):
+        self.endpoint = endpoint
+        self.args = args or {'wait': 0.5}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(endpoint=settings.get('CRAWLIT_SPLASH_ENDPOINT',
+                                         'render.html'),
+                   args=settings.getdict('CRAWLIT_SPLASH_ARGS') or None)
+
+    def make_request(self, request, callback=None):
+        from scrapy_splash import SplashRequest
+        # the scrapy-splash middlewares pass the method, body, headers
+        # and cookies of the request on to Splash
+        return SplashRequest(
+            request.url, callback or request.callback, method=request.method,
+            endpoint=self.endpoint, args=dict(self.args),
+            meta=self._get_meta(request), headers=request.headers,
+            body=request.body, cookies=request.cookies,
+            encoding=request.encoding, priority=request.priority,
+            errback=request.errback, flags=request.flags, dont_filter=True)
+
+
+class MetaRenderer(Renderer):
+    """Marks the request for a rendering downloader middleware, i.e.
+    a Selenium one which renders the requests with some meta key.
+
+    :param dict meta: meta of the rendered requests
+    """
+
+    def __init__(self, meta=None):
+        self.meta = meta or {'selenium': True}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(meta=settings.getdict('CRAWLIT_RENDER_META') or None)
+
+    def make_request(self, request, callback=None):
+        meta = self._get_meta(request)
+        meta.update(self.meta)
+        return request.replace(callback=callback or request.callback,
+                               meta=meta, dont_filter=True)
+
+
+class DomainStats:
+    """Static extraction results of a domain.
+
+    :param int attempts: static extractions
+    :param int misses: failed static extractions
+    """
+    __slots__ = ('attempts', 'misses', 'skipped')
+
+    def __init__(self, attempts=0, misses=0):
+        self.attempts = attempts
+        self.misses = misses
+        self.skipped = 0
+
+    @property
+    def miss_rate(self):
+        return self.misses / self.attempts if self.attempts else 0.0
+
+
+class RenderOnMiss:
+    """Loads items statically and renders the pages on failure.
+
+    :param Renderer renderer:
+    :param int min_attempts: static extractions before a domain is learned
+    :param float threshold: miss rate of the domains rendered at once
+    :param int probe_every: every n-th request of a learned domain is
+                            still tried statically, 0 disables it
+    :param scrapy.statscollectors.StatsCollector stats:
+    """
+    stats_prefix = 'crawlit/render'
+
+    def __init__(self, renderer, min_attempts=5, threshold=0.9,
+                 probe_every=50, stats=None):
+        if not 0 < threshold <= 1:
+            raise ValueError('The "threshold" must be in (0, 1] range.')
+        self.renderer = renderer
+        self.min_attempts = min_attempts
+        self.threshold = threshold
+        self.probe_every = probe_every
+        self.stats = stats
+        self.domains = {}
+        self._required = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        renderer_class = load_object(settings.get(
+            'CRAWLIT_RENDERER', 'crawlit.rendering.SplashRenderer'))
+        return cls(
+            renderer_class.from_settings(settings),
+            min_attempts=settings.getint('CRAWLIT_RENDER_MIN_ATTEMPTS', 5),
+            threshold=settings.getfloat('CRAWLIT_RENDER_THRESHOLD', 0.9),
+            probe_every=settings.getint('CRAWLIT_RENDER_PROBE_EVERY', 50),
+            stats=crawler.stats)
+
+    def get_required(self, item_class):
+        """
+        :param type item_class: ItemABC subclass
+        :return tuple: names of the required fields
+        """
+        try:
+            return self._required[item_class]
+        except KeyError:
+            required = self._required[item_class] = tuple(
+                name for name, field in item_class.fields.items()
+                if getattr(field, 'required', False))
+            return required
+
+    def get_missing(self, item_class, item):
+        """
+        :param type item_class: ItemABC subclass
+        :param item: loaded item
+        :return list: names of the empty required fields
+        """
+        return [name for name in self.get_required(item_class)
+                if not item.get(name)]
+
+    def load(self, item_class, response, callback=None, **context):
+        """Load the item or get the request rendering the page.
+
+        :param type item_class: ItemABC subclass
+        :param scrapy.http.TextResponse response:
+        :param callable callback: callback of the rendered response
+        :param dict context: loader context
+        :return: item, scrapy.http.Request or None if the rendered page
+                 is dropped
+        """
+        request = response.request
+        domain = get_domain(response)
+        try:
+            item = item_class.load(response=response, **context)
+        except DropItem as e:
+            item, missing, error = None, True, e
+        else:
+            missing, error = self.get_missing(item_class, item), None
+
+        if is_rendered(request):
+            self._inc_stats(domain, 'rendered')
+            if missing:
+                self._inc_stats(domain, 'rendered_miss')
+                logger.warning('Rendered %s still fails: %s', response.url,
+                               error or 'empty %s' % ', '.join(missing))
+            return item
+
+        self.record(domain, bool(missing))
+        if not missing:
+            return item
+        logger.debug('Rendering %s: %s', response.url,
+                     error or 'empty %s' % ', '.join(missing))
+        if request is None:
+            request = Request(response.url)
+        return self.renderer.make_request(request, callback)
+
+    def record(self, domain, missed):
+        """Count a static extraction of the domain.
+
+        :param str domain:
+        :param bool missed: the extraction failed
+        """
+        stats = self.domains.get(domain)
+        if stats is None:
+            stats = self.domains[domain] = DomainStats()
+        learned = self.needs_rendering(domain)
+        stats.attempts += 1
+        stats.misses += missed
+        self._inc_stats(domain, 'static_miss' if missed else 'static_ok')
+        if not learned and self.needs_rendering(domain):
+            logger.info('Domain %s needs rendering, %d of %d static '
+                        'extractions failed', domain, stats.misses,
+                        stats.attempts)
+
+    def needs_rendering(self, domain):
+        """
+        :param str domain:
+        :return bool: the domain static extraction almost always fails
+        """
+        stats = self.domains.get(domain)
+        return stats is not None and stats.attempts >= self.min_attempts \
+            and stats.miss_rate >= self.threshold
+
+    def process_request(self, request):
+        """Render the request at once if its domain needs rendering.
+
+        :param scrapy.http.Request request:
+        :return scrapy.http.Request: the request or the rendering one
+        """
+        if is_rendered(request):
+            return request
+        domain = get_domain(request)
+        if not self.needs_rendering(domain):
+            return request
+        stats = self.domains[domain]
+        stats.skipped += 1
+        if self.probe_every and not stats.skipped % self.probe_every:
+            # the site may change, so it's checked statically sometimes
+            return request
+        self._inc_stats(domain, 'static_skipped')
+        return self.renderer.make_request(request)
+
+    def _inc_stats(self, domain, key):
+        if self.stats is not None:
+            self.stats.inc_value('%s/%s/%s' % (self.stats_prefix, domain,
+                                               key))
+
+
+class RenderingMiddleware:
+    """Spider middleware rendering the requests of the learned domains
+    at once, it uses the RenderOnMiss of the spider "render_on_miss"
+    attribute.
+    """
+
+    def process_start_requests(self, start_requests, spider):
+        return self._process(start_requests, spider)
+
+    def process_spider_output(self, response, result, spider):
+        return self._process(result, spider)
+
+    @staticmethod
+    def _process(result, spider):
+        render_on_miss = getattr(spider, 'render_on_miss', None)
+        for element in result:
+            if render_on_miss is not None and isinstance(element, Request):
+                element = render_on_miss.process_request(element)
+            yield element
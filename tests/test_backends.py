@@ -0,0 +1,149 @@
+import unittest
+
+from lxml import etree
+from scrapy.http import HtmlResponse, XmlResponse
+
+from crawlit import Item, fields
+from crawlit.backends import get_backend, to_unicode
+
+
+HTML_BODY = '''
+<html><body>
+<div class="profile">
+  <h1 class="name"> Jane &amp; John </h1>
+  <span class="age">Age: 42</span>
+  <span class="height">1,85 m</span>
+  <a class="phone" href="tel:+100">call</a>
+  <a class="phone" href="tel:+200">call <b>now</b></a>
+  <a class="email" href="mailto:jane@example.com">mail</a>
+  <p class="gender">f</p>
+  <p class="about">tv, microwave</p>
+  <p class="verified">yes</p>
+  <p class="bio">Hi <i>there</i>!</p>
+</div>
+</body></html>
+'''.encode('utf-8')
+
+XML_BODY = b'''<?xml version="1.0"?>
+<feed><entry id="1"><title>First</title><price>10</price></entry>
+<entry id="2"><title>Second</title><price>20</price></entry></feed>
+'''
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    age = fields.Integer('.age::text')
+    height = fields.Float('.height::text', delimiter=',')
+    phones = fields.String('.phone::attr(href)', multi_selector=True)
+    phone_texts = fields.String('.phone ::text', multi_selector=True)
+    email = fields.Email('//a[@class="email"]/@href')
+    gender = fields.String('.gender::text', choices={'m': 'male',
+                                                     'f': 'female'})
+    about = fields.String('.about::text', multi_choices=True,
+                          choices=('microwave', 'tv', 'shower'))
+    verified = fields.Boolean('.verified::text')
+    bio = fields.String('.bio')
+    has_phone = fields.String('//a[@class="phone"] and true()')
+
+
+class EntryItem(Item):
+    title = fields.String('entry title::text')
+    ids = fields.Integer('//entry/@id', multi_selector=True)
+    prices = fields.String('price::text', multi_selector=True)
+
+
+class BackendTestMixin:
+    backend = None
+
+    def setUp(self):
+        self.html_response = HtmlResponse('https://example.com/',
+                                          body=HTML_BODY, encoding='utf-8')
+        self.xml_response = XmlResponse('https://example.com/feed',
+                                        body=XML_BODY, encoding='utf-8')
+
+    def load(self, item_class, response):
+
+        class BackendItem(item_class):
+            backend = self.backend
+
+        return dict(BackendItem.load(response))
+
+    def test_html(self):
+        self.assertDictEqual({
+            'name': ['Jane & John'],
+            'age': [42],
+            'height': [1.85],
+            'phones': ['tel:+100', 'tel:+200'],
+            'phone_texts': ['call', 'call', 'now'],
+            'email': ['jane@example.com'],
+            'gender': ['female'],
+            'about': ['microwave', 'tv'],
+            'verified': [True],
+            'bio': ['<p class="bio">Hi <i>there</i>!</p>'],
+            'has_phone': ['1'],
+        }, self.load(ProfileItem, self.html_response))
+
+    def test_html_matches_item_loader(self):
+        self.assertDictEqual(
+            dict(ProfileItem.load_with_loader(self.html_response)),
+            self.load(ProfileItem, self.html_response))
+
+    def test_xml(self):
+        self.assertDictEqual({
+            'title': ['First'],
+            'ids': [12],
+            'prices': ['10', '20'],
+        }, self.load(EntryItem, self.xml_response))
+
+    def test_xml_matches_item_loader(self):
+        self.assertDictEqual(
+            dict(EntryItem.load_with_loader(self.xml_response)),
+            self.load(EntryItem, self.xml_response))
+
+    def test_load_many(self):
+
+        class RowItem(EntryItem):
+            backend = self.backend
+
+        items = RowItem.load_many(self.xml_response, container='entry')
+
+        self.assertListEqual(['First', 'Second'],
+                             [item['title'][0] for item in items])
+
+
+class ParselBackendTestCase(BackendTestMixin, unittest.TestCase):
+    backend = 'parsel'
+
+
+class LxmlBackendTestCase(BackendTestMixin, unittest.TestCase):
+    backend = 'lxml'
+
+    def test_xpath_is_compiled_once_per_field(self):
+        field = fields.String('//h1/text()')
+        xpath_object = field.compile_xpath('//h1/text()')
+
+        self.assertIsInstance(xpath_object, etree.XPath)
+        self.assertIs(xpath_object, field.compile_xpath('//h1/text()'))
+
+    def test_invalid_xpath_raises_error(self):
+        field = fields.String('//h1[')
+
+        with self.assertRaises(ValueError):
+            field.compile_xpath('//h1[')
+
+
+class BackendsTestCase(unittest.TestCase):
+
+    def test_unknown_backend_raises_error(self):
+        with self.assertRaises(ValueError):
+            get_backend('regexp')
+
+    def test_to_unicode(self):
+        self.assertEqual('1', to_unicode(True))
+        self.assertEqual('0', to_unicode(False))
+        self.assertEqual('2.0', to_unicode(2.0))
+        self.assertEqual('<b>x</b>', to_unicode(etree.fromstring('<b>x</b>')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import DropItem
+
+from crawlit import ExtractionCache, Item, fields
+from crawlit.cache import get_fingerprint, get_item_path
+
+
+BODY = b'''
+<html><body>
+<h1 class="name"> John </h1>
+<p class="age">42 years</p>
+<p class="gender">m</p>
+</body></html>
+'''
+
+
+def make_response(body=BODY, url='https://example.com/'):
+    return HtmlResponse(url, body=body, encoding='utf-8')
+
+
+def make_item_class(cache, **extra_fields):
+
+    class ProfileItem(Item):
+        extraction_cache = cache
+        name = fields.String('.name::text')
+        age = fields.Integer('.age::text')
+        locals().update(extra_fields)
+
+    return ProfileItem
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ExtractionCache()
+        self.item_class = make_item_class(self.cache)
+
+    def test_duplicate_page_is_not_parsed(self):
+        item = self.item_class.load(make_response())
+        response = make_response(url='https://example.com/?page=2')
+        cached = self.item_class.load(response)
+
+        self.assertDictEqual({'name': ['John'], 'age': [42]}, dict(item))
+        self.assertDictEqual(dict(item), dict(cached))
+        self.assertIsInstance(cached, self.item_class)
+        self.assertIsNone(response._cached_selector)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_cached_values_are_copied(self):
+        item = self.item_class.load(make_response())
+        item['name'].append('Smith')
+        cached = self.item_class.load(make_response())
+
+        self.assertEqual(['John'], cached['name'])
+
+    def test_whitespace_around_document_is_ignored(self):
+        self.item_class.load(make_response())
+        self.item_class.load(make_response(
+            b'\r\n  ' + BODY.replace(b'\n', b'\r\n') + b'\n'))
+
+        self.assertEqual(1, self.cache.hits)
+
+    def test_other_body_is_a_miss(self):
+        self.item_class.load(make_response())
+        item = self.item_class.load(make_response(
+            BODY.replace(b'42', b'43')))
+
+        self.assertEqual([43], item['age'])
+        self.assertEqual(0, self.cache.hits)
+
+    def test_item_classes_are_cached_separately(self):
+        other_class = make_item_class(
+            self.cache, gender=fields.String('.gender::text'))
+        self.item_class.load(make_response())
+        item = other_class.load(make_response())
+
+        self.assertEqual(['m'], item['gender'])
+        self.assertEqual(0, self.cache.hits)
+
+    def test_dropped_item_is_cached(self):
+        item_class = make_item_class(
+            self.cache, gender=fields.String('.name::text',
+                                             choices=('m', 'f')))
+        for _ in range(2):
+            with self.assertRaises(DropItem) as e:
+                item_class.load(make_response())
+            self.assertIn('invalid choice', str(e.exception))
+
+        self.assertEqual(1, self.cache.hits)
+
+    def test_loader_context_disables_cache(self):
+        self.item_class.load(make_response(), suffix='!')
+
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.misses)
+
+    def test_nested_selector_disables_cache(self):
+        item = self.item_class.load(make_response().css('body'))
+
+        self.assertEqual(['John'], item['name'])
+        self.assertEqual(0, len(self.cache))
+
+    def test_compact_item(self):
+        self.item_class.compact = True
+        self.item_class.load(make_response())
+        item = self.item_class.load(make_response())
+
+        self.assertIsInstance(item, self.item_class.get_compact_class())
+        self.assertEqual([42], item.age)
+
+    def test_size_eviction(self):
+        self.cache.max_size = 300
+        for age in range(10):
+            self.item_class.load(make_response(
+                BODY.replace(b'42', str(age).encode())))
+
+        self.assertLessEqual(self.cache.size, 300)
+        self.assertGreater(self.cache.evictions, 0)
+        self.assertLess(len(self.cache), 10)
+
+        # the last one is still in the cache
+        self.item_class.load(make_response(BODY.replace(b'42', b'9')))
+        self.assertEqual(1, self.cache.hits)
+
+
+class FingerprintTestCase(unittest.TestCase):
+
+    def test_item_path(self):
+        self.assertEqual('tests.test_cache.make_item_class.<locals>.'
+                         'ProfileItem', get_item_path(make_item_class(None)))
+
+    def test_same_definition(self):
+        self.assertEqual(get_fingerprint(make_item_class(None)),
+                         get_fingerprint(make_item_class(None)))
+
+    def test_changed_selector(self):
+        item_class = make_item_class(
+            None, age=fields.Integer('.years::text'))
+
+        self.assertNotEqual(get_fingerprint(make_item_class(None)),
+                            get_fingerprint(item_class))
+
+    def test_changed_parameters(self):
+        item_class = make_item_class(
+            None, name=fields.String('.name::text', upper=True))
+
+        self.assertNotEqual(get_fingerprint(make_item_class(None)),
+                            get_fingerprint(item_class))
+
+    def test_changed_processor_code(self):
+        first = make_item_class(
+            None, name=fields.String('.name::text', lambda v: v))
+        second = make_item_class(
+            None, name=fields.String('.name::text', lambda v: v[:1]))
+
+        self.assertNotEqual(get_fingerprint(first), get_fingerprint(second))
+
+
+class DiskTierTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'extraction.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_results_survive_restart(self):
+        cache = ExtractionCache(path=self.path)
+        make_item_class(cache).load(make_response())
+        cache.close()
+
+        cache = ExtractionCache(path=self.path)
+        response = make_response()
+        item = make_item_class(cache).load(response)
+        cache.close()
+
+        self.assertEqual([42], item['age'])
+        self.assertEqual(1, cache.hits)
+        self.assertIsNone(response._cached_selector)
+
+    def test_changed_fields_invalidate_results(self):
+        cache = ExtractionCache(path=self.path)
+        make_item_class(cache).load(make_response())
+        cache.close()
+
+        cache = ExtractionCache(path=self.path)
+        item_class = make_item_class(
+            cache, name=fields.String('.name::text', upper=True))
+        item = item_class.load(make_response())
+        rows = cache._db.execute('SELECT COUNT(*) FROM extraction').fetchone()
+        cache.close()
+
+        self.assertEqual(['JOHN'], item['name'])
+        self.assertEqual(0, cache.hits)
+        self.assertEqual((1,), rows)
+
+    def test_fingerprints_are_kept_apart(self):
+        first = ExtractionCache(path=self.path)
+        second = ExtractionCache(path=self.path)
+        first_class = make_item_class(first)
+        second_class = make_item_class(
+            second, name=fields.String('.name::text', upper=True))
+        response = make_response()
+        first_key = first.get_key(first_class, response)
+        second_key = second.get_key(second_class, response)
+        first_class.load(response)
+        second_class.load(response)
+
+        self.assertIsNotNone(first._get_from_disk(first_key))
+        self.assertIsNotNone(second._get_from_disk(second_key))
+        first.close()
+        second.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
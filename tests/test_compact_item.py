@@ -0,0 +1,151 @@
+import gc
+import pickle
+import unittest
+
+from scrapy.core.scraper import Scraper
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+from twisted.trial import unittest as trial_unittest
+
+from crawlit import Item, fields
+from crawlit.items import CompactItem
+
+
+BODY = b'''
+<ul>
+  <li class="row"><b class="name"> First </b><i class="rooms">2</i></li>
+  <li class="row"><b class="name"> Second </b></li>
+</ul>
+'''
+
+
+class FlatItem(Item):
+    compact = True
+
+    name = fields.String('.name::text')
+    rooms = fields.Integer('.rooms::text')
+    floor = fields.Integer('.floor::text', default=0)
+    keys = fields.String('.keys::text', multi_selector=True)
+
+
+class CollectPipeline:
+    items = []
+
+    def process_item(self, item, spider):
+        self.items.append(item)
+        return item
+
+
+class Spider:
+    name = 'flats'
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = HtmlResponse('https://example.com/', body=BODY,
+                                     encoding='utf-8')
+
+    def test_compact_class_is_built_once(self):
+        compact_class = FlatItem.get_compact_class()
+
+        self.assertTrue(issubclass(compact_class, CompactItem))
+        self.assertIs(compact_class, FlatItem.get_compact_class())
+        self.assertIs(FlatItem.fields, compact_class.fields)
+
+    def test_instance_has_no_dict(self):
+        item = FlatItem.get_compact_class()(name=['x'])
+
+        # BaseItem has the __dict__ slot, but the dict isn't allocated
+        self.assertFalse(any(isinstance(o, dict)
+                             for o in gc.get_referents(item)))
+        with self.assertRaises(AttributeError):
+            item.color = 'red'
+
+    def test_load_fills_compact_item(self):
+        item = FlatItem.load(self.response)
+
+        self.assertIsInstance(item, FlatItem.get_compact_class())
+        self.assertDictEqual({'name': ['First'], 'rooms': [2]}, dict(item))
+
+    def test_load_many_fills_compact_items(self):
+        items = FlatItem.load_many(self.response, container='li.row')
+
+        self.assertListEqual([{'name': ['First'], 'rooms': [2]},
+                              {'name': ['Second']}],
+                             [dict(item) for item in items])
+
+    def test_dot_notation_and_defaults(self):
+        item = FlatItem.get_compact_class()(name=['x'])
+        item.rooms = [3]
+
+        self.assertEqual(['x'], item.name)
+        self.assertEqual([3], item['rooms'])
+        self.assertEqual([0], item.floor)
+        self.assertEqual([], item['keys'] if 'keys' in item else [])
+        self.assertNotIn('floor', item)
+
+    def test_mapping_method_names_stay_methods(self):
+        item = FlatItem.get_compact_class()(keys=['a'])
+
+        self.assertEqual(['a'], item['keys'])
+        self.assertListEqual(['keys'], list(item.keys()))
+
+    def test_unknown_field_raises_error(self):
+        item = FlatItem.get_compact_class()()
+
+        with self.assertRaises(KeyError):
+            item['color'] = 'red'
+        with self.assertRaises(KeyError):
+            item['name']
+
+    def test_to_item(self):
+        item = FlatItem.get_compact_class()(name=['x']).to_item()
+
+        self.assertIsInstance(item, FlatItem)
+        self.assertEqual(['x'], item.name)
+
+    def test_pickle(self):
+        item = FlatItem.get_compact_class()(name=['x'], rooms=[1])
+        restored = pickle.loads(pickle.dumps(item))
+
+        self.assertIs(type(item), type(restored))
+        self.assertDictEqual(dict(item), dict(restored))
+
+    def test_no_reference_cycles(self):
+        gc.collect()
+        gc.disable()
+        try:
+            items = list(FlatItem.load_many(self.response,
+                                            container='li.row'))
+            del items
+            self.assertEqual(0, gc.collect())
+        finally:
+            gc.enable()
+
+
+class ScraperTestCase(trial_unittest.TestCase):
+
+    @defer.inlineCallbacks
+    def test_spider_output_reaches_pipelines(self):
+        crawler = get_crawler(settings_dict={'ITEM_PIPELINES': {
+            __name__ + '.CollectPipeline': 100}})
+        scraper = Scraper(crawler)
+        spider = Spider()
+        yield scraper.open_spider(spider)
+        response = HtmlResponse('https://example.com/', body=BODY,
+                                encoding='utf-8')
+        item = FlatItem.get_compact_class()(name=['First'])
+        CollectPipeline.items = []
+
+        with self.assertLogs('scrapy.core.scraper', 'DEBUG') as logs:
+            yield scraper._process_spidermw_output(item, response.request,
+                                                   response, spider)
+
+        self.assertEqual([item], CollectPipeline.items)
+        self.assertIn('Scraped from', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import gc
+import unittest
+
+from scrapy.http import HtmlResponse
+
+from crawlit import ExtractionContext, Item, fields
+
+
+BODY = b'''
+<html><body>
+<div class="profile">
+  <h1 class="name">John</h1>
+  <a class="email" href="mailto:john@example.com">mail</a>
+</div>
+<ul>
+  <li class="row"><b class="name">a</b></li>
+  <li class="row"><b class="name">b</b></li>
+</ul>
+</body></html>
+'''
+
+
+class ProfileItem(Item):
+    name = fields.String('.profile .name::text')
+    email = fields.Email('.profile .email::attr(href)')
+
+
+class ContactItem(Item):
+    name = fields.String('.profile .name::text')
+    emails = fields.String('.profile .email::attr(href)', multi_selector=True)
+
+
+class LxmlProfileItem(ProfileItem):
+    backend = 'lxml'
+
+
+class LxmlContactItem(ContactItem):
+    backend = 'lxml'
+
+
+class RowItem(Item):
+    name = fields.String('.name::text')
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = HtmlResponse('https://example.com/', body=BODY,
+                                     encoding='utf-8')
+
+    def test_results_are_shared_by_items(self):
+        with ExtractionContext() as extraction:
+            profile = ProfileItem.load(self.response,
+                                       extraction_context=extraction)
+            contact = ContactItem.load(self.response,
+                                       extraction_context=extraction)
+
+            self.assertEqual(3, extraction.misses)
+            self.assertEqual(1, extraction.hits)
+
+        self.assertDictEqual(dict(ProfileItem.load(self.response)),
+                             dict(profile))
+        self.assertDictEqual(dict(ContactItem.load(self.response)),
+                             dict(contact))
+
+    def test_lxml_results_are_shared_by_items(self):
+        with ExtractionContext() as extraction:
+            profile = LxmlProfileItem.load(self.response,
+                                           extraction_context=extraction)
+            contact = LxmlContactItem.load(self.response,
+                                           extraction_context=extraction)
+
+            self.assertEqual(3, extraction.misses)
+            self.assertEqual(1, extraction.hits)
+
+        self.assertDictEqual(dict(LxmlProfileItem.load(self.response)),
+                             dict(profile))
+        self.assertDictEqual(dict(LxmlContactItem.load(self.response)),
+                             dict(contact))
+
+    def test_close_releases_results(self):
+        extraction = ExtractionContext()
+        ProfileItem.load(self.response, extraction_context=extraction)
+        extraction.close()
+        ProfileItem.load(self.response, extraction_context=extraction)
+
+        self.assertEqual(0, extraction.hits)
+
+    def test_container_rows_are_shared(self):
+        extraction = ExtractionContext()
+        items = list(RowItem.load_many(self.response, container='li.row',
+                                       extraction_context=extraction))
+        items += RowItem.load_many(self.response, container='li.row',
+                                   extraction_context=extraction)
+
+        self.assertListEqual(['a', 'b', 'a', 'b'],
+                             [item['name'][0] for item in items])
+        self.assertEqual(3, extraction.misses)
+        self.assertEqual(3, extraction.hits)
+
+    def test_for_response(self):
+        extraction = ExtractionContext.for_response(self.response)
+
+        self.assertIs(extraction,
+                      ExtractionContext.for_response(self.response))
+
+        del self.response
+        gc.collect()
+
+        self.assertEqual(0, len(ExtractionContext._by_response))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import re
+import random
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+from dateutil import parser as dateutil_parser
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse
+from scrapy.loader.processors import TakeFirst, MapCompose, Join
+
+from crawlit import Item, fields
+from crawlit.fields import DateFormat
+
+
+class EventItem(Item):
+    starts = fields.DateTime('.starts::text')
+    day = fields.Date('.starts::text', tz='UTC')
+
+
+class TestCase(unittest.TestCase):
+
+    def test_datetime_processors_order(self):
+
+        def foo1(s):
+            return s
+
+        field = fields.DateTime('.value', foo1)
+
+        self.assertIsInstance(field.processors[0], TakeFirst)
+        self.assertIsInstance(field.processors[1], MapCompose)
+        self.assertIsInstance(field.processors[2], Join)
+        self.assertEqual(' ', field.processors[2].separator)
+        self.assertEqual(field.processors[3], field._to_datetime)
+        self.assertListEqual([foo1], field.processors[4:])
+
+    def test_learned_format(self):
+        field = fields.DateTime('.value')
+
+        self.assertEqual(datetime(2020, 5, 1, 10, 30),
+                         field._to_datetime('2020-05-01 10:30'))
+        self.assertEqual(['%Y-%m-%d %H:%M'],
+                         [f.format for f in field._date_formats])
+        self.assertEqual(datetime(2021, 1, 2, 3, 4),
+                         field._to_datetime('2021-01-02 03:04'))
+        self.assertEqual(1, len(field._date_formats))
+
+    def test_day_and_month_order(self):
+        field = fields.DateTime('.value')
+        field._to_datetime('13/04/2020')
+
+        self.assertEqual([], field._date_formats)
+        self.assertEqual(datetime(2020, 5, 4), field._to_datetime('05/04/2020'))
+
+        field = fields.DateTime('.value', dayfirst=True)
+        field._to_datetime('13/04/2020')
+
+        self.assertEqual(['%d/%m/%Y'], [f.format for f in field._date_formats])
+        self.assertEqual(datetime(2020, 4, 5), field._to_datetime('05/04/2020'))
+
+    def test_given_formats_go_first(self):
+        field = fields.DateTime('.value', formats=('%d/%m/%Y',))
+
+        self.assertEqual(datetime(2020, 4, 3), field._to_datetime('03/04/2020'))
+        self.assertEqual(1, len(field._date_formats))
+
+    def test_max_formats(self):
+        field = fields.DateTime('.value', max_formats=1)
+        field._to_datetime('2020-05-01')
+        field._to_datetime('May 1, 2020')
+
+        self.assertEqual(['%Y-%m-%d'], [f.format for f in field._date_formats])
+        self.assertEqual(datetime(2020, 5, 2),
+                         field._to_datetime('May 2, 2020'))
+
+    def test_same_as_dateutil(self):
+        rnd = random.Random(0)
+        field = fields.DateTime('.value', max_formats=100)
+        formats = [f for f in fields.DateTime.candidate_formats
+                   if '%z' not in f]
+        for _ in range(5000):
+            value = datetime(rnd.randint(1950, 2050), rnd.randint(1, 12),
+                             rnd.randint(1, 28), rnd.randint(0, 23),
+                             rnd.randint(0, 59), rnd.randint(0, 59),
+                             rnd.randint(0, 999999))
+            text = value.strftime(rnd.choice(formats))
+            self.assertEqual(dateutil_parser.parse(text),
+                             field._to_datetime(text), text)
+
+    def test_learned_formats_conform_to_dateutil(self):
+        rnd = random.Random(0)
+        values = []
+        for _ in range(2000):
+            value = datetime(rnd.choice([rnd.randint(1, 99),
+                                         rnd.randint(100, 999),
+                                         rnd.randint(1950, 2050)]),
+                             rnd.randint(1, 12), rnd.randint(1, 28),
+                             rnd.randint(0, 23), rnd.randint(0, 59),
+                             rnd.randint(0, 59), rnd.randint(0, 999999))
+            date_format = rnd.choice(fields.DateTime.candidate_formats)
+            text = value.strftime(date_format.replace(
+                '%Y', '%04d' % value.year).replace('%z', '+0200'))
+            mutation = rnd.randrange(4)
+            if mutation == 0:
+                text = re.sub(r'\b0(\d)', r'\1', text)
+            elif mutation == 1:
+                text = text.upper()
+            elif mutation == 2:
+                idx = rnd.randrange(len(text))
+                text = text[:idx] + text[idx + 1:]
+            values.append(text)
+        values.extend(('20120103', '201213', '2020115', '2021015',
+                       '05 March 2012', '05 MARCH 0005', '2012/05/22',
+                       '0005/02/5'))
+
+        for dayfirst in (False, True):
+            for yearfirst in (False, True):
+                field = fields.DateTime('.value', dayfirst=dayfirst,
+                                        yearfirst=yearfirst, max_formats=100)
+                for text in values:
+                    try:
+                        expected = dateutil_parser.parse(
+                            text, dayfirst=dayfirst, yearfirst=yearfirst)
+                    except (ValueError, OverflowError):
+                        expected = None
+                    self.assertEqual(expected, field.parse(text),
+                                     (text, dayfirst, yearfirst))
+
+    def test_adjacent_numbers(self):
+        date_format = DateFormat('%Y%m%d')
+
+        self.assertEqual(datetime(2012, 1, 3), date_format.parse('20120103'))
+        for value in ('201213', '2020115', '2021015'):
+            self.assertIsNone(date_format.parse(value))
+
+    def test_timezone(self):
+        field = fields.DateTime('.value', tz='Europe/Berlin')
+
+        result = field._to_datetime('2020-05-01T22:30:00Z')
+        self.assertEqual((2020, 5, 2, 0, 30), result.timetuple()[:5])
+        self.assertEqual(timedelta(hours=2), result.utcoffset())
+
+        result = field._to_datetime('2020-05-01 22:30')
+        self.assertEqual(timedelta(hours=2), result.utcoffset())
+
+    def test_offset(self):
+        field = fields.DateTime('.value')
+        expected = datetime(2020, 5, 1, 10, 0, 0, 500000,
+                            timezone(-timedelta(hours=5, minutes=30)))
+        for _ in range(2):
+            result = field._to_datetime('2020-05-01T10:00:00.5-05:30')
+            self.assertEqual(expected, result)
+            self.assertIsInstance(result.tzinfo, timezone)
+
+    def test_unknown_timezone(self):
+        with self.assertRaises(ValueError):
+            fields.DateTime('.value', tz='Nowhere/Nothing')
+
+    def test_default_value(self):
+        field = fields.Date('.value', default=date(2000, 1, 1))
+
+        self.assertEqual(date(2000, 1, 1), field._to_datetime(''))
+
+    def test_invalid_value_raises_error(self):
+        field = fields.Date('.value')
+        field.name = 'date_field'
+
+        with self.assertRaises(DropItem) as err_ctx:
+            field._to_datetime('hello')
+
+        self.assertEqual('"date_field": date expected, not "hello"',
+                         err_ctx.exception.args[0])
+
+    def test_invalid_learned_value(self):
+        field = fields.DateTime('.value')
+        field.name = 'datetime_field'
+        field._to_datetime('2020-05-01')
+
+        with self.assertRaises(DropItem):
+            field._to_datetime('2020-13-01')
+
+    def test_date_format(self):
+        date_format = DateFormat('%d %B %Y, %H:%M')
+
+        self.assertEqual(datetime(2020, 3, 7, 9, 5),
+                         date_format.parse('7  march 2020, 09:05'))
+        self.assertIsNone(date_format.parse('7 march 2020'))
+        self.assertIsNone(DateFormat('%I %p').regexp)
+        self.assertEqual(datetime(1900, 1, 1, 21),
+                         DateFormat('%I %p').parse('09 PM'))
+
+    def test_load(self):
+        body = b'<p class="starts"> 1 May 2020, 10:15 </p>'
+        response = HtmlResponse('https://example.com/', body=body,
+                                encoding='utf-8')
+        item = EventItem.load(response)
+
+        self.assertEqual([datetime(2020, 5, 1, 10, 15)], item['starts'])
+        self.assertEqual([date(2020, 5, 1)], item['day'])
+
+    def test_not_stripped(self):
+
+        class RawEventItem(Item):
+            starts = fields.DateTime('.starts::text', strip=False)
+            day = fields.Date('.starts::text', strip=False)
+
+        body = b'<p class="starts">2012-01-03</p>'
+        response = HtmlResponse('https://example.com/', body=body,
+                                encoding='utf-8')
+        expected = {'starts': [datetime(2012, 1, 3)],
+                    'day': [date(2012, 1, 3)]}
+
+        self.assertEqual(expected, dict(RawEventItem.load(response)))
+        self.assertEqual(expected,
+                         dict(RawEventItem.load_with_loader(response)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.test import get_crawler
+
+from crawlit import Item, fields
+from crawlit.dedup import BloomFilter, DedupPipeline, ScalableBloomFilter
+
+
+class ProfileItem(Item):
+    key_fields = ('first_name', 'last_name')
+    first_name = fields.String('.first-name::text')
+    last_name = fields.String('.last-name::text')
+    url = fields.String('a::attr(href)')
+
+
+class AuthorItem(Item):
+    key_fields = ('first_name', 'last_name')
+    first_name = fields.String('.author .first-name::text')
+    last_name = fields.String('.author .last-name::text')
+
+
+class NoKeyItem(Item):
+    name = fields.String('.name::text')
+
+
+class Spider:
+    name = 'profiles'
+
+
+def keys(start, stop):
+    return [b'key-%d' % idx for idx in range(start, stop)]
+
+
+class BloomFilterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'bloom')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_size(self):
+        self.assertEqual((9592, 7), BloomFilter.get_size(1000, 0.01))
+        with self.assertRaises(ValueError):
+            BloomFilter.get_size(1000, 1)
+
+    def test_add(self):
+        bloom_filter = ScalableBloomFilter(self.path, capacity=1000)
+
+        self.assertFalse(bloom_filter.add(b'a'))
+        self.assertTrue(bloom_filter.add(b'a'))
+        self.assertIn(b'a', bloom_filter)
+        self.assertNotIn(b'b', bloom_filter)
+        self.assertEqual(1, len(bloom_filter))
+        bloom_filter.close()
+
+    def test_growth_and_error_rate(self):
+        bloom_filter = ScalableBloomFilter(self.path, capacity=500,
+                                           error_rate=0.01)
+        for key in keys(0, 5000):
+            bloom_filter.add(key)
+
+        self.assertGreater(len(bloom_filter.filters), 3)
+        self.assertTrue(all(key in bloom_filter for key in keys(0, 5000)))
+        false_positives = sum(key in bloom_filter
+                              for key in keys(5000, 25000))
+        self.assertLess(false_positives / 20000, 0.01)
+        self.assertLess(bloom_filter.estimate_error_rate(), 0.01)
+        self.assertGreater(bloom_filter.estimate_error_rate(), 0)
+        self.assertEqual(sum(os.path.getsize(f.path)
+                             for f in bloom_filter.filters),
+                         bloom_filter.nbytes)
+        bloom_filter.close()
+
+    def test_persistence(self):
+        bloom_filter = ScalableBloomFilter(self.path, capacity=100)
+        for key in keys(0, 400):
+            bloom_filter.add(key)
+        bloom_filter.close()
+
+        bloom_filter = ScalableBloomFilter(self.path, capacity=10 ** 6)
+
+        self.assertEqual(100, bloom_filter.filters[0].capacity)
+        self.assertEqual(3, len(bloom_filter.filters))
+        self.assertTrue(all(key in bloom_filter for key in keys(0, 400)))
+        bloom_filter.close()
+        self.assertEqual(['bloom.0', 'bloom.1', 'bloom.2'],
+                         sorted(os.listdir(self.tmp_dir)))
+
+    def test_shared(self):
+        first = ScalableBloomFilter(self.path, capacity=100)
+        second = ScalableBloomFilter(self.path, capacity=100)
+        for key in keys(0, 150):
+            first.add(key)
+
+        self.assertTrue(second.add(b'key-149'))
+        self.assertFalse(second.add(b'key-150'))
+        self.assertTrue(first.add(b'key-150'))
+        self.assertEqual(2, len(second.filters))
+        self.assertEqual(151, len(first))
+        first.close()
+        second.close()
+
+    def test_not_a_filter(self):
+        with open(self.path + '.0', 'wb') as f:
+            f.write(b'x' * 100)
+
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter(self.path)
+
+
+class DedupPipelineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.crawler = get_crawler(settings_dict={
+            'CRAWLIT_DEDUP_PATH': os.path.join(self.tmp_dir, '%(spider)s'),
+            'CRAWLIT_DEDUP_CAPACITY': 100,
+        })
+        self.spider = Spider()
+        self.pipeline = DedupPipeline.from_crawler(self.crawler)
+        self.pipeline.open_spider(self.spider)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_stats(self, key):
+        return self.crawler.stats.get_value('crawlit/dedup/' + key)
+
+    def test_duplicates_are_dropped(self):
+        item = ProfileItem(first_name=['John'], last_name=['Smith'],
+                           url=['/1'])
+        same = ProfileItem(first_name=['John'], last_name=['Smith'],
+                           url=['/2'])
+        compact = ProfileItem.get_compact_class()(same)
+        other = ProfileItem(first_name=['John'], last_name=['Doe'])
+        no_key = NoKeyItem(name=['John'])
+
+        self.assertIs(item, self.pipeline.process_item(item, self.spider))
+        for duplicate in (same, compact):
+            with self.assertRaises(DropItem):
+                self.pipeline.process_item(duplicate, self.spider)
+        self.assertIs(other, self.pipeline.process_item(other, self.spider))
+        for _ in range(2):
+            self.assertIs(no_key,
+                          self.pipeline.process_item(no_key, self.spider))
+
+        self.pipeline.close_spider(self.spider)
+
+        self.assertEqual(2, self.get_stats('unique'))
+        self.assertEqual(2, self.get_stats('duplicates'))
+        self.assertEqual(2, self.get_stats('keys'))
+        self.assertEqual(os.path.getsize(os.path.join(
+            self.tmp_dir, 'profiles.0')), self.get_stats('bytes'))
+        self.assertLess(self.get_stats('error_rate'), 1e-6)
+
+    def test_item_classes_are_distinct(self):
+        values = {'first_name': ['John'], 'last_name': ['Smith']}
+        profile = ProfileItem(values)
+        author = AuthorItem(values)
+
+        self.assertIs(profile, self.pipeline.process_item(profile,
+                                                          self.spider))
+        self.assertIs(author, self.pipeline.process_item(author, self.spider))
+        self.pipeline.close_spider(self.spider)
+
+        self.assertEqual(2, self.get_stats('unique'))
+        self.assertIsNone(self.get_stats('duplicates'))
+
+    def test_next_run(self):
+        item = ProfileItem(first_name=['John'], last_name=['Smith'])
+        self.pipeline.process_item(item, self.spider)
+        self.pipeline.close_spider(self.spider)
+
+        pipeline = DedupPipeline.from_crawler(self.crawler)
+        pipeline.open_spider(self.spider)
+        with self.assertRaises(DropItem):
+            pipeline.process_item(item, self.spider)
+        pipeline.close_spider(self.spider)
+
+    def test_not_configured(self):
+        self.pipeline.close_spider(self.spider)
+        with self.assertRaises(NotConfigured):
+            DedupPipeline.from_crawler(get_crawler())
+
+
+if __name__ == '__main__':
+    unittest.main()
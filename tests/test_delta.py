@@ -0,0 +1,194 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from scrapy.http import Request
+from scrapy.utils.test import get_crawler
+
+from crawlit import Item, fields
+from crawlit.delta import (
+    CHANGED, NEW, UNCHANGED, DeltaMiddleware, FingerprintStore, hash_item)
+
+
+class ProfileItem(Item):
+    key_fields = ('url',)
+    url = fields.String('a::attr(href)')
+    name = fields.String('.name::text')
+
+
+class CompanyItem(Item):
+    key_fields = ('url',)
+    url = fields.String('a::attr(href)')
+    name = fields.String('.company::text')
+
+
+class NoKeyItem(Item):
+    name = fields.String('.name::text')
+
+
+class Spider:
+    name = 'profiles'
+
+
+class FingerprintStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'store')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_check(self):
+        store = FingerprintStore(self.path, capacity=16)
+
+        self.assertEqual(NEW, store.check(b'a', 1))
+        self.assertEqual(UNCHANGED, store.check(b'a', 1))
+        self.assertEqual(CHANGED, store.check(b'a', 2))
+        self.assertEqual(UNCHANGED, store.check(b'a', 2))
+        self.assertEqual(NEW, store.check(b'b', 2))
+        self.assertEqual(2, len(store))
+        self.assertIsNone(store.get(b'c'))
+        store.close()
+
+    def test_persistence(self):
+        store = FingerprintStore(self.path)
+        store.start_generation()
+        store.check(b'a', 1)
+        store.close()
+
+        store = FingerprintStore(self.path)
+
+        self.assertEqual(1, len(store))
+        self.assertEqual((1, 1), store.get(b'a'))
+        self.assertEqual(2, store.start_generation())
+        store.close()
+
+    def test_growth(self):
+        store = FingerprintStore(self.path, capacity=8)
+        keys = [str(idx).encode() for idx in range(1000)]
+        for idx, key in enumerate(keys):
+            self.assertEqual(NEW, store.check(key, idx))
+
+        self.assertEqual(1000, len(store))
+        self.assertGreaterEqual(store.capacity * store.max_load, 1000)
+        for idx, key in enumerate(keys):
+            self.assertEqual(UNCHANGED, store.check(key, idx))
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+        store.close()
+
+    def test_compact(self):
+        store = FingerprintStore(self.path, capacity=1024)
+        store.start_generation()
+        for key in (b'a', b'b', b'c'):
+            store.check(key, 1)
+        store.start_generation()
+        store.check(b'a', 1)
+        store.start_generation()
+        store.check(b'b', 1)
+
+        self.assertEqual(1, store.compact(max_age=2))
+        self.assertEqual(2, len(store))
+        self.assertIsNone(store.get(b'c'))
+        self.assertEqual((1, 3), store.get(b'b'))
+        self.assertLess(store.capacity, 1024)
+        store.close()
+
+    def test_not_a_store(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 100)
+
+        with self.assertRaises(ValueError):
+            FingerprintStore(self.path)
+
+
+class DeltaMiddlewareTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.crawler = get_crawler(settings_dict={
+            'CRAWLIT_DELTA_PATH': os.path.join(self.tmp_dir, '%(spider)s'),
+            'CRAWLIT_DELTA_CAPACITY': 64,
+            'CRAWLIT_DELTA_MAX_AGE': 2,
+        })
+        self.spider = Spider()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def crawl(self, *items):
+        middleware = DeltaMiddleware.from_crawler(self.crawler)
+        middleware.spider_opened(self.spider)
+        output = list(middleware.process_spider_output(None, items,
+                                                       self.spider))
+        middleware.spider_closed(self.spider)
+        return output
+
+    def get_stats(self, key):
+        return self.crawler.stats.get_value('crawlit/delta/' + key)
+
+    def test_unchanged_items_are_dropped(self):
+        first = ProfileItem(url=['/1'], name=['John'])
+        second = ProfileItem(url=['/2'], name=['Mary'])
+        request = Request('https://a.com/')
+        no_key = NoKeyItem(name=['John'])
+
+        self.assertEqual([first, second, request],
+                         self.crawl(first, second, request))
+
+        changed = ProfileItem(url=['/2'], name=['Mary Ann'])
+        output = self.crawl(ProfileItem(first), changed, no_key, request)
+
+        self.assertEqual([changed, no_key, request], output)
+        self.assertEqual(2, self.get_stats('new'))
+        self.assertEqual(1, self.get_stats('changed'))
+        self.assertEqual(1, self.get_stats('unchanged'))
+        self.assertEqual(2, self.get_stats('keys'))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir,
+                                                    'profiles')))
+
+    def test_item_classes_are_distinct(self):
+        profile = ProfileItem(url=['/1'], name=['John'])
+        company = CompanyItem(url=['/1'], name=['John'])
+        self.crawl(profile)
+
+        self.assertEqual([company], self.crawl(company))
+        self.assertEqual(2, self.get_stats('new'))
+        self.assertIsNone(self.get_stats('unchanged'))
+
+    def test_compact_item(self):
+        compact_class = ProfileItem.get_compact_class()
+        item = ProfileItem(url=['/1'], name=['John'])
+        self.crawl(item)
+
+        self.assertEqual([], self.crawl(compact_class(item)))
+
+    def test_expired_keys(self):
+        self.crawl(ProfileItem(url=['/1']), ProfileItem(url=['/2']))
+        self.crawl(ProfileItem(url=['/1']))
+        self.crawl(ProfileItem(url=['/1']))
+
+        self.assertEqual(1, self.get_stats('expired'))
+        self.assertEqual(
+            [ProfileItem(url=['/2'])], self.crawl(ProfileItem(url=['/2'])))
+
+    def test_not_configured(self):
+        from scrapy.exceptions import NotConfigured
+
+        with self.assertRaises(NotConfigured):
+            DeltaMiddleware.from_crawler(get_crawler())
+
+    def test_make_key(self):
+        item = ProfileItem(url=['/1'], name=['John'])
+
+        self.assertEqual(b'["tests.test_delta.ProfileItem", ["/1"]]',
+                         ProfileItem.make_key(item))
+        self.assertEqual(hash_item(item), hash_item(
+            ProfileItem(name=['John'], url=['/1'])))
+        with self.assertRaises(ValueError):
+            NoKeyItem.make_key(NoKeyItem())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import unittest
+
+from celery import Celery
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import DropItem
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from crawlit import Item, fields
+from crawlit import distributed
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    gender = fields.String('.gender::text', choices=('m', 'f'))
+
+
+class Spider:
+    name = 'profiles'
+
+
+class CollectPipeline:
+    items = []
+    opened = []
+    closed = []
+
+    def open_spider(self, spider):
+        self.opened.append(spider.name)
+
+    def process_item(self, item, spider):
+        if item.get('name') == ['Bot']:
+            raise DropItem('bot')
+        self.items.append(item)
+        return item
+
+    def close_spider(self, spider):
+        self.closed.append(spider.name)
+
+
+class Publisher(distributed.ResponsePublisher):
+    """Publisher sending the batches in the test thread."""
+
+    def _call_in_thread(self, function, *args):
+        return defer.maybeDeferred(function, *args)
+
+
+def make_response(name, gender='m', url='https://example.com/'):
+    body = ('<html><body><h1 class="name">%s</h1>'
+            '<p class="gender">%s</p></body></html>' % (name, gender))
+    return HtmlResponse(url, body=body.encode('utf-8'), encoding='utf-8')
+
+
+class TestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = Celery('tests', broker='memory://',
+                         backend='cache+memory://', set_as_current=True)
+        cls.app.conf.task_always_eager = True
+
+    def setUp(self):
+        CollectPipeline.items = []
+        CollectPipeline.opened = []
+        CollectPipeline.closed = []
+        self.worker = distributed.configure_worker({
+            'CRAWLIT_WORKER_PIPELINES': {
+                'tests.test_distributed.CollectPipeline': 100},
+        })
+        self.crawler = get_crawler(settings_dict={
+            'CRAWLIT_DISTRIBUTED_BATCH_SIZE': 2})
+        self.publisher = Publisher.from_crawler(self.crawler)
+        self.spider = Spider()
+
+    def tearDown(self):
+        distributed.close_worker()
+
+    def test_pack_batch(self):
+        records = [distributed.make_record(ProfileItem, make_response(name))
+                   for name in ('John', 'Jane')]
+        message = distributed.pack_batch(records)
+
+        self.assertIsInstance(message, str)
+        self.assertEqual(records, distributed.unpack_batch(message))
+
+    def test_local_item_class(self):
+
+        class LocalItem(Item):
+            name = fields.String('.name::text')
+
+        self.assertEqual('tests.test_distributed.ProfileItem',
+                         distributed.make_record(
+                             ProfileItem, make_response('J'))['item'])
+        with self.assertRaises(ValueError):
+            distributed.make_record(LocalItem, make_response('J'))
+
+    def test_batch_is_compressed(self):
+        records = [distributed.make_record(ProfileItem, make_response('J'))
+                   for _ in range(20)]
+        message = distributed.pack_batch(records)
+
+        self.assertLess(len(message),
+                        sum(len(record['body']) for record in records))
+
+    def test_worker_loads_items(self):
+        for name in ('John', 'Jane', 'Max'):
+            self.publisher.publish(ProfileItem, make_response(name),
+                                   self.spider)
+
+        # the last response waits for a full batch or the spider close
+        self.assertEqual([['John'], ['Jane']],
+                         [item['name'] for item in CollectPipeline.items])
+        self.assertIsInstance(CollectPipeline.items[0], ProfileItem)
+
+        self.publisher.spider_closed(self.spider)
+
+        self.assertEqual(3, len(CollectPipeline.items))
+        self.assertEqual(['profiles'], CollectPipeline.opened)
+        self.assertEqual(2, self.crawler.stats.get_value(
+            'crawlit/distributed/batches'))
+        self.assertEqual(3, self.crawler.stats.get_value(
+            'crawlit/distributed/responses'))
+
+    def test_batches_are_flushed_by_timer(self):
+        self.publisher.spider_opened(self.spider)
+        self.assertTrue(self.publisher._flush_loop.running)
+        self.assertEqual(5.0, self.publisher._flush_loop.interval)
+
+        self.publisher.publish(ProfileItem, make_response('John'),
+                               self.spider)
+        self.assertEqual([], CollectPipeline.items)
+        self.publisher._flush_loop.f()
+
+        self.assertEqual(1, len(CollectPipeline.items))
+        self.publisher.spider_closed(self.spider)
+        self.assertFalse(self.publisher._flush_loop.running)
+
+    def test_send_errors_are_counted(self):
+
+        class FailingTask:
+
+            def apply_async(self, args, queue=None):
+                raise ConnectionError('broker is down')
+
+        self.publisher.task = FailingTask()
+        self.publisher.publish(ProfileItem, make_response('John'),
+                               self.spider)
+        d = self.publisher.spider_closed(self.spider)
+
+        self.assertTrue(d.called)
+        self.assertEqual(1, self.crawler.stats.get_value(
+            'crawlit/distributed/errors'))
+
+    def test_task_counts_dropped_items(self):
+        message = distributed.pack_batch([
+            distributed.make_record(ProfileItem, make_response(name, gender))
+            for name, gender in (('John', 'm'), ('Jane', 'x'), ('Bot', 'm'))])
+        result = distributed.extract_batch.delay('profiles', message)
+
+        self.assertEqual({'items': 1, 'dropped': 2, 'errors': 0},
+                         result.get())
+
+    def test_errors_are_counted(self):
+        record = distributed.make_record(ProfileItem, make_response('John'))
+        record['item'] = 'tests.test_distributed.MissingItem'
+        counts = self.worker.process('profiles', [record])
+
+        self.assertEqual({'items': 0, 'dropped': 0, 'errors': 1}, counts)
+
+    def test_item_classes_are_imported_once(self):
+        records = [distributed.make_record(ProfileItem, make_response(name))
+                   for name in ('John', 'Jane')]
+        self.worker.process('profiles', records)
+
+        self.assertIs(ProfileItem, self.worker.item_classes[
+            'tests.test_distributed.ProfileItem'])
+
+    def test_close_worker_closes_pipelines(self):
+        self.worker.process('profiles', [
+            distributed.make_record(ProfileItem, make_response('John'))])
+        distributed.close_worker()
+
+        self.assertEqual(['profiles'], CollectPipeline.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
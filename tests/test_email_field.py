@@ -0,0 +1,119 @@
+import re
+import random
+import unittest
+
+from scrapy.http import HtmlResponse
+
+from crawlit import Item, fields
+from crawlit.fields import EmailMatcher
+
+
+CORPUS = (
+    'john@example.com',
+    'mailto:john.smith@mail.example.co.uk',
+    'write to john at example dot com please',
+    'john at example.com',
+    'john@example dot com',
+    'John@Example.com',
+    'ohn@example.com and jane@example.org',
+    'no emails here',
+    'broken@ address',
+    'broken@example',
+    'dots..in@example.com',
+    '.starts.with.dot@example.com',
+    'ends.with.dot.@example.com',
+    'a@b.c',
+    "o'hara+tag@sub-domain.example.com",
+    'x@-bad.com x@good-.com x@go-od.com',
+    'user@@example.com',
+    'at at at example dot com',
+    'a at at b.com',
+    'tab\tat\texample\tdot\tcom',
+    'non\xa0breaking\xa0at\xa0example\xa0dot\xa0com',
+    'émile@example.com',
+    '<a href="mailto:info@example.com">info@example.com</a>',
+    'phone: 123, email: sales@shop.example.com.',
+)
+
+TOKENS = ('a', 'b', 'x9', 'Z', '.', '..', '@', '@@', ' at ', ' at',
+          ' dot ', '-', '_', '+', ' ', '\t', '\xa0', 'é', 'com', 'ex-ample',
+          '.com', 'john.smith', 'a-', '-a', '!', '(', '<', 'mailto:', ',',
+          '\n', 'at', 'dot', 'q@w', 'e.e')
+
+
+def random_corpus(size, seed=0):
+    rnd = random.Random(seed)
+    for _ in range(size):
+        yield ''.join(rnd.choice(TOKENS) for _ in range(rnd.randint(0, 25)))
+
+
+class ProfileItem(Item):
+    email = fields.Email('.contact::text')
+    emails = fields.Email('.contact::text', multi_selector=True)
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.regexp = re.compile(fields.Email.default_regexp, re.UNICODE)
+        self.matcher = fields.Email('a').re
+
+    def assertSameMatches(self, text):
+        expected = self.regexp.search(text)
+        found = self.matcher.search(text)
+        if expected is None:
+            self.assertIsNone(found, text)
+        else:
+            self.assertEqual((expected.span(), expected.groups()),
+                             (found.span(), found.groups()), text)
+        self.assertEqual(self.regexp.findall(text),
+                         self.matcher.findall(text), text)
+
+    def test_default_regexp_is_prefiltered(self):
+        self.assertIsInstance(self.matcher, EmailMatcher)
+        self.assertIs(self.matcher, fields.Email('b').re)
+        self.assertEqual(fields.Email.default_regexp, self.matcher.pattern)
+        self.assertIn('extract', self.matcher.groupindex)
+
+    def test_custom_regexp_is_kept(self):
+        field = fields.Email('a', regexp=r'\S+@\S+')
+
+        self.assertEqual(r'\S+@\S+', field.re.pattern)
+
+    def test_conformance_corpus(self):
+        for text in CORPUS:
+            self.assertSameMatches(text)
+
+    def test_random_corpus(self):
+        for text in random_corpus(5000):
+            self.assertSameMatches(text)
+
+    def test_search_bounds(self):
+        text = 'a@b.com c@d.com'
+
+        self.assertEqual('c@d.com', self.matcher.search(text, 1).group())
+        self.assertEqual('a@b.c', self.matcher.search(text, 0, 5).group())
+        self.assertIsNone(self.matcher.search(text, 9))
+
+    def test_long_text_without_emails(self):
+        text = 'a' * 100000 + '@' + 'b' * 100000
+
+        self.assertIsNone(self.matcher.search(text))
+
+    def test_load(self):
+        body = ('<p class="contact">call 123</p>'
+                '<p class="contact">write to john at example dot com</p>'
+                '<p class="contact">or mailto:jane@example.com</p>')
+        response = HtmlResponse('https://example.com/', body=body,
+                                encoding='utf-8')
+        item = ProfileItem.load(response)
+
+        self.assertDictEqual(dict(ProfileItem.load_with_loader(response)),
+                             dict(item))
+        self.assertEqual(['john at example dot com'], item['email'])
+        self.assertEqual(['john at example dot com', 'jane@example.com'],
+                         item['emails'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+import csv
+import gzip
+import io
+import json
+import unittest
+from datetime import date, datetime, timezone
+
+from crawlit import Item, fields
+from crawlit.exporters import (
+    BooleanColumn, ColumnBatch, CsvGzipItemExporter, DateColumn,
+    Float64Column, Int64Column, JsonColumn, ListColumn,
+    NdjsonGzipItemExporter, ParquetItemExporter, StringColumn,
+    TimestampColumn)
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    age = fields.Integer('.age::text')
+    rating = fields.Float('.rating::text')
+    active = fields.Boolean('.active::text')
+    birthday = fields.Date('.birthday::text')
+    seen = fields.DateTime('.seen::text', tz='UTC')
+    phones = fields.String('.phone::text', multi_selector=True)
+    gender = fields.String('.gender::text', choices={'male': 'm'})
+    size = fields.String('.size::text', choices={'small': 1, 'big': 2})
+    tags = fields.String('.tags::text', choices={'all': ['a', 'b']})
+    length = fields.String('.name::text', len)
+
+
+def make_items():
+    return [
+        ProfileItem(name=['John'], age=[33], rating=[4.5], active=[True],
+                    birthday=[date(1985, 3, 1)],
+                    seen=[datetime(2020, 5, 1, 12, tzinfo=timezone.utc)],
+                    phones=['1', '2'], gender=['m'], size=[2],
+                    tags=['a', 'b'], length=[4]),
+        ProfileItem(name=['Мирослава'], phones=[]),
+        ProfileItem(age=[-1], active=[False], length=[{'x': 1}]),
+    ]
+
+
+class ColumnTestCase(unittest.TestCase):
+
+    def test_schema(self):
+        batch = ColumnBatch(ProfileItem)
+        types = {name: (type(column), getattr(column, 'child', None))
+                 for name, column in zip(batch.names, batch.columns)}
+
+        self.assertEqual((StringColumn, None), types['name'])
+        self.assertEqual((Int64Column, None), types['age'])
+        self.assertEqual((Float64Column, None), types['rating'])
+        self.assertEqual((BooleanColumn, None), types['active'])
+        self.assertEqual((DateColumn, None), types['birthday'])
+        self.assertEqual((TimestampColumn, None), types['seen'])
+        self.assertTrue(batch.columns[batch.names.index('seen')].utc)
+        self.assertEqual(ListColumn, types['phones'][0])
+        self.assertIsInstance(types['phones'][1], StringColumn)
+        self.assertEqual((StringColumn, None), types['gender'])
+        self.assertEqual((Int64Column, None), types['size'])
+        self.assertEqual(ListColumn, types['tags'][0])
+        self.assertEqual((JsonColumn, None), types['length'])
+
+    def test_round_trip(self):
+        batch = ColumnBatch(ProfileItem)
+        for item in make_items():
+            batch.append(item)
+        rows = batch.to_rows()
+
+        self.assertEqual(3, len(batch))
+        self.assertEqual({
+            'name': 'John', 'age': 33, 'rating': 4.5, 'active': True,
+            'birthday': date(1985, 3, 1),
+            'seen': datetime(2020, 5, 1, 12, tzinfo=timezone.utc),
+            'phones': ['1', '2'], 'gender': 'm', 'size': 2,
+            'tags': ['a', 'b'], 'length': 4}, rows[0])
+        self.assertEqual('Мирослава', rows[1]['name'])
+        self.assertEqual([], rows[1]['phones'])
+        self.assertIsNone(rows[1]['age'])
+        self.assertIsNone(rows[2]['phones'])
+        self.assertEqual(-1, rows[2]['age'])
+        self.assertIs(False, rows[2]['active'])
+        self.assertEqual({'x': 1}, rows[2]['length'])
+
+        batch.clear()
+        self.assertEqual(0, len(batch))
+        self.assertEqual([], batch.to_rows())
+
+    def test_invalid_value_is_null(self):
+        column = Int64Column('age')
+
+        with self.assertLogs('crawlit.exporters', 'WARNING'):
+            column.append('33')
+        column.append(33)
+
+        self.assertEqual([None, 33], column.to_list())
+        self.assertEqual(1, column.null_count)
+
+    def test_list_column(self):
+        column = ListColumn(Float64Column('prices'))
+        column.append([1.5, 2])
+        column.append(None)
+        column.append([])
+        column.append([3.0])
+
+        self.assertEqual([[1.5, 2.0], None, [], [3.0]], column.to_list())
+        self.assertEqual(4, len(column))
+        self.assertEqual(3, len(column.child))
+
+    def test_bitmap_layout(self):
+        column = BooleanColumn('active')
+        for idx in range(10):
+            column.append(None if idx == 9 else idx % 3 == 0)
+
+        self.assertEqual(bytearray([0b11111111, 0b01]), column.validity.data)
+        self.assertEqual(bytearray([0b01001001, 0b0]), column.values.data)
+
+    def test_naive_timestamps(self):
+        column = TimestampColumn('seen')
+        column.append(datetime(1969, 12, 31, 23, 59, 59, 500000))
+        column.append(datetime(2020, 5, 1))
+
+        self.assertEqual([-500000, 1588291200000000], column.values.tolist())
+        self.assertEqual([datetime(1969, 12, 31, 23, 59, 59, 500000),
+                          datetime(2020, 5, 1)], column.to_list())
+
+    def test_nbytes(self):
+        batch = ColumnBatch(ProfileItem, fields_to_export=['age', 'name'])
+        for idx in range(1000):
+            batch.append(ProfileItem(age=[idx], name=['abcd']))
+
+        # 8 bytes per int, 8 bytes offset and 4 bytes per string, bitmaps
+        self.assertEqual(8000 + 8008 + 4000 + 2 * 125, batch.nbytes)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            ColumnBatch(ProfileItem, fields_to_export=['foo'])
+
+
+class ExporterTestCase(unittest.TestCase):
+
+    def export(self, exporter_class, items, **kwargs):
+        output = io.BytesIO()
+        exporter = exporter_class(output, **kwargs)
+        exporter.start_exporting()
+        for item in items:
+            exporter.export_item(item)
+        exporter.finish_exporting()
+        self.assertFalse(output.closed)
+        return exporter, output.getvalue()
+
+    def test_ndjson(self):
+        items = make_items() * 3
+        exporter, data = self.export(NdjsonGzipItemExporter, items,
+                                     batch_size=4)
+        rows = [json.loads(line) for line in
+                gzip.decompress(data).decode('utf-8').splitlines()]
+
+        self.assertEqual(9, exporter.items_count)
+        self.assertEqual(3, exporter.batches_count)
+        self.assertEqual(9, len(rows))
+        self.assertEqual('1985-03-01', rows[0]['birthday'])
+        self.assertEqual('2020-05-01T12:00:00+00:00', rows[0]['seen'])
+        self.assertEqual(['1', '2'], rows[0]['phones'])
+        self.assertEqual('Мирослава', rows[4]['name'])
+
+    def test_csv(self):
+        compact_class = ProfileItem.get_compact_class()
+        items = [compact_class(item) for item in make_items()]
+        _, data = self.export(CsvGzipItemExporter, items,
+                              fields_to_export=['name', 'age', 'phones'])
+        rows = list(csv.reader(io.StringIO(
+            gzip.decompress(data).decode('utf-8'))))
+
+        self.assertEqual([['name', 'age', 'phones'],
+                          ['John', '33', '["1", "2"]'],
+                          ['Мирослава', '', '[]'],
+                          ['', '-1', '']], rows)
+
+    def test_empty_export(self):
+        _, data = self.export(CsvGzipItemExporter, [],
+                              item_class=ProfileItem,
+                              fields_to_export=['name'])
+
+        self.assertEqual(b'name\r\n', gzip.decompress(data))
+        self.assertEqual(b'', self.export(NdjsonGzipItemExporter, [])[1])
+
+    def test_dict_items(self):
+        with self.assertRaises(TypeError):
+            self.export(NdjsonGzipItemExporter, [{'name': 'John'}])
+
+    def test_mixed_item_classes(self):
+
+        class CompanyItem(Item):
+            name = fields.String('.company::text')
+
+        items = [ProfileItem(name=['John']), CompanyItem(name=['Acme'])]
+        with self.assertRaises(TypeError):
+            self.export(NdjsonGzipItemExporter, items)
+        with self.assertRaises(TypeError):
+            self.export(NdjsonGzipItemExporter, [CompanyItem(name=['Acme'])],
+                        item_class=ProfileItem)
+
+        class StudentItem(ProfileItem):
+            school = fields.String('.school::text')
+
+        items = [StudentItem(name=['Mary'], school=['MIT'])]
+        _, data = self.export(NdjsonGzipItemExporter, items,
+                              item_class=ProfileItem)
+        self.assertEqual('Mary', json.loads(gzip.decompress(data))['name'])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        items = make_items() * 3
+        _, data = self.export(ParquetItemExporter, items, batch_size=4)
+        table = pq.read_table(io.BytesIO(data))
+
+        self.assertEqual(9, table.num_rows)
+        self.assertEqual(ColumnBatch(ProfileItem).arrow_schema(),
+                         table.schema.remove_metadata())
+        rows = table.to_pylist()
+        self.assertEqual(33, rows[0]['age'])
+        self.assertEqual(['1', '2'], rows[0]['phones'])
+        self.assertIsNone(rows[1]['age'])
+        self.assertEqual(date(1985, 3, 1), rows[3]['birthday'])
+
+
+if __name__ == '__main__':
+    unittest.main()
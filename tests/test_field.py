@@ -1,3 +1,4 @@
+import re
 import unittest
 
 from scrapy.loader.processors import TakeFirst
@@ -20,7 +21,7 @@ class TestCase(unittest.TestCase):
     def test_regexp_attr(self):
         field = fields.Field('h1', regexp=r'\d+')
 
-        self.assertEqual(r'\d+', field.re)
+        self.assertEqual(r'\d+', field.re.pattern)
 
     def test_default_regexp_attr(self):
 
@@ -29,7 +30,7 @@ class TestCase(unittest.TestCase):
 
         field = MyField('h1')
 
-        self.assertEqual(r'\d+', field.re)
+        self.assertEqual(r'\d+', field.re.pattern)
 
     def test_default_regexp_is_overridable(self):
 
@@ -38,7 +39,24 @@ class TestCase(unittest.TestCase):
 
         field = MyField('h1', regexp=r'\w{3}')
 
-        self.assertEqual(r'\w{3}', field.re)
+        self.assertEqual(r'\w{3}', field.re.pattern)
+
+    def test_regexp_is_compiled_once(self):
+        field = fields.Field('h1', regexp=r'\d+')
+
+        self.assertIs(field.re, field.re)
+        self.assertEqual(re.UNICODE, field.re.flags & re.UNICODE)
+
+    def test_compiled_regexp_is_kept(self):
+        regexp = re.compile(r'\d+', re.IGNORECASE)
+        field = fields.Field('h1', regexp=regexp)
+
+        self.assertIs(regexp, field.re)
+
+    def test_float_delimiter_regexp(self):
+        field = fields.Float('h1', delimiter=',')
+
+        self.assertEqual(['1,5'], field.re.findall('x 1,5 m'))
 
     def test_processors(self):
 
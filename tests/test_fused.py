@@ -0,0 +1,123 @@
+import random
+import unittest
+
+from scrapy.exceptions import DropItem
+from scrapy.loader.processors import Join, MapCompose, TakeFirst
+
+from crawlit import fields
+from crawlit.fields import FusedProcessor, MemoizedProcessor, fuse_processors
+from crawlit.plans import FieldPlan
+
+
+CHOICES = {'flat': 'f', 'house': ('h', 'x'), 'studio': ['s'], 'loft': 1}
+
+TOKENS = ('', ' ', '  Flat ', 'house', 'studio loft', 'HOUSE', '12', ' -3 ',
+          '4,5', '1.5', '1e+3', 'x', 'yes', '2020-05-01', 'a@b.com',
+          ' flat, house ')
+
+
+def run(processors, values):
+    value = values
+    for processor in processors:
+        if value is None:
+            break
+        value = processor(value)
+    return value
+
+
+def make_fields():
+    return [
+        fields.Field('a'),
+        fields.Field('a', multi_selector=True),
+        fields.String('a'),
+        fields.String('a', multi_selector=True),
+        fields.String('a', strip=False),
+        fields.String('a', strip=False, multi_selector=True),
+        fields.String('a', lower=True),
+        fields.String('a', upper=True, multi_selector=True),
+        fields.String('a', choices=tuple(CHOICES)),
+        fields.String('a', choices=CHOICES, multi_choices=True),
+        fields.String('a', choices=CHOICES, multi_choices=True,
+                      multi_selector=True),
+        fields.String('a', choices=CHOICES, default='u'),
+        fields.String('a', MapCompose(str.title), len, lower=True),
+        fields.String('a', choices=CHOICES, memoize=True),
+        fields.Boolean('a'),
+        fields.Boolean('a', multi_selector=True, memoize=True),
+        fields.Integer('a'),
+        fields.Integer('a', multi_selector=True, default=0),
+        fields.Integer('a', memoize=True),
+        fields.Float('a', delimiter=','),
+        fields.Float('a', str, multi_selector=True, memoize=True),
+        fields.DateTime('a'),
+        fields.Email('a', multi_selector=True),
+    ]
+
+
+def outcome(processors, values):
+    try:
+        return run(processors, list(values))
+    except DropItem as e:
+        return DropItem, e.args
+    except (TypeError, ValueError) as e:
+        return type(e), e.args
+
+
+class TestCase(unittest.TestCase):
+
+    def test_same_as_processors(self):
+        rnd = random.Random(0)
+        for idx, field in enumerate(make_fields()):
+            field.name = 'field%d' % idx
+            fused = field.get_fused_processors()
+            self.assertIsInstance(fused[0], FusedProcessor)
+            for _ in range(300):
+                values = [rnd.choice(TOKENS)
+                          for _ in range(rnd.randint(0, 3))]
+                self.assertEqual(outcome(field.processors, values),
+                                 outcome(fused, values), (idx, values))
+
+    def test_user_processors_follow(self):
+
+        def foo(value):
+            return value
+
+        field = fields.Integer('a', foo)
+        fused = field.get_fused_processors()
+
+        self.assertEqual(2, len(fused))
+        self.assertIs(foo, fused[1])
+        self.assertEqual((str.strip,), fused[0].filters)
+        self.assertEqual('', fused[0].separator)
+        self.assertEqual((field._to_int,), fused[0].tail)
+
+    def test_memo_is_fused(self):
+        field = fields.Integer('a', memoize=True)
+        fused = field.get_fused_processors()[0]
+
+        self.assertTrue(fused.first_only)
+        memoized, = fused.tail
+        self.assertIsInstance(memoized, MemoizedProcessor)
+        self.assertIs(field.memo, memoized.memo)
+        self.assertIsInstance(memoized.processors[0], FusedProcessor)
+
+    def test_not_fused(self):
+        self.assertIsNone(fuse_processors([TakeFirst(), Join(), TakeFirst()]))
+
+        field = fields.Field('a', multi_selector=True)
+        field.processors.insert(0, MapCompose(str.strip, key='value'))
+
+        self.assertIs(field.processors[0],
+                      field.get_fused_processors()[0])
+
+    def test_plan_uses_fused(self):
+        field = fields.Float('a')
+        field_plan = FieldPlan('price', field)
+
+        self.assertIsInstance(field_plan.processors[0].function,
+                              FusedProcessor)
+        self.assertEqual([1.5], field_plan.process([' 1.5 '], {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+
+from scrapy.http import XmlResponse
+
+from crawlit import Item, fields
+
+
+FEED = b'''<?xml version="1.0" encoding="utf-8"?>
+<rss><channel>
+<item><title> First </title><price>10.5</price><tag>a</tag><tag>b</tag>
+  <currency>USD</currency></item>
+<item><title> Second </title><price>20</price><currency>GBP</currency></item>
+<item><title> Third </title><price>x</price><currency>EUR</currency></item>
+<item><title> Fourth </title><currency>EUR</currency></item>
+</channel></rss>
+'''
+
+SITEMAP = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>https://example.com/a</loc></url>
+<url><loc>https://example.com/b</loc></url>
+</urlset>
+'''
+
+
+class FeedItem(Item):
+    title = fields.String('title::text')
+    price = fields.Float('//price/text()')
+    tags = fields.String('tag::text', multi_selector=True)
+    currency = fields.String('currency::text', choices=('USD', 'EUR'))
+
+
+class SitemapItem(Item):
+    loc = fields.String('//*[local-name()="loc"]/text()')
+
+
+class TestCase(unittest.TestCase):
+    expected = [
+        {'title': ['First'], 'price': [10.5], 'tags': ['a', 'b'],
+         'currency': ['USD']},
+        {'title': ['Third'], 'currency': ['EUR']},
+        {'title': ['Fourth'], 'currency': ['EUR']},
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iterload_file_object(self):
+        items = FeedItem.iterload(BytesIO(FEED), record_tag='item')
+
+        self.assertListEqual(self.expected, [dict(item) for item in items])
+
+    def test_iterload_response(self):
+        response = XmlResponse('https://example.com/feed', body=FEED)
+        items = FeedItem.iterload(response, record_tag='item')
+
+        self.assertListEqual(self.expected, [dict(item) for item in items])
+
+    def test_iterload_gzip_path(self):
+        path = os.path.join(self.tmp_dir, 'feed.xml.gz')
+        with gzip.open(path, 'wb') as f:
+            f.write(FEED)
+
+        items = FeedItem.iterload(path, record_tag='item')
+
+        self.assertListEqual(self.expected, [dict(item) for item in items])
+
+    def test_iterload_namespaced_tag(self):
+        items = SitemapItem.iterload(
+            BytesIO(SITEMAP),
+            record_tag='{http://www.sitemaps.org/schemas/sitemap/0.9}url')
+
+        self.assertListEqual(['https://example.com/a', 'https://example.com/b'],
+                             [item['loc'][0] for item in items])
+
+    def test_external_entities_are_not_resolved(self):
+        path = os.path.join(self.tmp_dir, 'secret.txt')
+        with open(path, 'w') as f:
+            f.write('SECRET')
+        feed = ('<?xml version="1.0"?>\n'
+                '<!DOCTYPE rss [<!ENTITY x SYSTEM "file://%s">]>\n'
+                '<rss><item><title>&x;</title></item></rss>' % path)
+        response = XmlResponse('https://example.com/feed',
+                               body=feed.encode('utf-8'))
+
+        items = [dict(item) for item in
+                 FeedItem.iterload(response, record_tag='item')]
+
+        self.assertNotIn('SECRET', str(items))
+        self.assertEqual(1, len(items))
+
+    def test_iterload_frees_records(self):
+        items = FeedItem.iterload(BytesIO(FEED), record_tag='item')
+        next(items)
+        context = items.gi_frame.f_locals
+
+        self.assertEqual(0, len(context['element']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from scrapy.http import HtmlResponse
+
+from crawlit import Item, fields
+
+
+BODY = b'''
+<html><body>
+<h1 class="title">Listing</h1>
+<ul class="results">
+  <li class="row">
+    <h2 class="title"> First </h2><span class="price">10</span>
+    <i class="tag">a</i><i class="tag">b</i><p class="unit">km</p>
+  </li>
+  <li class="row">
+    <h2 class="title"> Second </h2><span class="price">20</span>
+    <p class="unit">ha</p>
+  </li>
+  <li class="row">
+    <h2 class="title"> Third </h2><p class="unit">m</p>
+  </li>
+</ul>
+</body></html>
+'''
+
+
+class RowItem(Item):
+    title = fields.String('h2.title::text')
+    price = fields.Integer('//span[@class="price"]/text()')
+    tags = fields.String('.tag::text', multi_selector=True)
+    unit = fields.String('.unit::text', choices=('m', 'km'))
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = HtmlResponse('https://example.com/', body=BODY,
+                                     encoding='utf-8')
+
+    def test_load_many_css_container(self):
+        items = list(RowItem.load_many(self.response, container='li.row'))
+
+        self.assertListEqual([
+            {'title': ['First'], 'price': [10], 'tags': ['a', 'b'],
+             'unit': ['km']},
+            {'title': ['Third'], 'unit': ['m']},
+        ], [dict(item) for item in items])
+
+    def test_load_many_xpath_container(self):
+        items = list(RowItem.load_many(
+            self.response, container='//li[@class="row"]'))
+
+        self.assertListEqual(['First', 'Third'],
+                             [item['title'][0] for item in items])
+
+    def test_load_many_matches_per_row_loader(self):
+        row = self.response.css('li.row')[0]
+        expected = [dict(RowItem.load_with_loader(row))]
+
+        items = RowItem.load_many(self.response, container='li.row')
+
+        self.assertListEqual(expected, [dict(next(items))])
+
+    def test_load_many_returns_generator(self):
+        items = RowItem.load_many(self.response, container='li.row')
+
+        self.assertEqual('First', next(items)['title'][0])
+
+    def test_load_many_without_container_raises_error(self):
+        with self.assertRaises(ValueError):
+            RowItem.load_many(self.response)
+
+
+if __name__ == '__main__':
+    unittest.main()
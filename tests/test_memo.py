@@ -0,0 +1,171 @@
+import unittest
+
+from scrapy.exceptions import DropItem
+from scrapy.http import HtmlResponse
+from scrapy.loader.processors import MapCompose, TakeFirst
+from scrapy.utils.test import get_crawler
+
+from crawlit import Item, fields, profiling
+from crawlit.cache import get_fingerprint
+from crawlit.fields import Memo, MemoizedProcessor
+from crawlit.profiling import ExtractionProfiler
+
+
+BODY = b'''
+<p class="name"> John </p>
+<p class="gender">male</p>
+<p class="age">33</p>
+<p class="price">1,5</p>
+<p class="tag">a</p><p class="tag">b</p>
+'''
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text', memoize=True)
+    gender = fields.String('.gender::text', choices={'male': 'm'},
+                           memoize=10)
+    age = fields.Integer('.age::text', memoize=True)
+    price = fields.Float('.price::text', delimiter=',', memoize=True)
+    tags = fields.String('.tag::text', MapCompose(str.upper),
+                         multi_selector=True, memoize=True)
+
+
+class PlainProfileItem(Item):
+    name = fields.String('.name::text')
+    gender = fields.String('.gender::text', choices={'male': 'm'})
+    age = fields.Integer('.age::text')
+    price = fields.Float('.price::text', delimiter=',')
+    tags = fields.String('.tag::text', MapCompose(str.upper),
+                         multi_selector=True)
+
+
+def make_response(body=BODY):
+    return HtmlResponse('https://example.com/', body=body, encoding='utf-8')
+
+
+class MemoTestCase(unittest.TestCase):
+
+    def test_lru(self):
+        memo = Memo(2)
+        memo.set('a', 1)
+        memo.set('b', 2)
+        self.assertEqual(1, memo.get('a'))
+        memo.set('c', 3)
+
+        self.assertIsNone(memo.get('b'))
+        self.assertEqual(3, memo.get('c'))
+        self.assertEqual(2, len(memo))
+        self.assertEqual((2, 1), (memo.hits, memo.misses))
+        self.assertAlmostEqual(2 / 3, memo.hit_rate)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            Memo(0)
+
+
+class TestCase(unittest.TestCase):
+
+    def test_processors_order(self):
+
+        def foo(s):
+            return s
+
+        field = fields.Integer('.value', foo, memoize=True)
+
+        self.assertIsInstance(field.processors[0], TakeFirst)
+        self.assertIsInstance(field.processors[1], MemoizedProcessor)
+        self.assertTupleEqual((str.strip,),
+                              field.processors[1].processors[0].functions)
+        self.assertEqual(field._to_int, field.processors[1].processors[2])
+        self.assertEqual([foo], field.processors[2:])
+        self.assertEqual(fields.Field.default_memo_size,
+                         field.memo.max_size)
+
+    def test_not_memoized_by_default(self):
+        field = fields.Integer('.value')
+
+        self.assertIsNone(field.memo)
+        self.assertFalse(any(isinstance(p, MemoizedProcessor)
+                             for p in field.processors))
+
+    def test_converted_once(self):
+        calls = []
+
+        def to_int(value):
+            calls.append(value)
+            return int(value)
+
+        processor = MemoizedProcessor([str.strip, to_int], Memo(10))
+
+        self.assertEqual([12, 12, 13], [processor(v) for v in
+                                        (' 12', ' 12', '13')])
+        self.assertEqual(['12', '13'], calls)
+
+    def test_drop_is_memoized(self):
+        field = fields.Integer('.value', memoize=True)
+        field.name = 'age'
+        processor = field.processors[1]
+
+        for _ in range(2):
+            with self.assertRaises(DropItem) as err_ctx:
+                processor('12x')
+            self.assertEqual('"age": int expected, not "12x"',
+                             err_ctx.exception.args[0])
+        self.assertEqual((1, 1), (field.memo.hits, field.memo.misses))
+
+    def test_lists_are_not_shared(self):
+        field = fields.String('.value', multi_selector=True, memoize=True)
+        processor = field.processors[0]
+
+        first = processor(['a ', 'b'])
+        first.append('c')
+
+        self.assertEqual(['a', 'b'], processor(['a ', 'b']))
+
+    def test_same_items(self):
+        bodies = [BODY, BODY.replace(b'33', b'34'),
+                  BODY.replace(b'male', b'x'), BODY]
+        for body in bodies:
+            response = make_response(body)
+            try:
+                expected = dict(PlainProfileItem.load(response))
+            except DropItem as e:
+                with self.assertRaises(DropItem) as err_ctx:
+                    ProfileItem.load(response)
+                self.assertEqual(e.args, err_ctx.exception.args)
+            else:
+                self.assertDictEqual(expected,
+                                     dict(ProfileItem.load(response)))
+        self.assertEqual({'name': ['John'], 'gender': ['m'], 'age': [33],
+                          'price': [1.5], 'tags': ['A', 'B']},
+                         dict(ProfileItem.load(make_response())))
+
+    def test_fingerprint_ignores_memo(self):
+        fingerprint = get_fingerprint(ProfileItem)
+        ProfileItem.load(make_response())
+
+        self.assertEqual(fingerprint, get_fingerprint(ProfileItem))
+
+    def test_profiling_stats(self):
+        stats = get_crawler().stats
+        profiler = ExtractionProfiler(stats)
+        profiling.install(profiler)
+        try:
+            ProfileItem.load(make_response())
+            ProfileItem.load(make_response())
+        finally:
+            profiling.uninstall(profiler)
+        profiler.close()
+
+        memo = ProfileItem.fields['age'].memo
+        self.assertEqual(memo.hits,
+                         stats.get_value('crawlit/ProfileItem/age/memo_hits'))
+        self.assertEqual(
+            memo.hit_rate,
+            stats.get_value('crawlit/ProfileItem/age/memo_hit_rate'))
+        self.assertIsNone(
+            stats.get_value('crawlit/PlainProfileItem/name/memo_hits'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+import os
+import unittest
+
+import pymongo
+from scrapy.utils.test import get_crawler
+from scrapy.exceptions import NotConfigured
+from twisted.internet import defer
+
+from crawlit import Item, fields
+from crawlit.pipelines import MongoPipeline
+
+
+class ProfileItem(Item):
+    url = fields.String('.url::text')
+    name = fields.String('.name::text')
+
+
+class Spider:
+    name = 'profiles'
+
+
+class Result:
+
+    def __init__(self, inserted_ids=(), upserted_count=0, modified_count=0):
+        self.inserted_ids = list(inserted_ids)
+        self.upserted_count = upserted_count
+        self.modified_count = modified_count
+
+
+class Collection:
+    """In-process stand-in of pymongo.collection.Collection."""
+
+    def __init__(self):
+        self.calls = []
+        self.error = None
+
+    def insert_many(self, documents, ordered=True):
+        if self.error is not None:
+            raise self.error
+        self.calls.append(('insert_many', list(documents), ordered))
+        return Result(inserted_ids=range(len(documents)))
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls.append(('bulk_write', list(requests), ordered))
+        return Result(upserted_count=len(requests))
+
+
+class Client(dict):
+
+    def __init__(self):
+        super(Client, self).__init__()
+        self.closed = False
+
+    def __missing__(self, database):
+        self[database] = {'profiles': Collection()}
+        return self[database]
+
+    def close(self):
+        self.closed = True
+
+
+class Pipeline(MongoPipeline):
+    """Pipeline writing to the stand-in, writes are fired by the test."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('flush_interval', 0)
+        super(Pipeline, self).__init__('mongodb://localhost', 'crawl',
+                                       *args, **kwargs)
+        self.writes = []
+        self.synchronous = True
+
+    def make_client(self):
+        return Client()
+
+    def _call_in_thread(self, function, *args):
+        if self.synchronous:
+            return defer.maybeDeferred(function, *args)
+        d = defer.Deferred()
+        self.writes.append((d, function, args))
+        return d
+
+    def finish_write(self):
+        d, function, args = self.writes.pop(0)
+        try:
+            result = function(*args)
+        except Exception as e:
+            d.errback(e)
+        else:
+            d.callback(result)
+
+
+def make_item(idx):
+    return ProfileItem(url=['https://example.com/%d' % idx],
+                       name=['name %d' % idx])
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.spider = Spider()
+
+    def open(self, pipeline):
+        pipeline.open_spider(self.spider)
+        return pipeline.collection
+
+    def test_insert_many_by_batch_size(self):
+        pipeline = Pipeline(batch_size=3)
+        collection = self.open(pipeline)
+        for idx in range(7):
+            pipeline.process_item(make_item(idx), self.spider)
+
+        self.assertEqual(2, len(collection.calls))
+        method, documents, ordered = collection.calls[0]
+        self.assertEqual('insert_many', method)
+        self.assertFalse(ordered)
+        self.assertEqual({'url': ['https://example.com/0'],
+                          'name': ['name 0']}, documents[0])
+        self.assertEqual(1, len(pipeline.buffer))
+
+    def test_flush_on_close(self):
+        pipeline = Pipeline(batch_size=3)
+        collection = self.open(pipeline)
+        for idx in range(4):
+            pipeline.process_item(make_item(idx), self.spider)
+        d = pipeline.close_spider(self.spider)
+
+        self.assertTrue(d.called)
+        self.assertEqual([3, 1], [len(c[1]) for c in collection.calls])
+        self.assertTrue(pipeline.client.closed)
+
+    def test_upsert_by_unique_key(self):
+        pipeline = Pipeline(batch_size=2, unique_key=['url'])
+        collection = self.open(pipeline)
+        for idx in range(2):
+            pipeline.process_item(make_item(idx), self.spider)
+
+        method, requests, ordered = collection.calls[0]
+        self.assertEqual('bulk_write', method)
+        self.assertFalse(ordered)
+        self.assertEqual(pymongo.UpdateOne(
+            {'url': ['https://example.com/0']},
+            {'$set': {'url': ['https://example.com/0'], 'name': ['name 0']}},
+            upsert=True), requests[0])
+
+    def test_backpressure(self):
+        pipeline = Pipeline(batch_size=2, max_pending=1)
+        pipeline.synchronous = False
+        collection = self.open(pipeline)
+
+        results = [pipeline.process_item(make_item(idx), self.spider)
+                   for idx in range(4)]
+
+        # the first batch is being written, next items wait for it
+        self.assertIsInstance(results[0], ProfileItem)
+        self.assertIsInstance(results[2], defer.Deferred)
+        self.assertIsInstance(results[3], defer.Deferred)
+        self.assertEqual(1, pipeline.pending)
+        self.assertFalse(results[2].called)
+
+        pipeline.finish_write()
+
+        self.assertTrue(results[2].called)
+        self.assertTrue(results[3].called)
+        # the full buffer is flushed as soon as the write is finished
+        self.assertEqual(1, pipeline.pending)
+        self.assertEqual(1, len(collection.calls))
+
+        d = pipeline.close_spider(self.spider)
+        self.assertFalse(d.called)
+        pipeline.finish_write()
+        self.assertTrue(d.called)
+        self.assertEqual(2, len(collection.calls))
+
+    def test_write_error_is_logged(self):
+        pipeline = Pipeline(batch_size=1, stats=get_crawler().stats)
+        collection = self.open(pipeline)
+        collection.error = pymongo.errors.AutoReconnect('down')
+
+        with self.assertLogs('crawlit.pipelines', 'ERROR'):
+            item = pipeline.process_item(make_item(0), self.spider)
+
+        self.assertIsInstance(item, ProfileItem)
+        self.assertEqual(1, pipeline.stats.get_value('crawlit/mongo/errors'))
+        self.assertEqual(0, pipeline.pending)
+
+    def test_stats(self):
+        pipeline = Pipeline(batch_size=2, stats=get_crawler().stats)
+        self.open(pipeline)
+        for idx in range(3):
+            pipeline.process_item(make_item(idx), self.spider)
+        pipeline.close_spider(self.spider)
+
+        self.assertEqual(2, pipeline.stats.get_value('crawlit/mongo/batches'))
+        self.assertEqual(3, pipeline.stats.get_value('crawlit/mongo/inserted'))
+
+    def test_from_crawler(self):
+        crawler = get_crawler(settings_dict={
+            'CRAWLIT_MONGO_URI': 'mongodb://db',
+            'CRAWLIT_MONGO_UNIQUE_KEY': 'url,name',
+            'CRAWLIT_MONGO_BATCH_SIZE': 100,
+        })
+        pipeline = MongoPipeline.from_crawler(crawler)
+
+        self.assertEqual('mongodb://db', pipeline.uri)
+        self.assertEqual(('url', 'name'), pipeline.unique_key)
+        self.assertEqual(100, pipeline.batch_size)
+
+    def test_not_configured(self):
+        with self.assertRaises(NotConfigured):
+            MongoPipeline.from_crawler(get_crawler())
+
+
+@unittest.skipUnless(os.environ.get('CRAWLIT_TEST_MONGO_URI'),
+                     'set CRAWLIT_TEST_MONGO_URI to run it with mongod')
+class MongodTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = pymongo.MongoClient(os.environ['CRAWLIT_TEST_MONGO_URI'])
+        self.collection = self.client['crawlit_test']['profiles']
+        self.collection.drop()
+
+    def tearDown(self):
+        self.collection.drop()
+        self.client.close()
+
+    def test_upsert(self):
+        pipeline = MongoPipeline(os.environ['CRAWLIT_TEST_MONGO_URI'],
+                                 'crawlit_test', unique_key=['url'],
+                                 batch_size=2, flush_interval=0)
+        pipeline._call_in_thread = defer.maybeDeferred
+        pipeline.open_spider(Spider())
+        for idx in (0, 1, 0, 2):
+            pipeline.process_item(make_item(idx), Spider())
+        pipeline.close_spider(Spider())
+
+        self.assertEqual(3, self.collection.count_documents({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import DropItem
+from scrapy.utils.misc import extract_regex
+from scrapy.utils.python import flatten
+
+from crawlit import Item, fields
+from crawlit.plans import ItemPlan
+
+
+BODY = b'''
+<html><body>
+<div class="profile">
+  <h1 class="name"> John Smith </h1>
+  <span class="age">Age: 42 years</span>
+  <span class="height">1,85 m</span>
+  <a class="phone" href="tel:+100">call</a>
+  <a class="phone" href="tel:+200">call</a>
+  <a class="email" href="mailto:john@example.com">mail</a>
+  <p class="gender">Gender: m</p>
+  <p class="about">nice flat with tv and microwave</p>
+  <p class="verified">yes</p>
+</div>
+</body></html>
+'''
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    upper_name = fields.String('//h1/text()', upper=True)
+    age = fields.Integer('.age::text')
+    height = fields.Float('.height::text', delimiter=',')
+    phones = fields.String('.phone::attr(href)', multi_selector=True)
+    email = fields.Email('.email::attr(href)')
+    gender = fields.String('.gender::text', choices=('m', 'f'))
+    about = fields.String('.about::text', multi_choices=True,
+                          choices=('microwave', 'tv', 'shower'))
+    verified = fields.Boolean('.verified::text')
+    missing = fields.String('.missing::text')
+    weight = fields.Integer('.weight::text', default=0)
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = HtmlResponse('https://example.com/', body=BODY,
+                                     encoding='utf-8')
+
+    def test_plan_is_built_once_per_class(self):
+        plan = ProfileItem.get_plan()
+
+        self.assertIsInstance(plan, ItemPlan)
+        self.assertIs(plan, ProfileItem.get_plan())
+
+    def test_plan_is_not_inherited(self):
+
+        class ExtendedProfileItem(ProfileItem):
+            city = fields.String('.city::text')
+
+        plan = ExtendedProfileItem.get_plan()
+
+        self.assertIsNot(plan, ProfileItem.get_plan())
+        self.assertIn('city', [f.name for f in plan.fields])
+
+    def test_xpath_is_translated_once(self):
+        field_plan = ProfileItem.get_plan().fields[0]
+
+        self.assertFalse(field_plan.is_xpath)
+        self.assertIs(field_plan.get_xpath('html'),
+                      field_plan.get_xpath('html'))
+
+    def test_regexp_matches_extract_regex(self):
+        texts = ('Age: 42 years, 1,85 m', 'a &amp; b &lt; c &gt; d 7',
+                 'no numbers', '')
+        for regexp in (r'\d+', r'(\d+),(\d+)', r'(?P<extract>\d+) m',
+                       r'&\w+;', r'(\w)(x)?'):
+
+            class RegexpItem(Item):
+                value = fields.String('h1', regexp=regexp,
+                                      multi_selector=True)
+
+            field_plan = RegexpItem.get_plan().fields[0]
+            for text in texts:
+                self.assertEqual(flatten([extract_regex(regexp, text)]),
+                                 field_plan._apply_regexp([text]),
+                                 (regexp, text))
+
+    def test_load_matches_item_loader(self):
+        expected = ProfileItem.load_with_loader(self.response)
+        item = ProfileItem.load(self.response)
+
+        self.assertDictEqual(dict(expected), dict(item))
+        self.assertDictEqual({
+            'name': ['John Smith'],
+            'upper_name': ['JOHN SMITH'],
+            'age': [42],
+            'height': [1.85],
+            'phones': ['tel:+100', 'tel:+200'],
+            'email': ['john@example.com'],
+            'gender': ['m'],
+            'about': ['microwave', 'tv'],
+            'verified': [True],
+        }, dict(item))
+
+    def test_load_response_keyword(self):
+        item = ProfileItem.load(response=self.response)
+
+        self.assertEqual(['John Smith'], item.name)
+
+    def test_load_nested_selector(self):
+        selector = self.response.css('.profile')
+        item = ProfileItem.load(selector)
+
+        self.assertEqual([42], item.age)
+
+    def test_first_only_single_value_fields(self):
+        plan = ProfileItem.get_plan()
+        first_only = {f.name: f.first_only for f in plan.fields}
+
+        self.assertTrue(first_only['name'])
+        self.assertFalse(first_only['phones'])
+
+    def test_first_only_skips_empty_first_node(self):
+
+        class AgeItem(Item):
+            age = fields.Integer('.profile span::text')
+            link = fields.String('.profile a::attr(data-id)')
+
+        body = (b'<div class="profile"><span>none</span><span>12</span>'
+                b'<a data-id="">x</a><a data-id="7">y</a></div>')
+        response = HtmlResponse('https://example.com/', body=body,
+                                encoding='utf-8')
+        item = AgeItem.load(response)
+
+        self.assertDictEqual(dict(AgeItem.load_with_loader(response)),
+                             dict(item))
+        self.assertEqual([12], item['age'])
+        self.assertEqual(['7'], item['link'])
+
+    def test_first_only_not_node_set_xpath(self):
+
+        class VerifiedItem(Item):
+            verified = fields.String('//p[@class="verified"]/text() = "yes"')
+
+        item = VerifiedItem.load(self.response)
+
+        self.assertEqual(['1'], item['verified'])
+
+    def test_load_drops_item(self):
+
+        class GenderItem(Item):
+            gender = fields.String('.about::text', choices=('m', 'f'))
+
+        with self.assertRaises(DropItem):
+            GenderItem.load(self.response)
+
+    def test_load_without_selector_raises_error(self):
+        with self.assertRaises(RuntimeError):
+            ProfileItem.load()
+
+    def test_loader_context(self):
+
+        def add_suffix(values, loader_context):
+            return [v + loader_context['suffix'] for v in values]
+
+        class ContextItem(Item):
+            name = fields.String('.name::text', add_suffix)
+
+        item = ContextItem.load(self.response, suffix='!')
+
+        self.assertEqual(['John Smith!'], item['name'])
+
+
+if __name__ == '__main__':
+    unittest.main()
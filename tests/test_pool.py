@@ -0,0 +1,99 @@
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import DropItem
+from twisted.internet import defer
+from twisted.trial import unittest
+
+from crawlit import Item, fields
+from crawlit.pool import ExtractionPool
+
+
+BODY = b'''
+<html><body>
+<h1 class="name"> John </h1>
+<p class="age">42 years</p>
+<ul>
+  <li class="row"><b>a</b></li>
+  <li class="row"><b>b</b></li>
+</ul>
+</body></html>
+'''
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    age = fields.Integer('.age::text')
+
+
+class GenderItem(Item):
+    gender = fields.String('.name::text', choices=('m', 'f'))
+
+
+class RowItem(Item):
+    name = fields.String('b::text')
+
+
+class CompactProfileItem(ProfileItem):
+    compact = True
+
+
+class BrokenItem(Item):
+    name = fields.String('.name::text', lambda values: 1 / 0)
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ExtractionPool(max_workers=2, max_in_flight=3)
+        self.response = HtmlResponse('https://example.com/', body=BODY,
+                                     encoding='utf-8')
+
+    def tearDown(self):
+        self.pool.close()
+
+    @defer.inlineCallbacks
+    def test_load(self):
+        item = yield self.pool.load(ProfileItem, self.response)
+
+        self.assertIsInstance(item, ProfileItem)
+        self.assertDictEqual({'name': ['John'], 'age': [42]}, dict(item))
+
+    @defer.inlineCallbacks
+    def test_load_many(self):
+        items = yield self.pool.load_many(RowItem, self.response, 'li.row')
+
+        self.assertEqual([['a'], ['b']], [item['name'] for item in items])
+
+    @defer.inlineCallbacks
+    def test_compact_item(self):
+        item = yield self.pool.load(CompactProfileItem, self.response)
+
+        self.assertIsInstance(item, CompactProfileItem.get_compact_class())
+        self.assertEqual([42], item.age)
+
+    @defer.inlineCallbacks
+    def test_drop_item_fails_deferred(self):
+        with self.assertRaises(DropItem):
+            yield self.pool.load(GenderItem, self.response)
+
+    @defer.inlineCallbacks
+    def test_error_fails_deferred(self):
+        with self.assertRaises(ZeroDivisionError):
+            yield self.pool.load(BrokenItem, self.response)
+
+    @defer.inlineCallbacks
+    def test_in_flight_limit(self):
+        deferreds = [self.pool.load(ProfileItem, self.response)
+                     for _ in range(10)]
+
+        self.assertEqual(3, self.pool.in_flight)
+        items = yield defer.gatherResults(deferreds)
+        self.assertEqual(10, len(items))
+        self.assertEqual(0, self.pool.in_flight)
+
+    def test_local_item_class(self):
+
+        class LocalItem(Item):
+            name = fields.String('.name::text')
+
+        with self.assertRaises(ValueError):
+            self.pool.load(LocalItem, self.response)
@@ -0,0 +1,112 @@
+import unittest
+
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from crawlit import Item, fields, profiling
+from crawlit.profiling import ExtractionProfiler, ExtractionProfiling
+
+
+BODY = b'''
+<p class="name"> John </p>
+<p class="tag">a</p><p class="tag">b</p>
+<p class="gender">x</p>
+'''
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    tags = fields.String('.tag::text', multi_selector=True)
+    age = fields.Integer('.age::text')
+
+
+class GenderItem(Item):
+    gender = fields.String('.gender::text', choices=('m', 'f'))
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.response = HtmlResponse('https://example.com/', body=BODY,
+                                     encoding='utf-8')
+        self.crawler = get_crawler(settings_dict={
+            'CRAWLIT_PROFILING_ENABLED': True,
+        })
+        self.stats = self.crawler.stats
+        self.profiler = ExtractionProfiler(self.stats)
+        profiling.install(self.profiler)
+
+    def tearDown(self):
+        profiling.uninstall(self.profiler)
+
+    def test_field_stats(self):
+        ProfileItem.load(self.response)
+        ProfileItem.load(self.response)
+        self.profiler.close()
+        stats = self.stats.get_stats()
+
+        self.assertEqual(2, stats['crawlit/ProfileItem/name/loads'])
+        self.assertEqual(2, stats['crawlit/ProfileItem/name/matches'])
+        self.assertEqual(4, stats['crawlit/ProfileItem/tags/matches'])
+        self.assertEqual(2, stats['crawlit/ProfileItem/age/empty'])
+        self.assertEqual(1.0, stats['crawlit/ProfileItem/age/empty_rate'])
+        self.assertEqual(0.0, stats['crawlit/ProfileItem/name/empty_rate'])
+        self.assertGreater(stats['crawlit/ProfileItem/name/selector_time'], 0)
+        self.assertGreater(
+            stats['crawlit/ProfileItem/name/processors_time'], 0)
+
+    def test_drop_stats(self):
+        with self.assertRaises(DropItem):
+            GenderItem.load(self.response)
+
+        self.assertEqual(1, self.stats.get_value(
+            'crawlit/GenderItem/gender/dropped/invalid_choice'))
+        self.assertEqual(1, self.stats.get_value(
+            'crawlit/GenderItem/gender/loads'))
+
+    def test_sampling(self):
+        profiler = ExtractionProfiler(self.stats, sample_rate=0.25)
+        profiling.install(profiler)
+        for _ in range(8):
+            ProfileItem.load(self.response)
+
+        self.assertEqual(2, self.stats.get_value(
+            'crawlit/ProfileItem/name/loads'))
+
+    def test_invalid_sample_rate_raises_error(self):
+        with self.assertRaises(ValueError):
+            ExtractionProfiler(self.stats, sample_rate=0)
+
+    def test_uninstalled_profiler_collects_nothing(self):
+        profiling.uninstall(self.profiler)
+        ProfileItem.load(self.response)
+
+        self.assertIsNone(self.stats.get_value(
+            'crawlit/ProfileItem/name/loads'))
+
+    def test_drop_reasons(self):
+        self.assertEqual('int_expected', profiling.get_drop_reason(
+            DropItem('"age": int expected, not "x"')))
+        self.assertEqual('float_expected', profiling.get_drop_reason(
+            DropItem('"price": float expected, not "x"')))
+        self.assertEqual('other', profiling.get_drop_reason(DropItem('?')))
+
+    def test_extension(self):
+        profiling.uninstall(self.profiler)
+        extension = ExtractionProfiling.from_crawler(self.crawler)
+        extension.spider_opened(spider=None)
+        ProfileItem.load(self.response)
+        extension.spider_closed(spider=None)
+
+        self.assertIsNone(profiling.get_profiler())
+        self.assertEqual(0.0, self.stats.get_value(
+            'crawlit/ProfileItem/name/empty_rate'))
+
+    def test_extension_disabled(self):
+        with self.assertRaises(NotConfigured):
+            ExtractionProfiling.from_crawler(get_crawler())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+from scrapy.http import HtmlResponse
+
+from crawlit import Item, fields
+from crawlit.fields import RawBody
+
+
+BODY = b'''<html><head>
+<link rel="canonical" href="https://example.com/p/1?a=1&amp;b=2">
+<meta property="og:title" content=" Red chair ">
+<script type="application/ld+json">
+{"@type": "Product", "sku": "SKU-1", "name": "Red chair",
+ "offers": [{"price": 10.5, "seller": {"name": "Shop"}},
+            {"price": 12, "seller": {"name": "Store"}}],
+ "tags": ["red", "chair"], "stock": null}
+</script>
+<script type="application/json">{"broken": </script>
+<script id="state">{"page": {"id": 7}}</script>
+</head><body><p class="name">Red chair</p><p class="id">id: 7</p></body>
+</html>'''
+
+
+class ProductItem(Item):
+    canonical = fields.Regex(r'<link rel="canonical" href="([^"]+)"')
+    title = fields.Regex(r'og:title" content="(?P<extract>[^"]+)"')
+    ids = fields.Regex(r'"id": (\d+)', multi_selector=True)
+    sku = fields.JSONPath('$.sku')
+    prices = fields.JSONPath('$.offers[*].price', multi_selector=True)
+    page_id = fields.JSONPath('$.page.id', script=r'<script id="state">'
+                              r'(.*?)</script>')
+
+
+class MixedItem(Item):
+    name = fields.String('.name::text')
+    sku = fields.JSONPath('$.sku')
+
+
+def make_response(body=BODY):
+    return HtmlResponse('https://example.com/', body=body, encoding='utf-8')
+
+
+class TestCase(unittest.TestCase):
+
+    def test_load_without_parsing(self):
+        response = make_response()
+        item = ProductItem.load(response)
+
+        self.assertIsNone(response._cached_selector)
+        self.assertEqual({
+            'canonical': ['https://example.com/p/1?a=1&b=2'],
+            'title': ['Red chair'],
+            'ids': ['7'],
+            'sku': ['SKU-1'],
+            'prices': ['10.5', '12'],
+            'page_id': ['7'],
+        }, dict(item))
+
+    def test_same_as_loader(self):
+        response = make_response()
+
+        self.assertDictEqual(dict(ProductItem.load_with_loader(response)),
+                             dict(ProductItem.load(response)))
+
+    def test_mixed_item(self):
+        item = MixedItem.load(make_response())
+
+        self.assertEqual({'name': ['Red chair'], 'sku': ['SKU-1']},
+                         dict(item))
+
+    def test_load_many_rows(self):
+        body = (b'<ul><li data-id="1">a</li><li data-id="2">b</li></ul>')
+
+        class RowItem(Item):
+            name = fields.String('::text')
+            row_id = fields.Regex(r'data-id="(\d+)"')
+
+        items = list(RowItem.load_many(make_response(body), container='li'))
+
+        self.assertEqual([['1'], ['2']], [i['row_id'] for i in items])
+
+    def test_regex_group(self):
+        field = fields.Regex(r'(a)(b)?', group=2, multi_selector=True)
+
+        self.assertEqual(['b'], field.extract_raw(RawBody(make_response(
+            b'a ab'))))
+
+    def test_jsonpath(self):
+        document = {'a': [{'b': 1}, {'b': 2, 'c': {'b': 3}}], '@type': 'X'}
+
+        self.assertEqual([1, 2], fields.JSONPath('$.a[*].b').find(document))
+        self.assertEqual([1, 2, 3], fields.JSONPath('$..b').find(document))
+        self.assertEqual([{'b': 3}], fields.JSONPath('$.a[-1].c')
+                         .find(document))
+        self.assertEqual(['X'], fields.JSONPath("$['@type']").find(document))
+        self.assertEqual([], fields.JSONPath('$.a.b').find(document))
+
+    def test_jsonpath_values(self):
+        raw = RawBody(make_response())
+
+        self.assertEqual(['{"name": "Shop"}'], fields.JSONPath(
+            '$.offers[0].seller').extract_raw(raw))
+        self.assertEqual([], fields.JSONPath('$.stock').extract_raw(raw))
+        self.assertEqual(['red', 'chair'], fields.JSONPath(
+            '$.tags.*', multi_selector=True).extract_raw(raw))
+
+    def test_invalid_jsonpath(self):
+        for path in ('offers', '$.offers[', '$.a b'):
+            with self.assertRaises(ValueError):
+                fields.JSONPath(path)
+
+    def test_nothing_to_extract_from(self):
+        with self.assertRaises(RuntimeError):
+            ProductItem.load()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import io
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from crawlit import Item, fields
+from crawlit import reextract
+from crawlit.__main__ import main
+
+
+ITEM_PATH = 'tests.test_reextract.ProfileItem'
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text')
+    gender = fields.String('.gender::text', choices=('m', 'f'))
+
+
+def make_page(name, gender='m'):
+    return ('<html><body><h1 class="name">%s</h1>'
+            '<p class="gender">%s</p></body></html>' % (name, gender)
+            ).encode('utf-8')
+
+
+def make_warc_record(url, body, content_type=b'text/html; charset=utf-8',
+                     http_headers=b''):
+    block = b'HTTP/1.1 200 OK\r\nContent-Type: %s\r\n%s\r\n%s' % (
+        content_type, http_headers, body)
+    return (b'WARC/1.0\r\n'
+            b'WARC-Type: response\r\n'
+            b'WARC-Target-URI: ' + url.encode('utf-8') + b'\r\n'
+            b'Content-Type: application/http; msgtype=response\r\n'
+            b'Content-Length: ' + str(len(block)).encode('ascii') + b'\r\n'
+            b'\r\n' + block + b'\r\n\r\n')
+
+
+def make_warc_request(url):
+    block = b'GET / HTTP/1.1\r\n\r\n'
+    return (b'WARC/1.0\r\nWARC-Type: request\r\n'
+            b'WARC-Target-URI: ' + url.encode('utf-8') + b'\r\n'
+            b'Content-Type: application/http; msgtype=request\r\n'
+            b'Content-Length: ' + str(len(block)).encode('ascii') + b'\r\n'
+            b'\r\n' + block + b'\r\n\r\n')
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.warc_path = os.path.join(self.tmp_dir, 'crawl.warc.gz')
+        page = make_page('Max', 'x')
+        chunked = b'%x\r\n%s\r\n0\r\n\r\n' % (len(page), page)
+        with gzip.open(self.warc_path, 'wb') as f:
+            f.write(make_warc_request('https://example.com/1'))
+            f.write(make_warc_record('https://example.com/1',
+                                     make_page('John')))
+            f.write(make_warc_record('https://example.com/logo.png',
+                                     b'\x89PNG', content_type=b'image/png'))
+            f.write(make_warc_record(
+                'https://example.com/2', gzip.compress(make_page('Jane', 'f')),
+                http_headers=b'Content-Encoding: gzip\r\n'))
+            f.write(make_warc_record(
+                'https://example.com/3', chunked,
+                http_headers=b'Transfer-Encoding: chunked\r\n'))
+
+        self.dump_dir = os.path.join(self.tmp_dir, 'dump')
+        os.makedirs(os.path.join(self.dump_dir, 'b'))
+        with gzip.open(os.path.join(self.dump_dir, 'a.html.gz'), 'wb') as f:
+            f.write(make_page('Bob'))
+        with open(os.path.join(self.dump_dir, 'b', 'c.html'), 'wb') as f:
+            f.write(make_page('Ann', 'f'))
+        with open(os.path.join(self.dump_dir, 'notes.txt'), 'wb') as f:
+            f.write(b'not a page')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_reextract(self, paths, **kwargs):
+        output = io.StringIO()
+        progress = reextract.Progress(kwargs.get('offset', 0),
+                                      stream=io.StringIO())
+        reextract.reextract(ITEM_PATH, paths, output, executor='thread',
+                            workers=2, batch_size=2, progress=progress,
+                            **kwargs)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        return lines, progress
+
+    def test_iter_warc(self):
+        with gzip.open(self.warc_path, 'rb') as f:
+            records = list(reextract.iter_warc(f))
+
+        self.assertEqual(['https://example.com/1', 'https://example.com/2',
+                          'https://example.com/3'],
+                         [url for url, _, _ in records])
+        self.assertEqual(make_page('Jane', 'f'), records[1][2])
+        self.assertEqual(make_page('Max', 'x'), records[2][2])
+
+    def test_iter_html_files(self):
+        records = list(reextract.iter_records([self.dump_dir]))
+
+        self.assertEqual(['a.html.gz', 'c.html'],
+                         [os.path.basename(url) for url, _, _ in records])
+        self.assertEqual(make_page('Bob'), records[0][2])
+
+    def test_reextract(self):
+        lines, progress = self.run_reextract([self.warc_path, self.dump_dir])
+
+        self.assertEqual([
+            {'url': 'https://example.com/1',
+             'item': {'name': ['John'], 'gender': ['m']}},
+            {'url': 'https://example.com/2',
+             'item': {'name': ['Jane'], 'gender': ['f']}},
+        ], lines[:2])
+        self.assertEqual([['Bob'], ['Ann']],
+                         [line['item']['name'] for line in lines[2:]])
+        self.assertEqual(5, progress.pages)
+        self.assertEqual(4, progress.items)
+        self.assertEqual(1, progress.dropped)
+        self.assertIn('offset 5: 5 pages, 4 items, 1 dropped',
+                      progress.stream.getvalue())
+
+    def test_process_pool(self):
+        output = io.StringIO()
+        reextract.reextract(ITEM_PATH, [self.dump_dir], output, workers=2,
+                            progress=reextract.Progress(stream=io.StringIO()))
+
+        self.assertEqual(2, len(output.getvalue().splitlines()))
+
+    def test_resume_from_checkpoint(self):
+        checkpoint = os.path.join(self.tmp_dir, 'offset')
+        self.run_reextract([self.warc_path], checkpoint=checkpoint)
+        self.assertEqual(3, reextract.read_checkpoint(checkpoint))
+
+        lines, progress = self.run_reextract(
+            [self.warc_path, self.dump_dir], checkpoint=checkpoint, offset=3)
+
+        self.assertEqual([['Bob'], ['Ann']],
+                         [line['item']['name'] for line in lines])
+        self.assertEqual(5, reextract.read_checkpoint(checkpoint))
+
+    def test_skipped_pages_are_not_decoded(self):
+        path = os.path.join(self.tmp_dir, 'broken.warc')
+        with open(path, 'wb') as f:
+            f.write(make_warc_record(
+                'https://example.com/1', b'not gzip',
+                http_headers=b'Content-Encoding: gzip\r\n'))
+            f.write(make_warc_record('https://example.com/2',
+                                     make_page('John')))
+
+        records = list(reextract.iter_records([path, self.dump_dir],
+                                              skip=2))
+
+        self.assertEqual(['a.html.gz', 'c.html'],
+                         [os.path.basename(url) for url, _, _ in records])
+
+    def test_command_line(self):
+        output = os.path.join(self.tmp_dir, 'items.ndjson')
+        checkpoint = os.path.join(self.tmp_dir, 'offset')
+        args = ['reextract', ITEM_PATH, self.dump_dir, '--executor', 'thread',
+                '--output', output, '--checkpoint', checkpoint]
+
+        self.assertEqual(0, main(args))
+        # nothing new, the output is kept
+        self.assertEqual(0, main(args))
+
+        with open(output) as f:
+            self.assertEqual(2, len(f.readlines()))
+
+
+if __name__ == '__main__':
+    unittest.main()
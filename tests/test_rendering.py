@@ -0,0 +1,194 @@
+import unittest
+
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from crawlit import Item, fields
+from crawlit.rendering import (
+    MetaRenderer, Renderer, RenderOnMiss, RenderingMiddleware, SplashRenderer,
+    is_rendered)
+
+try:
+    import scrapy_splash
+except ImportError:
+    scrapy_splash = None
+
+
+STATIC_BODY = b'<div id="app"></div>'
+RENDERED_BODY = b'<div id="app"><h1 class="name">John</h1><p class="age">33</p>'
+
+
+class ProfileItem(Item):
+    name = fields.String('.name::text', required=True)
+    age = fields.Integer('.age::text')
+
+
+class GenderItem(Item):
+    gender = fields.String('.gender::text', choices=('m', 'f'))
+
+
+class StubRenderer(Renderer):
+    """Local renderer, the test serves its requests."""
+
+    def __init__(self):
+        self.requests = []
+
+    def make_request(self, request, callback=None):
+        rendered = request.replace(callback=callback or request.callback,
+                                   meta=self._get_meta(request),
+                                   dont_filter=True)
+        self.requests.append(rendered)
+        return rendered
+
+
+def make_response(url, body, request=None):
+    return HtmlResponse(url, body=body, encoding='utf-8',
+                        request=request or Request(url))
+
+
+class Spider:
+    name = 'profiles'
+
+    def parse(self, response):
+        pass
+
+
+class TestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.renderer = StubRenderer()
+        self.stats = get_crawler().stats
+        self.render_on_miss = RenderOnMiss(self.renderer, min_attempts=3,
+                                           probe_every=4, stats=self.stats)
+        self.spider = Spider()
+
+    def load(self, response, item_class=ProfileItem):
+        return self.render_on_miss.load(item_class, response,
+                                        self.spider.parse)
+
+    def test_static_item(self):
+        item = self.load(make_response('https://a.com/1', RENDERED_BODY))
+
+        self.assertEqual({'name': ['John'], 'age': [33]}, dict(item))
+        self.assertEqual([], self.renderer.requests)
+        self.assertEqual(1, self.stats.get_value(
+            'crawlit/render/a.com/static_ok'))
+
+    def test_render_on_missing_required_field(self):
+        request = self.load(make_response('https://a.com/1', STATIC_BODY))
+
+        self.assertIsInstance(request, Request)
+        self.assertTrue(is_rendered(request))
+        self.assertEqual(self.spider.parse, request.callback)
+
+        item = self.load(make_response(request.url, RENDERED_BODY, request))
+
+        self.assertEqual(['John'], item['name'])
+        self.assertEqual(1, self.stats.get_value(
+            'crawlit/render/a.com/static_miss'))
+        self.assertEqual(1, self.stats.get_value(
+            'crawlit/render/a.com/rendered'))
+
+    def test_render_on_drop(self):
+        body = b'<p class="gender">x</p>'
+        request = self.load(make_response('https://a.com/1', body),
+                            GenderItem)
+
+        self.assertTrue(is_rendered(request))
+
+        with self.assertLogs('crawlit.rendering', 'WARNING'):
+            result = self.load(make_response(request.url, body, request),
+                               GenderItem)
+
+        self.assertIsNone(result)
+        self.assertEqual(1, self.stats.get_value(
+            'crawlit/render/a.com/rendered_miss'))
+
+    def test_domain_is_learned(self):
+        for idx in range(3):
+            self.load(make_response('https://a.com/%d' % idx, STATIC_BODY))
+        self.load(make_response('https://b.com/1', STATIC_BODY))
+
+        self.assertTrue(self.render_on_miss.needs_rendering('a.com'))
+        self.assertFalse(self.render_on_miss.needs_rendering('b.com'))
+
+        requests = [Request('https://a.com/%d' % idx) for idx in range(4)]
+        requests.append(Request('https://b.com/2'))
+        processed = [self.render_on_miss.process_request(r)
+                     for r in requests]
+
+        # every 4th request of a learned domain is still static
+        self.assertEqual([True, True, True, False, False],
+                         [is_rendered(r) for r in processed])
+        self.assertEqual(3, self.stats.get_value(
+            'crawlit/render/a.com/static_skipped'))
+
+    def test_domain_with_static_pages_is_not_learned(self):
+        for idx in range(10):
+            body = STATIC_BODY if idx % 3 else RENDERED_BODY
+            self.load(make_response('https://a.com/%d' % idx, body))
+
+        self.assertFalse(self.render_on_miss.needs_rendering('a.com'))
+
+    def test_middleware(self):
+        for idx in range(3):
+            self.load(make_response('https://a.com/%d' % idx, STATIC_BODY))
+        self.spider.render_on_miss = self.render_on_miss
+        middleware = RenderingMiddleware()
+        item = ProfileItem(name=['John'])
+
+        output = list(middleware.process_spider_output(
+            None, [item, Request('https://a.com/5')], self.spider))
+
+        self.assertIs(item, output[0])
+        self.assertTrue(is_rendered(output[1]))
+
+    def test_meta_renderer(self):
+        request = MetaRenderer({'selenium': True}).make_request(
+            Request('https://a.com/', meta={'page': 1}))
+
+        self.assertEqual({'page': 1, 'selenium': True,
+                          'crawlit_rendered': True}, request.meta)
+        self.assertTrue(request.dont_filter)
+
+    @unittest.skipIf(scrapy_splash is None, 'scrapy-splash is not installed')
+    def test_splash_renderer(self):
+
+        def errback(failure):
+            pass
+
+        spider = Spider()
+        original = Request('https://a.com/search', spider.parse,
+                           method='POST', body=b'q=john',
+                           headers={'X-Token': 'abc'},
+                           cookies={'session': '1'}, meta={'page': 1},
+                           priority=5, errback=errback)
+        request = SplashRenderer().make_request(original)
+
+        self.assertIsInstance(request, scrapy_splash.SplashRequest)
+        self.assertEqual('POST', request.method)
+        self.assertEqual(b'q=john', request.body)
+        self.assertEqual(b'abc', request.headers['X-Token'])
+        self.assertEqual({'session': '1'}, request.cookies)
+        self.assertEqual(5, request.priority)
+        self.assertEqual(spider.parse, request.callback)
+        self.assertIs(errback, request.errback)
+        self.assertEqual(1, request.meta['page'])
+        self.assertTrue(is_rendered(request))
+        self.assertTrue(request.dont_filter)
+
+    def test_from_crawler(self):
+        crawler = get_crawler(settings_dict={
+            'CRAWLIT_RENDERER': 'crawlit.rendering.MetaRenderer',
+            'CRAWLIT_RENDER_META': {'render': 1},
+            'CRAWLIT_RENDER_MIN_ATTEMPTS': 10,
+        })
+        render_on_miss = RenderOnMiss.from_crawler(crawler)
+
+        self.assertIsInstance(render_on_miss.renderer, MetaRenderer)
+        self.assertEqual({'render': 1}, render_on_miss.renderer.meta)
+        self.assertEqual(10, render_on_miss.min_attempts)
+
+
+if __name__ == '__main__':
+    unittest.main()
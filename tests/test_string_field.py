@@ -194,6 +194,35 @@ class TestCase(unittest.TestCase):
 
             self.assertListEqual(['a', 'd'], result)
 
+    def test_map_choices_compound_choice(self):
+        field = fields.String('.length', multi_choices=True,
+                              choices=('cable tv', 'tv', 'wi-fi', 'fi'))
+        result = field._map_choices('flat with cable tv and wi-fi')
+
+        self.assertListEqual(['cable tv', 'fi', 'tv', 'wi-fi'], result)
+
+    def test_map_choices_takes_first_declared_choice(self):
+        field = fields.String('.length', choices=('km', 'm'))
+        result = field._map_choices('1 m or 0.001 km')
+
+        self.assertEqual('km', result)
+
+    def test_map_choices_matches_find_pattern(self):
+        choices = ('a', 'bc', 'c d', 'e-f', 'g', '')
+        field = fields.String('.length', multi_choices=True, choices=choices,
+                              default='-')
+        values = ('a', 'a bc', 'abc', 'c d', 'xc dx', 'e-f', ' e-f,', 'g.',
+                  '..', '-g-', 'bca', '', 'a  bc', 'c  d')
+        for value in values:
+            expected = [c for c in choices
+                        if fields.String._find_pattern(c, value)] or '-'
+            if isinstance(expected, list) and len(expected) == 1:
+                expected = expected[0]
+            elif isinstance(expected, list):
+                expected = sorted(set(expected))
+
+            self.assertEqual(expected, field._map_choices(value), value)
+
     def test_multiple_choices_without_choices_raises_error(self):
         with self.assertRaises(ValueError) as err_ctx:
             fields.String('.length', multi_choices=True)